@@ -0,0 +1,291 @@
+"""
+Benchmark `GizaModel` end to end against a local stub of the Giza API, without the network:
+cold and warm initialization, local prediction throughput for several model sizes, the overhead
+of a verifiable prediction round trip and the Cairo serialization cost. The results are written
+as JSON so runs can be compared.
+
+    python benchmarks/bench_model.py --sizes 64 512 2048 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnx import TensorProto, helper
+from stub_api import StubGizaAPI
+
+OUTPUTS = 8
+LAYERS = 3
+
+
+def _mlp(path: Path, features: int) -> None:
+    """
+    Save a `LAYERS` deep MLP of width `features`, with an `OUTPUTS` wide last layer.
+    """
+    rng = np.random.default_rng(features)
+    nodes = []
+    initializers = []
+    current = "X"
+    for layer in range(LAYERS):
+        width = OUTPUTS if layer == LAYERS - 1 else features
+        weights = rng.normal(size=(features, width)).astype(np.float32) / features
+        initializers.append(onnx.numpy_helper.from_array(weights, f"W{layer}"))
+        output = "Y" if layer == LAYERS - 1 else f"H{layer}"
+        if layer < LAYERS - 1:
+            nodes.append(
+                helper.make_node("MatMul", [current, f"W{layer}"], [f"M{layer}"])
+            )
+            nodes.append(helper.make_node("Relu", [f"M{layer}"], [output]))
+        else:
+            nodes.append(helper.make_node("MatMul", [current, f"W{layer}"], [output]))
+        current = output
+    graph = helper.make_graph(
+        nodes,
+        f"mlp_{features}",
+        [helper.make_tensor_value_info("X", TensorProto.FLOAT, ["N", features])],
+        [helper.make_tensor_value_info("Y", TensorProto.FLOAT, ["N", OUTPUTS])],
+        initializer=initializers,
+    )
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 13)], ir_version=8
+    )
+    onnx.save(model, str(path))
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples)
+    return {
+        "n": len(values),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+    }
+
+
+def _timed(fn: Callable[[], Any], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_init(model_ids: Dict[int, int], workdir: Path, repeat: int) -> Dict:
+    """
+    Time creating a model and its session with an empty cache (cold) and a populated one (warm).
+    """
+    from giza.agents.cache import CACHE_DIR_VARIABLE
+    from giza.agents.model import GizaModel
+
+    results = {}
+    for size, model_id in model_ids.items():
+        cold, warm = [], []
+        for run in range(repeat):
+            os.environ[CACHE_DIR_VARIABLE] = str(workdir / f"cache-{size}-{run}")
+            for samples in (cold, warm):
+                start = time.perf_counter()
+                model = GizaModel(id=model_id, version=1)
+                resolved = time.perf_counter()
+                model.warmup()
+                samples.append((resolved - start, time.perf_counter() - resolved))
+        results[str(size)] = {
+            name: {
+                "metadata_seconds": _stats([s[0] for s in samples]),
+                "session_seconds": _stats([s[1] for s in samples]),
+                "total_seconds": _stats([sum(s) for s in samples]),
+            }
+            for name, samples in (("cold", cold), ("warm", warm))
+        }
+    os.environ[CACHE_DIR_VARIABLE] = str(workdir / "cache")
+    return results
+
+
+def bench_local(paths: Dict[int, Path], iterations: int, batch_size: int) -> Dict:
+    """
+    Local prediction latency and throughput, one feed at a time and with `predict_batch`.
+    """
+    from giza.agents.model import GizaModel
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for size, path in paths.items():
+        model = GizaModel(model_path=str(path))
+        feeds = [
+            {"X": rng.normal(size=(1, size)).astype(np.float32)}
+            for _ in range(batch_size)
+        ]
+        model.predict(input_feed=feeds[0])
+        single = _timed(lambda: model.predict(input_feed=feeds[0]), iterations)
+        batched = _timed(
+            lambda: model.predict_batch(feeds), max(1, iterations // batch_size)
+        )
+        results[str(size)] = {
+            "latency_seconds": _stats(single),
+            "predictions_per_second": 1 / float(np.mean(single)),
+            "batch_size": batch_size,
+            "batched_predictions_per_second": batch_size / float(np.mean(batched)),
+        }
+    return results
+
+
+def bench_verifiable(model_ids: Dict[int, int], iterations: int) -> Dict:
+    """
+    Verifiable prediction round trips against the stub endpoint, split by phase.
+    """
+    from giza.agents.instrumentation import HistogramRegistry
+    from giza.agents.model import GizaModel
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for size, model_id in model_ids.items():
+        model = GizaModel(id=model_id, version=1)
+        feed = {"X": rng.normal(size=(1, size)).astype(np.float32)}
+        # The first prediction works out and caches the output dtype
+        model.predict(input_feed=feed, verifiable=True)
+
+        registry = HistogramRegistry().install()
+        try:
+            for _ in range(iterations):
+                model.predict(input_feed=feed, verifiable=True)
+        finally:
+            registry.uninstall()
+        prefix = f"{model._prediction_namespace()}.verifiable."
+        results[str(size)] = {
+            name[len(prefix) :]: summary
+            for name, summary in registry.summary().items()
+            if name.startswith(prefix)
+        }
+    return results
+
+
+def bench_serialization(sizes: List[int], repeat: int) -> Dict:
+    """
+    Cost of serializing the inputs and deserializing the outputs of a verifiable prediction.
+    """
+    from giza.agents.serialization import deserialize_response, serialize_input
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for size in sizes:
+        value = rng.normal(size=size).astype(np.float32)
+        output = serialize_input(value, "ONNX_ORION", "FP16x16")
+        number = max(1, 10000 // size)
+        cases = {
+            "serialize_seconds": lambda: serialize_input(
+                value, "ONNX_ORION", "FP16x16"
+            ),
+            "deserialize_seconds": lambda: deserialize_response(
+                output, "Tensor<FP16x16>"
+            ),
+        }
+        results[str(size)] = {
+            name: min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+            for name, fn in cases.items()
+        }
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 512, 2048])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--server-delay",
+        type=float,
+        default=0.0,
+        help="Seconds the stub endpoint takes per prediction.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path(__file__).parent
+        / "results"
+        / f"model-{datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    args = parser.parse_args()
+
+    if "giza.cli" in sys.modules:
+        raise RuntimeError("giza.cli must be imported after GIZA_API_HOST is set")
+
+    with tempfile.TemporaryDirectory() as tmp, StubGizaAPI(
+        server_delay=args.server_delay
+    ) as api:
+        workdir = Path(tmp)
+        paths = {}
+        model_ids = {}
+        for model_id, size in enumerate(args.sizes, start=1):
+            paths[size] = workdir / f"mlp_{size}.onnx"
+            _mlp(paths[size], size)
+            api.add_model(model_id, 1, paths[size], output_shape=(1, OUTPUTS))
+            model_ids[size] = model_id
+
+        os.environ["GIZA_API_HOST"] = api.url
+        os.environ["GIZA_TOKEN"] = api.token()
+        os.environ["GIZA_AGENTS_CACHE_DIR"] = str(workdir / "cache")
+
+        results = {
+            "init": bench_init(model_ids, workdir, args.repeat),
+            "local": bench_local(paths, args.iterations, args.batch_size),
+            "verifiable": bench_verifiable(model_ids, args.iterations),
+            "serialization": bench_serialization(args.sizes, args.repeat),
+            "stub_requests": dict(api.requests),
+        }
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "onnxruntime": ort.__version__,
+        },
+        "config": {
+            "sizes": args.sizes,
+            "layers": LAYERS,
+            "outputs": OUTPUTS,
+            "iterations": args.iterations,
+            "repeat": args.repeat,
+            "batch_size": args.batch_size,
+            "server_delay": args.server_delay,
+        },
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the vectorized Cairo input serializer and output deserializer with osiris.
+
+    python benchmarks/bench_serialization.py --sizes 1000 100000 --repeat 5
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+from osiris.app import create_tensor_from_array, serializer
+from osiris.cairo.serde.deserialize import deserializer
+
+from giza.agents.serialization import (
+    deserialize_response,
+    serialize_input,
+    serialize_tensor,
+)
+
+
+def _osiris_tree_input(value: np.ndarray) -> str:
+    return serializer((value.flatten() * 100000).astype(np.int64))
+
+
+def _cairo_output(value: np.ndarray) -> str:
+    """
+    A Tensor<FP16x16> as returned by the prediction endpoints.
+    """
+    pairs = " ".join(
+        f"{abs(int(v * 2**16))} {'true' if v < 0 else 'false'}" for v in value
+    )
+    return f"[{len(value)}] [{pairs}]"
+
+
+def _same(reference, vectorized) -> bool:
+    if isinstance(reference, np.ndarray):
+        return np.array_equal(reference, vectorized)
+    return reference == vectorized
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'case':<22}{'size':>10}{'osiris (ms)':>14}{'vectorized (ms)':>18}{'speedup':>10}"
+    )
+    for size in args.sizes:
+        value = rng.normal(size=size).astype(np.float32)
+        output = _cairo_output(value)
+        cases = {
+            "FP16x16": (
+                lambda: serializer(create_tensor_from_array(value, "FP16x16")),
+                lambda: serialize_tensor(value, "FP16x16"),
+            ),
+            "FP32x32": (
+                lambda: serializer(create_tensor_from_array(value, "FP32x32")),
+                lambda: serialize_tensor(value, "FP32x32"),
+            ),
+            "XGB": (
+                lambda: _osiris_tree_input(value),
+                lambda: serialize_input(value, "XGB"),
+            ),
+            "Tensor<FP16x16> output": (
+                lambda: deserializer(output, "Tensor<FP16x16>"),
+                lambda: deserialize_response(output, "Tensor<FP16x16>"),
+            ),
+        }
+        for name, (reference, vectorized) in cases.items():
+            assert _same(reference(), vectorized()), f"{name} differs from osiris"
+            reference_time = min(timeit.repeat(reference, number=1, repeat=args.repeat))
+            vectorized_time = min(
+                timeit.repeat(vectorized, number=1, repeat=args.repeat)
+            )
+            print(
+                f"{name:<22}{size:>10}{reference_time * 1000:>14.2f}"
+                f"{vectorized_time * 1000:>18.2f}{reference_time / vectorized_time:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Local stand-in for the Giza API and a Cairo serving endpoint, enough for `GizaModel` to resolve
+a model version, download it and make verifiable predictions without the network.
+
+    with StubGizaAPI() as api:
+        api.add_model(1, 1, "model.onnx", output_shape=(1, 8))
+        os.environ["GIZA_API_HOST"] = api.url  # before giza.agents is imported
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+import jwt
+
+_TIMESTAMP = "2024-01-01T00:00:00Z"
+
+
+class _Version:
+    def __init__(
+        self,
+        model_id: int,
+        version_id: int,
+        path: Path,
+        endpoint_id: int,
+        output: str,
+    ) -> None:
+        self.model_id = model_id
+        self.version_id = version_id
+        self.content = Path(path).read_bytes()
+        self.endpoint_id = endpoint_id
+        self.output = output
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    routes = [
+        ("GET", re.compile(r"/api/v1/models/(\d+)"), "_model"),
+        ("GET", re.compile(r"/api/v1/models/(\d+)/versions/(\d+)"), "_version"),
+        (
+            "GET",
+            re.compile(r"/api/v1/models/(\d+)/versions/(\d+):download_original"),
+            "_download_url",
+        ),
+        ("GET", re.compile(r"/api/v1/endpoints"), "_endpoints"),
+        ("GET", re.compile(r"/api/v1/endpoints/(\d+)/logs"), "_logs"),
+        ("GET", re.compile(r"/files/(\d+)/(\d+)"), "_file"),
+        ("POST", re.compile(r"/serving/(\d+)/cairo_run"), "_predict"),
+    ]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        url = urlparse(self.path)
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(url.path)
+            if route_method == method and match is not None:
+                self.server.api.requests[handler.lstrip("_")] += 1
+                getattr(self, handler)(*match.groups(), query=parse_qs(url.query))
+                return
+        self._send_json({"detail": "Not Found"}, status=404)
+
+    def _send(
+        self,
+        body: bytes,
+        content_type: str,
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(
+        self, body: Any, status: int = 200, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        self._send(json.dumps(body).encode(), "application/json", status, headers)
+
+    def _find(self, model_id: str, version_id: str) -> Optional[_Version]:
+        version = self.server.api.versions.get((int(model_id), int(version_id)))
+        if version is None:
+            self._send_json({"detail": "Not Found"}, status=404)
+        return version
+
+    def _model(self, model_id: str, query: Dict) -> None:
+        self._send_json({"id": int(model_id), "name": f"model-{model_id}"})
+
+    def _version(self, model_id: str, version_id: str, query: Dict) -> None:
+        version = self._find(model_id, version_id)
+        if version is not None:
+            self._send_json(
+                {
+                    "version": version.version_id,
+                    "size": len(version.content),
+                    "status": "COMPLETED",
+                    "created_date": _TIMESTAMP,
+                    "last_update": _TIMESTAMP,
+                    "framework": "CAIRO",
+                }
+            )
+
+    def _download_url(self, model_id: str, version_id: str, query: Dict) -> None:
+        if self._find(model_id, version_id) is not None:
+            url = f"{self.server.api.url}/files/{model_id}/{version_id}"
+            self._send_json({"download_url": url})
+
+    def _file(self, model_id: str, version_id: str, query: Dict) -> None:
+        version = self._find(model_id, version_id)
+        if version is not None:
+            self._send(version.content, "application/octet-stream")
+
+    def _endpoints(self, query: Dict) -> None:
+        model_id = int(query["model_id"][0])
+        version_id = int(query["version_id"][0])
+        version = self.server.api.versions.get((model_id, version_id))
+        endpoints = []
+        if version is not None:
+            endpoints.append(
+                {
+                    "id": version.endpoint_id,
+                    "status": "COMPLETED",
+                    "uri": f"{self.server.api.url}/serving/{version.endpoint_id}",
+                    "size": "S",
+                    "model_id": model_id,
+                    "version_id": version_id,
+                    "is_active": True,
+                }
+            )
+        self._send_json(endpoints)
+
+    def _logs(self, endpoint_id: str, query: Dict) -> None:
+        self._send_json({"logs": ""})
+
+    def _predict(self, endpoint_id: str, query: Dict) -> None:
+        start = time.perf_counter()
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        version = next(
+            (
+                version
+                for version in self.server.api.versions.values()
+                if version.endpoint_id == int(endpoint_id)
+            ),
+            None,
+        )
+        if version is None or "args" not in body:
+            self._send_json({"detail": "Bad Request"}, status=400)
+            return
+        if self.server.api.server_delay:
+            time.sleep(self.server.api.server_delay)
+        elapsed = (time.perf_counter() - start) * 1000
+        self._send_json(
+            {"request_id": uuid.uuid4().hex, "result": version.output},
+            headers={"Server-Timing": f"cairo;dur={elapsed:.3f}"},
+        )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    api: "StubGizaAPI"
+
+
+class StubGizaAPI:
+    """
+    Serves the models, versions, endpoints and predict routes used by `GizaModel` from a thread.
+
+    Args:
+        server_delay (float): Seconds every prediction takes on the server. Defaults to 0.
+    """
+
+    def __init__(self, server_delay: float = 0.0) -> None:
+        self.server_delay = server_delay
+        self.versions: Dict[Tuple[int, int], _Version] = {}
+        self.requests: Dict[str, int] = {
+            name.lstrip("_"): 0 for _, _, name in _Handler.routes
+        }
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.api = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @staticmethod
+    def token() -> str:
+        """
+        A token the Giza clients accept, set it as `GIZA_TOKEN`.
+        """
+        return jwt.encode({"sub": "benchmark"}, "stub-giza-api-" * 4, algorithm="HS256")
+
+    def add_model(
+        self,
+        model_id: int,
+        version_id: int,
+        path: Union[str, Path],
+        output_shape: Sequence[int],
+    ) -> None:
+        """
+        Serve an ONNX model as a completed Cairo version with one active endpoint.
+
+        Args:
+            model_id (int): The model id.
+            version_id (int): The version id.
+            path (Union[str, Path]): The ONNX file downloaded by the clients.
+            output_shape (Sequence[int]): Shape of the Tensor<FP16x16> returned by the predictions.
+        """
+        size = 1
+        for dim in output_shape:
+            size *= dim
+        shape = " ".join(str(dim) for dim in output_shape)
+        values = " ".join(
+            f"{(i % 7) * 2**15} {'true' if i % 2 else 'false'}" for i in range(size)
+        )
+        self.versions[(model_id, version_id)] = _Version(
+            model_id,
+            version_id,
+            Path(path),
+            endpoint_id=len(self.versions) + 1,
+            output=f"[{shape}] [{values}]",
+        )
+
+    def start(self) -> "StubGizaAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubGizaAPI":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
@@ -0,0 +1,54 @@
+import numpy as np
+import onnx
+import pytest
+from onnx import TensorProto, helper
+
+from giza.agents.cache import CACHE_DIR_VARIABLE
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Keep the model caches of every test in its own temporary directory.
+    """
+    directory = tmp_path / "cache"
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(directory))
+    return directory
+
+
+@pytest.fixture
+def linear_model_factory(tmp_path):
+    """
+    Build small `X @ W` ONNX models on disk, returns the path of the saved model.
+    """
+
+    def factory(batch_dim="N", features=3, outputs=2, name="linear.onnx"):
+        weights = helper.make_tensor(
+            "W",
+            TensorProto.FLOAT,
+            [features, outputs],
+            np.arange(features * outputs, dtype=np.float32).tolist(),
+        )
+        graph = helper.make_graph(
+            [helper.make_node("MatMul", ["X", "W"], ["Y"])],
+            "linear",
+            [
+                helper.make_tensor_value_info(
+                    "X", TensorProto.FLOAT, [batch_dim, features]
+                )
+            ],
+            [
+                helper.make_tensor_value_info(
+                    "Y", TensorProto.FLOAT, [batch_dim, outputs]
+                )
+            ],
+            initializer=[weights],
+        )
+        model = helper.make_model(
+            graph, opset_imports=[helper.make_opsetid("", 13)], ir_version=8
+        )
+        path = tmp_path / name
+        onnx.save(model, str(path))
+        return str(path)
+
+    return factory
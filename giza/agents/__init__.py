@@ -1,7 +1,10 @@
+import importlib
 import logging
 import pathlib
+from typing import TYPE_CHECKING, Any
 
-from giza.agents.agent import AgentResult, Contract, ContractHandler, GizaAgent
+if TYPE_CHECKING:
+    from giza.agents.agent import AgentResult, Contract, ContractHandler, GizaAgent
 
 # The absolute path to this module
 __module_path__ = pathlib.Path(__file__).parent
@@ -40,3 +43,11 @@ def set_logging_level(level: int) -> None:
 
 
 __all__ = ["GizaAgent", "AgentResult", "ContractHandler", "Contract"]
+
+
+def __getattr__(name: str) -> Any:
+    # The agents pull in ape, which is slow to import, so it is only loaded when used. This keeps
+    # the start of processes that only need the models fast, like the inference pool workers.
+    if name in __all__:
+        return getattr(importlib.import_module("giza.agents.agent"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
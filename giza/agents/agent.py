@@ -1,7 +1,10 @@
+import asyncio
 import json
 import logging
 import os
+import threading
 import time
+from concurrent.futures import Future
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Self, Tuple, Union
@@ -14,14 +17,19 @@ from ape_accounts.accounts import InvalidPasswordError
 from giza.cli import API_HOST
 from giza.cli.client import AgentsClient, EndpointsClient, JobsClient, ProofsClient
 from giza.cli.schemas.agents import Agent, AgentList, AgentUpdate
-from giza.cli.schemas.jobs import Job, JobList
+from giza.cli.schemas.jobs import Job
 from giza.cli.schemas.proofs import Proof
 from giza.cli.utils.enums import JobKind, JobStatus
 from requests import HTTPError
 
+from giza.agents.concurrency import payload_key
 from giza.agents.exceptions import DuplicateIntegrationError
 from giza.agents.integration import IntegrationFactory
+from giza.agents.jobs import JobIndex, get_job_index
 from giza.agents.model import GizaModel
+from giza.agents.polling import PollSchedule, get_duration_history
+from giza.agents.store import VerificationStore, get_verification_store
+from giza.agents.tracker import ProofTracker, TrackedJob, get_proof_tracker
 from giza.agents.utils import read_json
 
 logger = logging.getLogger(__name__)
@@ -50,9 +58,22 @@ class GizaAgent(GizaModel):
             contracts (Dict[str, str]): The contracts to handle, must be a dictionary with the contract name as the key and the contract address as the value.
             integrations (List[str]): The integrations to use.
             chain_id (int): The ID of the blockchain network.
-            **kwargs: Additional keyword arguments.
-        """
-        super().__init__(id=id, version=version_id)
+            **kwargs: Additional keyword arguments, `prediction_cache` and `registry` are passed to the model,
+                `proof_tracker` follows the proof jobs of the results, the process wide one by default,
+                `verification_store` records them, the one of the cache directory by default,
+                `reuse_proofs` enables proof reuse in `predict` by default.
+        """
+        super().__init__(
+            id=id,
+            version=version_id,
+            prediction_cache=kwargs.pop("prediction_cache", None),
+            registry=kwargs.pop("registry", None),
+        )
+        self._proof_tracker: Optional[ProofTracker] = kwargs.pop("proof_tracker", None)
+        self._verification_store: Optional[VerificationStore] = kwargs.pop(
+            "verification_store", None
+        )
+        self._reuse_proofs: bool = kwargs.pop("reuse_proofs", False)
         self._agents_client = kwargs.pop("agents_client", AgentsClient(API_HOST))
         self._agent = self._retrieve_agent_info(self._agents_client)
 
@@ -258,6 +279,8 @@ class GizaAgent(GizaModel):
         job_size: str = "M",
         dry_run: bool = False,
         model_category: Optional[str] = None,
+        emulate: bool = False,
+        reuse_proof: Optional[bool] = None,
         **result_kwargs: Any,
     ) -> Optional[Union[Tuple[Any, Any], "AgentResult"]]:
         """
@@ -267,7 +290,25 @@ class GizaAgent(GizaModel):
             input_file: The input file to use for inference
             input_feed: The input feed to use for inference
             job_size: The size of the job to run
-        """
+            emulate: Emulate a verifiable dry run locally, see `GizaModel.predict`
+            reuse_proof: Return the verified result of a previous request with the same payload and fixed point
+                implementation, on an endpoint still serving the model, instead of generating a new proof.
+                Defaults to the `reuse_proofs` of the agent.
+        """
+        reused, proof_key, payload = self._reuse_proof(
+            reuse_proof,
+            verifiable and not (dry_run or emulate),
+            input_file,
+            input_feed,
+            fp_impl,
+            custom_output_dtype,
+            model_category,
+            job_size,
+            result_kwargs,
+        )
+        if reused is not None:
+            return reused
+
         result = super().predict(
             input_file=input_file,
             input_feed=input_feed,
@@ -277,8 +318,95 @@ class GizaAgent(GizaModel):
             job_size=job_size,
             dry_run=dry_run,
             model_category=model_category,
+            emulate=emulate,
+            payload=payload,
+        )
+
+        return self._build_result(
+            result,
+            verifiable,
+            input_feed,
+            dry_run or emulate,
+            result_kwargs,
+            proof_key,
         )
 
+    async def apredict(
+        self,
+        input_file: Optional[str] = None,
+        input_feed: Optional[Dict] = None,
+        verifiable: bool = False,
+        fp_impl: str = "FP16x16",
+        custom_output_dtype: Optional[str] = None,
+        job_size: str = "M",
+        dry_run: bool = False,
+        model_category: Optional[str] = None,
+        emulate: bool = False,
+        reuse_proof: Optional[bool] = None,
+        **result_kwargs: Any,
+    ) -> Optional[Union[Tuple[Any, Any], "AgentResult"]]:
+        """
+        Async version of `predict`, runs a round of inference on the model and saves the result.
+
+        Args:
+            input_file: The input file to use for inference
+            input_feed: The input feed to use for inference
+            job_size: The size of the job to run
+            emulate: Emulate a verifiable dry run locally, see `GizaModel.predict`
+            reuse_proof: Return the verified result of a previous request with the same payload and fixed point
+                implementation, on an endpoint still serving the model, instead of generating a new proof.
+                Defaults to the `reuse_proofs` of the agent.
+        """
+        reused, proof_key, payload = self._reuse_proof(
+            reuse_proof,
+            verifiable and not (dry_run or emulate),
+            input_file,
+            input_feed,
+            fp_impl,
+            custom_output_dtype,
+            model_category,
+            job_size,
+            result_kwargs,
+        )
+        if reused is not None:
+            return reused
+
+        result = await super().apredict(
+            input_file=input_file,
+            input_feed=input_feed,
+            verifiable=verifiable,
+            fp_impl=fp_impl,
+            custom_output_dtype=custom_output_dtype,
+            job_size=job_size,
+            dry_run=dry_run,
+            model_category=model_category,
+            emulate=emulate,
+            payload=payload,
+        )
+
+        # Creating the result looks up the proof job, keep it off the event loop
+        return await asyncio.to_thread(
+            self._build_result,
+            result,
+            verifiable,
+            input_feed,
+            dry_run or emulate,
+            result_kwargs,
+            proof_key,
+        )
+
+    def _build_result(
+        self,
+        result: Optional[Tuple[Any, Any]],
+        verifiable: bool,
+        input_feed: Optional[Dict],
+        dry_run: bool,
+        result_kwargs: Dict[str, Any],
+        proof_key: Optional[str] = None,
+    ) -> Optional[Union[Tuple[Any, Any], "AgentResult"]]:
+        """
+        Wrap the result of a verifiable prediction in an `AgentResult`, with the hash its proof is reused by.
+        """
         self.verifiable = verifiable
 
         if not verifiable:
@@ -295,14 +423,108 @@ class GizaAgent(GizaModel):
                 input=input_feed,
                 request_id=request_id,
                 result=pred,
-                endpoint_id=self.endpoint_id,
+                endpoint_id=self._endpoint_for(request_id),
                 agent=self,
                 dry_run=dry_run,
-                **result_kwargs,
+                proof_key=proof_key,
+                **self._result_kwargs(result_kwargs),
             )
         else:
             raise ValueError("We are expecting result to be a tuple!")
 
+    def _reuse_proof(
+        self,
+        reuse_proof: Optional[bool],
+        verifiable: bool,
+        input_file: Optional[str],
+        input_feed: Optional[Dict],
+        fp_impl: str,
+        custom_output_dtype: Optional[str],
+        model_category: Optional[str],
+        job_size: str,
+        result_kwargs: Dict[str, Any],
+    ) -> Tuple[Optional["AgentResult"], Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Find the verified result of a previous request with the same payload, if proof reuse is enabled.
+
+        Returns:
+            The reused result, None if there is none. Then, when reuse is enabled, the hash the new
+            result is found by once verified and the payload to send, otherwise None and None.
+        """
+        if reuse_proof is None:
+            reuse_proof = self._reuse_proofs
+        if not (reuse_proof and verifiable):
+            return None, None, None
+
+        # Hash the serialized payload, inputs equal once in fixed point share their proof
+        payload = self._prepare_verifiable_payload(
+            input_file,
+            input_feed,
+            fp_impl=fp_impl,
+            model_category=model_category,
+            job_size=job_size,
+            dry_run=False,
+        )
+        # The job size does not change the proof, the output dtype changes the value parsed
+        hashed = {k: v for k, v in payload.items() if k != "job_size"}
+        proof_key = payload_key(
+            f"{self.model_id}/{self.version_id}/{fp_impl}/{custom_output_dtype}/{model_category}",
+            hashed,
+        )
+
+        result_kwargs = self._result_kwargs(dict(result_kwargs))
+        record = result_kwargs["store"].find_proof(proof_key)
+        if record is None or not self._serves(record.get("endpoint_id")):
+            return None, proof_key, payload
+        logger.info(
+            f"Reusing the proof of request ID {record['request_id']}, verified with the same payload"
+        )
+        reused = AgentResult.from_store(
+            record["request_id"], agent=self, **result_kwargs
+        )
+        return reused, None, None
+
+    def _serves(self, endpoint_id: Optional[int]) -> bool:
+        """
+        Whether an endpoint is one of the active endpoints of the model.
+        """
+        if self._balancer is not None:
+            return self._balancer.get(endpoint_id) is not None
+        return endpoint_id is not None and endpoint_id == self.endpoint_id
+
+    def _result_kwargs(self, result_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Give the results the proof tracker and verification store of the agent.
+        """
+        result_kwargs.setdefault(
+            "proof_tracker",
+            self._proof_tracker or get_proof_tracker(),
+        )
+        result_kwargs.setdefault(
+            "store",
+            self._verification_store or get_verification_store(),
+        )
+        return result_kwargs
+
+    def restore_result(self, request_id: str, **result_kwargs: Any) -> "AgentResult":
+        """
+        Rebuild the result of a verifiable prediction from the verification store, e.g. after a restart.
+        A verified result is returned as is, otherwise its verification resumes.
+
+        Args:
+            request_id (str): The request id of the prediction.
+            **result_kwargs: Passed to `AgentResult`.
+
+        Returns:
+            AgentResult: The result.
+
+        Raises:
+            ValueError: If the request is not in the store.
+        """
+        return AgentResult.from_store(
+            request_id, agent=self, **self._result_kwargs(result_kwargs)
+        )
+
 
 class AgentResult:
     """
@@ -333,20 +555,110 @@ class AgentResult:
         self._endpoint_client = endpoint_client
         self._jobs_client = jobs_client
         self._proofs_client = proofs_client
-        self._endpoint_id = agent.endpoint_id
+        self._endpoint_id = kwargs.get("endpoint_id", agent.endpoint_id)
         self._framework = agent.framework
         self._model_id = agent.model_id
         self._version_id = agent.version_id
         self._verify_job: Optional[Job] = None
+        self._job_index: JobIndex = kwargs.get("job_index") or get_job_index()
         self._timeout: int = kwargs.get("timeout", 600)
-        self._poll_interval: int = kwargs.get("poll_interval", 10)
+        # None polls adaptively, from the durations of the previous jobs
+        self._poll_interval: Optional[int] = kwargs.get("poll_interval")
+        self._min_poll_interval: float = kwargs.get("min_poll_interval", 1.0)
+        self._max_poll_interval: float = kwargs.get("max_poll_interval", 30.0)
+        self._created_at = time.time()
+        self.latencies: Dict[str, Dict[str, Any]] = {}
+        # Without a tracker the result polls its proof job itself
+        self._proof_tracker: Optional[ProofTracker] = kwargs.get("proof_tracker")
+        self._future: Optional[Future] = None
+        self._future_lock = threading.Lock()
         self._proof: Proof = None
         self._dry_run: bool = kwargs.get("dry_run", False)
+        self._store: Optional[VerificationStore] = kwargs.get("store")
+        # Hash of the payload, the proof is reused for the same payload once verified
+        self._proof_key: Optional[str] = kwargs.get("proof_key")
 
         if not self._dry_run:
-            self._proof_job: Job = self._get_proof_job(self._endpoint_client)
+            record = self._store.get(request_id) if self._store is not None else None
+            if record is not None and record.get("job") is not None:
+                self._proof_job: Job = Job(**record["job"])
+                self._restore(record)
+            else:
+                self._proof_job = self._get_proof_job(self._endpoint_client)
+                self._save(
+                    input=self.input,
+                    value=self.__value,
+                    endpoint_id=self._endpoint_id,
+                    model_id=self._model_id,
+                    version_id=self._version_id,
+                    job=self._proof_job.model_dump(mode="json"),
+                    proof_key=self._proof_key,
+                )
+            # Results of an agent start verifying right away, `value` then only waits for the rest
+            if not self.verified and kwargs.get(
+                "verify_eagerly", self._proof_tracker is not None
+            ):
+                self.track()
         logger.debug(f"{self} created")
 
+    @classmethod
+    def from_store(
+        cls,
+        request_id: str,
+        agent: GizaAgent,
+        store: Optional[VerificationStore] = None,
+        **kwargs: Any,
+    ) -> "AgentResult":
+        """
+        Rebuild a result from its record in the verification store.
+
+        Args:
+            request_id (str): The request id of the prediction.
+            agent (GizaAgent): The agent that made the prediction.
+            store (Optional[VerificationStore]): The store. Defaults to the one of the cache directory.
+            **kwargs: Passed to the constructor.
+
+        Returns:
+            AgentResult: The result, verified if it was already.
+
+        Raises:
+            ValueError: If the request is not in the store.
+        """
+        store = store or get_verification_store()
+        record = store.get(request_id)
+        if record is None:
+            raise ValueError(f"No stored result for request ID {request_id}")
+        kwargs.setdefault("endpoint_id", record.get("endpoint_id", agent.endpoint_id))
+        return cls(
+            input=record.get("input"),
+            request_id=request_id,
+            result=record.get("value"),
+            agent=agent,
+            store=store,
+            **kwargs,
+        )
+
+    def _restore(self, record: Dict[str, Any]) -> None:
+        """
+        Pick up the verification where the stored record left it.
+        """
+        if record.get("proof") is not None:
+            self._proof = Proof(**record["proof"])
+        self.latencies = dict(record.get("latencies", {}))
+        # The proof job started with the stored request, not with this process
+        self._created_at = record.get("created_at", self._created_at)
+        self._proof_key = self._proof_key or record.get("proof_key")
+        self.verified = bool(record.get("verified", False))
+        logger.info(f"Restored request ID {self.request_id}, verified: {self.verified}")
+
+    def _save(self, **fields: Any) -> None:
+        if self._store is None:
+            return
+        try:
+            self._store.update(self.request_id, **fields)
+        except Exception as e:
+            logger.warning(f"Could not store request ID {self.request_id}: {e}")
+
     def __repr__(self) -> str:
         return f"AgentResult(input={self.input}, request_id={self.request_id}, value={self.__value})"
 
@@ -354,14 +666,12 @@ class AgentResult:
         """
         Get the proof job.
         """
-
-        jobs: JobList = client.list_jobs(self._endpoint_id)
-        for job in jobs.root:
-            if job.request_id == self.request_id:
-                logger.info(f"Proof job for request ID {self.request_id} found")
-                logger.debug(f"Proof job: {job}")
-                return job
-        raise ValueError(f"Proof job for request ID {self.request_id} not found")
+        job = self._job_index.find(client, self._endpoint_id, self.request_id)
+        if job is None:
+            raise ValueError(f"Proof job for request ID {self.request_id} not found")
+        logger.info(f"Proof job for request ID {self.request_id} found")
+        logger.debug(f"Proof job: {job}")
+        return job
 
     @property
     def value(self) -> Any:
@@ -382,19 +692,91 @@ class AgentResult:
             self.verified = True
             return
 
+        if self._future is not None or (
+            self._proof_tracker is not None and self._poll_interval is None
+        ):
+            self.track().result()
+            return
         self._wait_for_proof(self._jobs_client, self._timeout, self._poll_interval)
         self.verified = self._verify_proof(self._endpoint_client)
 
     def _wait_for_proof(
-        self, client: JobsClient, timeout: int = 600, poll_interval: int = 10
+        self,
+        client: JobsClient,
+        timeout: int = 600,
+        poll_interval: Optional[int] = None,
     ) -> None:
         """
         Wait for the proof job to finish.
         """
         self._wait_for(self._proof_job, client, timeout, poll_interval, JobKind.PROOF)
+        self._get_proof()
+
+    def _get_proof(self) -> None:
+        """
+        Get the proof of the completed proof job.
+        """
         self._proof = self._endpoint_client.get_proof(
             self._endpoint_id, self._proof_job.request_id
         )
+        self._save(
+            job=self._proof_job.model_dump(mode="json"),
+            proof=self._proof.model_dump(mode="json"),
+            proof_id=self._proof.id,
+            latencies=self.latencies,
+        )
+
+    @property
+    def future(self) -> Future:
+        """
+        The verification of the result, started in the background if it is not yet.
+        Resolved with the value of the inference once the proof is verified.
+        """
+        return self.track()
+
+    async def value_async(self) -> Any:
+        """
+        Get the value of the inference, waiting for the verification without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.track())
+
+    def track(self) -> Future:
+        """
+        Follow the proof job with the proof tracker, and get and verify the proof once it is done, without blocking.
+        Use the process wide tracker if the result has none.
+
+        Returns:
+            Future: Resolved with the value of the inference once the proof is verified, `add_done_callback` to be notified.
+        """
+        with self._future_lock:
+            if self._future is None and (self._dry_run or self.verified):
+                self.verified = True
+                self._future = Future()
+                self._future.set_result(self.__value)
+            elif self._future is None:
+                tracker = self._proof_tracker or get_proof_tracker()
+                self._future = tracker.track(
+                    self._proof_job,
+                    self._jobs_client,
+                    kind=JobKind.PROOF,
+                    timeout=self._timeout,
+                    schedule=self._poll_schedule(self._proof_job, JobKind.PROOF),
+                    started=self._created_at,
+                    then=self._complete_proof,
+                )
+            return self._future
+
+    def _complete_proof(self, tracked: TrackedJob) -> Any:
+        """
+        Get and verify the proof of a completed proof job, then return the value.
+        """
+        self._proof_job = tracked.job
+        self._record_latency(
+            tracked.job, JobKind.PROOF, tracked.waited, tracked.polls, self._created_at
+        )
+        self._get_proof()
+        self.verified = self._verify_proof(self._endpoint_client)
+        return self.__value
 
     def _verify_proof(self, client: EndpointsClient) -> bool:
         """
@@ -406,24 +788,76 @@ class AgentResult:
         )
         logger.info(f"Verify result is {verify_result.verification}")
         logger.info(f"Verify time is {verify_result.verification_time}")
+        self._save(
+            verified=True,
+            verification=verify_result.verification,
+            verification_time=verify_result.verification_time,
+        )
+        if self._store is not None and self._proof_key and verify_result.verification:
+            self._store.remember_proof(self._proof_key, self.request_id)
         return True
 
+    def _duration_key(self, job: Job, kind: JobKind) -> str:
+        return get_duration_history().key(
+            self._model_id, self._version_id, job.size, kind
+        )
+
+    def _poll_schedule(self, job: Job, kind: JobKind) -> PollSchedule:
+        """
+        Schedule the polls of a job around the median duration of the previous jobs of the same model version, kind and size.
+        """
+        if self._poll_interval is not None:
+            return PollSchedule(
+                min_interval=self._poll_interval,
+                max_interval=self._poll_interval,
+                jitter=0.0,
+            )
+        expected = get_duration_history().expected(self._duration_key(job, kind))
+        logger.debug(f"Expected {kind} job duration: {expected}")
+        return PollSchedule(
+            expected=expected,
+            min_interval=self._min_poll_interval,
+            max_interval=self._max_poll_interval,
+        )
+
+    def _record_latency(
+        self, job: Job, kind: JobKind, waited: float, polls: int, started: float
+    ) -> None:
+        """
+        Record the duration of a completed job for the next estimates and expose it in `latencies`.
+        """
+        duration = job.elapsed_time
+        if duration is None:
+            duration = time.time() - started
+        history = get_duration_history()
+        key = self._duration_key(job, kind)
+        history.record(key, duration)
+        self.latencies[str(kind).lower()] = {
+            "duration": duration,
+            "waited": waited,
+            "polls": polls,
+            "history": history.stats(key),
+        }
+
     def _wait_for(
         self,
         job: Job,
         client: JobsClient,
         timeout: int = 600,
-        poll_interval: int = 10,
+        poll_interval: Optional[int] = None,
         kind: JobKind = JobKind.VERIFY,
     ) -> None:
         """
         Wait for a job to finish.
 
+        Without a poll interval, the job is polled more often as it gets close to the duration of the
+        previous jobs of the model, then with a growing interval once it is overdue.
+
         Args:
             job (Job): The job to wait for.
             client (JobsClient): The client to use.
             timeout (int): The timeout.
-            poll_interval (int): The poll interval.
+            poll_interval (Optional[int]): Fixed poll interval. Defaults to None, to poll adaptively.
             kind (JobKind): The kind of job.
 
         Raises:
@@ -432,11 +866,16 @@ class AgentResult:
         """
         start_time = time.time()
         wait_timeout = start_time + float(timeout)
+        # The proof job starts with the prediction
+        started = self._created_at if kind == JobKind.PROOF else start_time
+        schedule = None
+        polls = 0
 
         while True:
             now = time.time()
             if job.status == JobStatus.COMPLETED:
                 logger.info(f"{str(kind).capitalize()} job completed")
+                self._record_latency(job, kind, now - start_time, polls, started)
                 return
             elif job.status == JobStatus.FAILED:
                 logger.error(f"{str(kind).capitalize()} job failed")
@@ -446,12 +885,19 @@ class AgentResult:
             elif now > wait_timeout:
                 logger.error(f"{str(kind).capitalize()} job timed out")
                 raise TimeoutError(f"{str(kind).capitalize()} job timed out")
+
+            if poll_interval is not None:
+                delay = poll_interval
             else:
-                job = client.get(job.id, params={"kind": kind})
-                logger.info(
-                    f"{str(kind).capitalize()} job is still running, elapsed time: {now - start_time}"
-                )
-            time.sleep(poll_interval)
+                if schedule is None:
+                    schedule = self._poll_schedule(job, kind)
+                delay = min(schedule.next_delay(now - started), wait_timeout - now)
+            time.sleep(delay)
+            job = client.get(job.id, params={"kind": kind})
+            polls += 1
+            logger.info(
+                f"{str(kind).capitalize()} job status is {job.status}, elapsed time: {time.time() - start_time}"
+            )
 
 
 class ContractHandler:
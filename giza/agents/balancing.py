@@ -0,0 +1,148 @@
+import itertools
+import logging
+import threading
+import time
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("round_robin", "least_outstanding")
+
+
+class Replica:
+    """
+    An endpoint serving the model, as seen by the balancer.
+
+    Attributes:
+        endpoint_id (int): The id of the endpoint.
+        uri (str): The URI predictions are sent to.
+        outstanding (int): Requests sent to the endpoint that have not finished yet.
+        failures (int): Consecutive failed requests.
+        unhealthy_until (float): Monotonic time until which the endpoint is out of rotation.
+    """
+
+    def __init__(self, endpoint_id: int, uri: str) -> None:
+        self.endpoint_id = endpoint_id
+        self.uri = uri
+        self.outstanding = 0
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return self.unhealthy_until <= now
+
+    def __repr__(self) -> str:
+        return f"Replica(endpoint_id={self.endpoint_id}, uri={self.uri})"
+
+
+class EndpointBalancer:
+    """
+    Spread requests across the active endpoints of a model version.
+
+    An endpoint that fails `max_failures` times in a row is taken out of rotation for `cooldown`
+    seconds, doubled on every new failure after it comes back, up to `max_cooldown`. A success
+    puts it back in full rotation. When every endpoint is out of rotation, the one that comes back
+    first is used rather than failing the request.
+
+    Args:
+        replicas (Sequence[Replica]): The endpoints to balance.
+        strategy (str): "round_robin", or "least_outstanding" to pick the endpoint with the fewest requests in flight. Defaults to "round_robin".
+        max_failures (int): Consecutive failures that take an endpoint out of rotation. Defaults to 1.
+        cooldown (float): Seconds an endpoint is out of rotation the first time. Defaults to 30.
+        max_cooldown (float): Maximum seconds an endpoint is out of rotation. Defaults to 300.
+
+    Raises:
+        ValueError: If there are no replicas or the strategy is unknown.
+    """
+
+    def __init__(
+        self,
+        replicas: Sequence[Replica],
+        strategy: str = "round_robin",
+        max_failures: int = 1,
+        cooldown: float = 30.0,
+        max_cooldown: float = 300.0,
+    ) -> None:
+        if len(replicas) == 0:
+            raise ValueError("At least one endpoint is needed to balance requests")
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                f"Unknown balancing strategy {strategy}, expected one of {STRATEGIES}"
+            )
+        self.replicas: List[Replica] = list(replicas)
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def acquire(self, exclude: Sequence[Replica] = ()) -> Replica:
+        """
+        Pick the endpoint for the next request and count it as outstanding, `release` it once done.
+
+        Args:
+            exclude (Sequence[Replica]): Endpoints not to pick, e.g. those already tried for this request, unless there are no others.
+
+        Returns:
+            Replica: The endpoint to send the request to.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = next(self._counter) % len(self.replicas)
+            # Every endpoint in turn, skipping those out of rotation, ties go to the next one
+            rotated = self.replicas[start:] + self.replicas[:start]
+            candidates = [r for r in rotated if r not in exclude] or rotated
+            healthy = [r for r in candidates if r.healthy(now)]
+            if not healthy:
+                replica = min(candidates, key=lambda r: r.unhealthy_until)
+                logger.warning(f"No healthy endpoint left, trying {replica}")
+            elif self.strategy == "least_outstanding":
+                replica = min(healthy, key=lambda r: r.outstanding)
+            else:
+                replica = healthy[0]
+            replica.outstanding += 1
+            return replica
+
+    def release(self, replica: Replica, ok: Optional[bool] = True) -> None:
+        """
+        Record the end of a request sent to an endpoint.
+
+        Args:
+            replica (Replica): The endpoint returned by `acquire`.
+            ok (Optional[bool]): False if the endpoint failed to serve the request, None if the request
+                ended without telling, e.g. it was cancelled.
+        """
+        with self._lock:
+            replica.outstanding -= 1
+            if ok is None:
+                return
+            if ok:
+                replica.failures = 0
+                replica.unhealthy_until = 0.0
+                return
+            replica.failures += 1
+            if replica.failures >= self.max_failures:
+                cooldown = min(
+                    self.cooldown * 2 ** (replica.failures - self.max_failures),
+                    self.max_cooldown,
+                )
+                replica.unhealthy_until = time.monotonic() + cooldown
+                logger.warning(
+                    f"Endpoint {replica.endpoint_id} failed {replica.failures} times, "
+                    f"out of rotation for {cooldown:.0f}s"
+                )
+
+    def healthy(self) -> List[Replica]:
+        """
+        The endpoints currently in rotation.
+        """
+        with self._lock:
+            now = time.monotonic()
+            return [r for r in self.replicas if r.healthy(now)]
+
+    def get(self, endpoint_id: int) -> Optional[Replica]:
+        """
+        Get an endpoint by id.
+        """
+        return next((r for r in self.replicas if r.endpoint_id == endpoint_id), None)
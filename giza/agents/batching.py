@@ -0,0 +1,353 @@
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import onnxruntime as ort
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def has_dynamic_batch_axis(session: ort.InferenceSession) -> bool:
+    """
+    Check if every input of the session accepts a variable leading (batch) dimension.
+
+    Args:
+        session (ort.InferenceSession): The session to inspect.
+
+    Returns:
+        bool: True if the inputs can be stacked along the first axis.
+    """
+    for node in session.get_inputs():
+        if not node.shape:
+            return False
+        if isinstance(node.shape[0], int) and node.shape[0] > 0:
+            return False
+    return True
+
+
+def _batch_signature(input_feed: Dict[str, np.ndarray]) -> Tuple:
+    """
+    Build a key describing the non-batch shape and dtype of every input, feeds with the
+    same signature can be concatenated together.
+    """
+    return tuple(
+        (name, np.asarray(value).shape[1:], np.asarray(value).dtype.str)
+        for name, value in sorted(input_feed.items())
+    )
+
+
+def _rows(session: ort.InferenceSession, input_feed: Dict[str, np.ndarray]) -> int:
+    """
+    Number of rows along the batch axis of an input feed.
+    """
+    first_input = session.get_inputs()[0].name
+    value = np.asarray(input_feed[first_input])
+    return value.shape[0] if value.ndim > 0 else 1
+
+
+def stack_input_feeds(
+    session: ort.InferenceSession, input_feeds: Sequence[Dict[str, np.ndarray]]
+) -> Tuple[Dict[str, np.ndarray], List[int]]:
+    """
+    Concatenate several input feeds along the batch axis, using the session input metadata.
+
+    Args:
+        session (ort.InferenceSession): The session the feeds are meant for.
+        input_feeds (Sequence[Dict[str, np.ndarray]]): The input feeds to stack.
+
+    Returns:
+        A tuple (input_feed, sizes) with the stacked feed and the number of rows of each original feed.
+
+    Raises:
+        ValueError: If the feeds can not be stacked together.
+    """
+    if len(input_feeds) == 0:
+        raise ValueError("At least one input feed is needed")
+
+    signatures = {_batch_signature(feed) for feed in input_feeds}
+    if len(signatures) > 1:
+        raise ValueError("Input feeds have different shapes or dtypes")
+
+    sizes = [_rows(session, feed) for feed in input_feeds]
+    stacked = {
+        node.name: np.concatenate(
+            [np.asarray(feed[node.name]) for feed in input_feeds], axis=0
+        )
+        for node in session.get_inputs()
+    }
+    return stacked, sizes
+
+
+def split_outputs(
+    outputs: Sequence[np.ndarray], sizes: Sequence[int]
+) -> List[List[np.ndarray]]:
+    """
+    Split the outputs of a stacked run back into one list of outputs per original feed.
+
+    Args:
+        outputs (Sequence[np.ndarray]): The outputs of `session.run`.
+        sizes (Sequence[int]): The number of rows of each original feed.
+
+    Returns:
+        A list with the outputs of every feed.
+
+    Raises:
+        ValueError: If an output does not keep the batch axis.
+    """
+    total = sum(sizes)
+    indices = np.cumsum(sizes)[:-1]
+    per_output = []
+    for output in outputs:
+        output = np.asarray(output)
+        if output.ndim == 0 or output.shape[0] != total:
+            raise ValueError(
+                f"Output with shape {output.shape} can not be split into {len(sizes)} results"
+            )
+        per_output.append(np.split(output, indices, axis=0))
+    return [list(results) for results in zip(*per_output)]
+
+
+def run_batch(
+    session: ort.InferenceSession, input_feeds: Sequence[Dict[str, np.ndarray]]
+) -> List[List[np.ndarray]]:
+    """
+    Run several input feeds with as few `session.run` calls as possible.
+
+    Feeds are stacked along the batch axis when the session allows it, falling back to
+    one run per feed for models with a fixed batch size or outputs that can't be split.
+
+    Args:
+        session (ort.InferenceSession): The session to run.
+        input_feeds (Sequence[Dict[str, np.ndarray]]): The input feeds.
+
+    Returns:
+        A list with the outputs of every feed, in the same order.
+    """
+    if len(input_feeds) == 1 or not has_dynamic_batch_axis(session):
+        return [session.run(None, feed) for feed in input_feeds]
+
+    groups: Dict[Tuple, List[int]] = {}
+    for index, feed in enumerate(input_feeds):
+        groups.setdefault(_batch_signature(feed), []).append(index)
+
+    results: List[Any] = [None] * len(input_feeds)
+    for indexes in groups.values():
+        feeds = [input_feeds[i] for i in indexes]
+        if len(feeds) == 1:
+            results[indexes[0]] = session.run(None, feeds[0])
+            continue
+        stacked, sizes = stack_input_feeds(session, feeds)
+        outputs = session.run(None, stacked)
+        try:
+            split = split_outputs(outputs, sizes)
+        except ValueError:
+            logger.debug("Outputs can not be split, running feeds one by one")
+            split = [session.run(None, feed) for feed in feeds]
+        for index, output in zip(indexes, split):
+            results[index] = output
+    return results
+
+
+class BatchStats:
+    """
+    Counters for the batches run by a `MicroBatcher`, used to tune batch size and wait time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self.busy_time = 0.0
+        self.batch_sizes: Counter = Counter()
+
+    def record(self, requests: int, rows: int, elapsed: float) -> None:
+        with self._lock:
+            self.requests += requests
+            self.batches += 1
+            self.rows += rows
+            self.busy_time += elapsed
+            self.batch_sizes[requests] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Snapshot of the statistics.
+
+        Returns:
+            A dictionary with the achieved batch sizes and throughput (rows per second).
+        """
+        with self._lock:
+            wall_time = time.perf_counter() - self._started
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "rows": self.rows,
+                "mean_batch_size": self.requests / self.batches
+                if self.batches
+                else 0.0,
+                "max_batch_size": max(self.batch_sizes, default=0),
+                "batch_sizes": dict(self.batch_sizes),
+                "throughput": self.rows / wall_time if wall_time > 0 else 0.0,
+                "session_throughput": (
+                    self.rows / self.busy_time if self.busy_time > 0 else 0.0
+                ),
+            }
+
+
+class _PendingRequest:
+    __slots__ = ("input_feed", "rows", "future")
+
+    def __init__(self, input_feed: Dict[str, np.ndarray], rows: int) -> None:
+        self.input_feed = input_feed
+        self.rows = rows
+        self.future: Future = Future()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent local prediction requests and runs them as a single batch.
+
+    A background thread waits for the first request, then keeps collecting requests until
+    `max_batch_size` rows are gathered or `max_wait_ms` milliseconds have passed, runs one
+    `session.run` and hands every caller its own slice of the outputs.
+
+    Args:
+        session (ort.InferenceSession): The session used to run the batches.
+        max_batch_size (int): Maximum number of rows per batch. Defaults to 32.
+        max_wait_ms (float): Maximum time to wait for a batch to fill up. Defaults to 2.
+    """
+
+    def __init__(
+        self,
+        session: ort.InferenceSession,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms can not be negative")
+        self.session = session
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = BatchStats()
+        self._queue: queue.Queue = queue.Queue()
+        self._carry: Optional[_PendingRequest] = None
+        # Held to queue a request or the stop marker, so no request is queued after the marker
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._worker, name="giza-micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, input_feed: Dict[str, np.ndarray]) -> Future:
+        """
+        Queue an input feed for prediction.
+
+        Args:
+            input_feed (Dict[str, np.ndarray]): The input feed.
+
+        Returns:
+            A future resolved with the list of outputs for this feed.
+
+        Raises:
+            RuntimeError: If the micro batcher is closed.
+        """
+        request = _PendingRequest(input_feed, _rows(self.session, input_feed))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Micro batcher is closed")
+            self._queue.put(request)
+        return request.future
+
+    def predict(self, input_feed: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        """
+        Queue an input feed and wait for its outputs.
+
+        Args:
+            input_feed (Dict[str, np.ndarray]): The input feed.
+
+        Returns:
+            The list of outputs for this feed.
+        """
+        return self.submit(input_feed).result()
+
+    def close(self) -> None:
+        """
+        Stop the background thread once the queued requests are done.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self) -> Tuple[List[_PendingRequest], bool]:
+        """
+        Wait for the next batch of requests.
+
+        Returns:
+            A tuple (batch, stop) with the requests to run and whether the worker should stop.
+        """
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = self._queue.get()
+            if first is _STOP:
+                return [], True
+
+        batch = [first]
+        rows = first.rows
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                request = (
+                    self._queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if request is _STOP:
+                return batch, True
+            if rows + request.rows > self.max_batch_size:
+                self._carry = request
+                break
+            batch.append(request)
+            rows += request.rows
+        return batch, False
+
+    def _worker(self) -> None:
+        stopping = False
+        while not stopping or self._carry is not None:
+            batch, stop = self._collect()
+            stopping = stopping or stop
+            if batch:
+                self._run(batch)
+
+    def _run(self, batch: List[_PendingRequest]) -> None:
+        start = time.perf_counter()
+        try:
+            outputs = run_batch(self.session, [r.input_feed for r in batch])
+        except Exception as e:
+            logger.error(f"An error occurred running a batch: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+        rows = sum(r.rows for r in batch)
+        self.stats.record(len(batch), rows, elapsed)
+        logger.debug(f"Ran batch of {len(batch)} requests ({rows} rows) in {elapsed}s")
+        for request, output in zip(batch, outputs):
+            request.future.set_result(output)
@@ -0,0 +1,475 @@
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from diskcache import Cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_VARIABLE = "GIZA_AGENTS_CACHE_DIR"
+PREWARMED_CACHE_VARIABLE = "GIZA_AGENTS_PREWARMED_CACHE_DIRS"
+CACHE_MAX_SIZE_VARIABLE = "GIZA_AGENTS_CACHE_MAX_SIZE"
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "giza" / "agents"
+DEFAULT_MAX_SIZE = 10 * 1024**3
+
+_ARTIFACTS = "artifacts"
+
+
+def get_cache_dir() -> Path:
+    """
+    Get the root directory of the giza agents caches, `GIZA_AGENTS_CACHE_DIR` if set.
+
+    Returns:
+        Path: The cache directory.
+    """
+    return Path(os.environ.get(CACHE_DIR_VARIABLE, DEFAULT_CACHE_DIR))
+
+
+def file_sha256(path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 digest of a file without loading it in memory.
+
+    Args:
+        path (Union[str, Path]): The file to hash.
+        chunk_size (int): Size of the chunks read from the file.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def file_lock(path: Union[str, Path]) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a file, shared by every process on the host.
+
+    Args:
+        path (Union[str, Path]): The lock file, created if it does not exist.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ArtifactCache:
+    """
+    Content addressed cache of model artifacts shared by every process on the host.
+
+    Artifacts are stored as `artifacts/<model_id>/<version_id>/<sha256><suffix>` under the cache
+    directory and indexed by (model_id, version_id). Writes are serialized with file locks, and the
+    least recently used artifacts are evicted once the cache grows over `max_size` bytes.
+
+    Read only directories with the same layout, for example a pre-warmed cache mounted in a
+    container, can be given as `prewarmed_dirs`, their artifacts are used in place and never evicted.
+
+    Args:
+        directory (Optional[Union[str, Path]]): Cache directory. Defaults to `<cache dir>/artifacts`.
+        max_size (Optional[int]): Maximum size in bytes. Defaults to `GIZA_AGENTS_CACHE_MAX_SIZE` or 10 GiB.
+        prewarmed_dirs (Optional[List[Union[str, Path]]]): Read only caches to look up before downloading.
+            Defaults to the `os.pathsep` separated list in `GIZA_AGENTS_PREWARMED_CACHE_DIRS`.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        max_size: Optional[int] = None,
+        prewarmed_dirs: Optional[List[Union[str, Path]]] = None,
+    ) -> None:
+        self.directory = Path(directory or get_cache_dir() / _ARTIFACTS)
+        if max_size is None:
+            max_size = int(os.environ.get(CACHE_MAX_SIZE_VARIABLE, DEFAULT_MAX_SIZE))
+        self.max_size = max_size
+        if prewarmed_dirs is None:
+            prewarmed = os.environ.get(PREWARMED_CACHE_VARIABLE, "")
+            prewarmed_dirs = [d for d in prewarmed.split(os.pathsep) if d]
+        self.prewarmed_dirs = [Path(d) for d in prewarmed_dirs]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index = Cache(str(self.directory / "index"))
+
+    @staticmethod
+    def _key(model_id: int, version_id: int) -> str:
+        return f"{model_id}:{version_id}"
+
+    def _artifact_dir(self, model_id: int, version_id: int) -> Path:
+        return self.directory / str(model_id) / str(version_id)
+
+    def partial_path(
+        self, model_id: int, version_id: int, suffix: str = ".onnx"
+    ) -> Path:
+        """
+        Path where an artifact is downloaded before it is moved into the cache. It is stable so an
+        interrupted download can be resumed, even from another process.
+
+        Args:
+            model_id (int): The model id.
+            version_id (int): The version id.
+            suffix (str): The extension of the artifact. Defaults to ".onnx".
+
+        Returns:
+            Path: The path of the partial download.
+        """
+        directory = self._artifact_dir(model_id, version_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f".partial-download{suffix}"
+
+    def mapped_dir(self, model_id: int, version_id: int, digest: str) -> Path:
+        """
+        Directory for the memory mappable layout of an artifact, see `externalize_weights`. It is
+        removed together with the artifact.
+
+        Args:
+            model_id (int): The model id.
+            version_id (int): The version id.
+            digest (str): SHA-256 of the artifact.
+
+        Returns:
+            Path: The directory, it may not exist yet.
+        """
+        return self._artifact_dir(model_id, version_id) / f"{digest}.mapped"
+
+    def _delete(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Delete the files of an entry, artifacts from pre-warmed caches are kept.
+        """
+        model_id, version_id = key.split(":")
+        shutil.rmtree(
+            self.mapped_dir(int(model_id), int(version_id), entry["digest"]),
+            ignore_errors=True,
+        )
+        if not entry.get("external"):
+            Path(entry["path"]).unlink(missing_ok=True)
+
+    @contextmanager
+    def lock(self, model_id: int, version_id: int) -> Iterator[None]:
+        """
+        Lock an artifact for every process on the host, so only one of them downloads it.
+
+        Args:
+            model_id (int): The model id.
+            version_id (int): The version id.
+        """
+        with file_lock(self._artifact_dir(model_id, version_id) / ".lock"):
+            yield
+
+    def get(
+        self, model_id: int, version_id: int, verify: bool = False
+    ) -> Optional[Path]:
+        """
+        Get the path of a cached artifact.
+
+        Args:
+            model_id (int): The model id.
+            version_id (int): The version id.
+            verify (bool): Check the content hash of the file, not only its size. Defaults to False.
+
+        Returns:
+            Optional[Path]: The path of the artifact, None if it is not cached or the file is corrupted.
+        """
+        key = self._key(model_id, version_id)
+        entry: Optional[Dict[str, Any]] = self._index.get(key)
+        if entry is not None:
+            path = Path(entry["path"])
+            if self._is_valid(path, entry["digest"], entry["size"], verify):
+                entry["last_access"] = time.time()
+                self._index.set(key, entry)
+                return path
+            logger.warning(f"Cached artifact {path} is missing or corrupted")
+            self._index.delete(key)
+        return self._find_prewarmed(model_id, version_id)
+
+    def _is_valid(
+        self, path: Path, digest: str, size: Optional[int], verify: bool
+    ) -> bool:
+        try:
+            if size is not None and path.stat().st_size != size:
+                return False
+        except FileNotFoundError:
+            return False
+        return not verify or file_sha256(path) == digest
+
+    def _find_prewarmed(self, model_id: int, version_id: int) -> Optional[Path]:
+        """
+        Look for the artifact in the pre-warmed caches, its hash is checked against its name once
+        and then it is indexed so later lookups are cheap.
+        """
+        for directory in self.prewarmed_dirs:
+            candidates = directory / str(model_id) / str(version_id)
+            if not candidates.is_dir():
+                continue
+            for path in sorted(candidates.iterdir()):
+                if path.name.startswith(".") or not path.is_file():
+                    continue
+                digest = path.name.split(".")[0]
+                if file_sha256(path) != digest:
+                    logger.warning(
+                        f"Pre-warmed artifact {path} does not match its hash"
+                    )
+                    continue
+                logger.info(f"Using pre-warmed artifact {path}")
+                self._index.set(
+                    self._key(model_id, version_id),
+                    {
+                        "path": str(path),
+                        "digest": digest,
+                        "size": path.stat().st_size,
+                        "last_access": time.time(),
+                        "external": True,
+                    },
+                )
+                return path
+        return None
+
+    def put(
+        self,
+        model_id: int,
+        version_id: int,
+        source: Union[str, Path],
+        suffix: str = ".onnx",
+        digest: Optional[str] = None,
+    ) -> Path:
+        """
+        Move a file into the cache.
+
+        Args:
+            model_id (int): The model id.
+            version_id (int): The version id.
+            source (Union[str, Path]): The file to move, ideally on the same filesystem as the cache.
+            suffix (str): The extension of the artifact. Defaults to ".onnx".
+            digest (Optional[str]): SHA-256 of the file, computed if not given.
+
+        Returns:
+            Path: The path of the cached artifact.
+        """
+        source = Path(source)
+        if digest is None:
+            digest = file_sha256(source)
+        destination = self._artifact_dir(model_id, version_id) / f"{digest}{suffix}"
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        with file_lock(self.directory / ".lock"):
+            previous = self._index.get(self._key(model_id, version_id))
+            try:
+                os.replace(source, destination)
+            except OSError:
+                # Different filesystem, copy next to the destination so the rename stays atomic
+                partial = destination.with_name(f".partial-{destination.name}")
+                shutil.copyfile(source, partial)
+                os.replace(partial, destination)
+                source.unlink()
+            size = destination.stat().st_size
+            self._index.set(
+                self._key(model_id, version_id),
+                {
+                    "path": str(destination),
+                    "digest": digest,
+                    "size": size,
+                    "last_access": time.time(),
+                    "external": False,
+                },
+            )
+            if previous is not None and previous["path"] != str(destination):
+                self._delete(self._key(model_id, version_id), previous)
+            self._evict(keep=self._key(model_id, version_id))
+
+        logger.debug(f"Artifact cached at {destination} ({size} bytes)")
+        return destination
+
+    def remove(self, model_id: int, version_id: int) -> None:
+        """
+        Remove an artifact from the cache, artifacts from pre-warmed caches are only unindexed.
+
+        Args:
+            model_id (int): The model id.
+            version_id (int): The version id.
+        """
+        with file_lock(self.directory / ".lock"):
+            key = self._key(model_id, version_id)
+            entry = self._index.pop(key, None)
+            if entry is not None:
+                self._delete(key, entry)
+
+    @property
+    def size(self) -> int:
+        """
+        Total size in bytes of the artifacts owned by the cache.
+        """
+        return sum(entry["size"] for _, entry in self._entries())
+
+    def _entries(self) -> List:
+        entries = []
+        for key in self._index.iterkeys():
+            entry = self._index.get(key)
+            if entry is not None and not entry.get("external"):
+                entries.append((key, entry))
+        return entries
+
+    def _evict(self, keep: str) -> None:
+        """
+        Remove the least recently used artifacts until the cache fits in `max_size`.
+        Must be called holding the cache lock.
+        """
+        entries = sorted(self._entries(), key=lambda item: item[1]["last_access"])
+        total = sum(entry["size"] for _, entry in entries)
+        for key, entry in entries:
+            if total <= self.max_size:
+                break
+            if key == keep:
+                continue
+            logger.info(f"Evicting cached artifact {entry['path']}")
+            self._delete(key, entry)
+            self._index.delete(key)
+            total -= entry["size"]
+
+
+class PredictionCache:
+    """
+    In memory cache of local prediction results, bounded by number of entries and bytes.
+
+    The least recently used results are evicted first, and results older than `ttl` seconds are
+    dropped when they are looked up. It is thread safe and can be shared between models, results
+    are keyed by the model version.
+
+    Args:
+        max_entries (int): Maximum number of results kept. Defaults to 1024.
+        max_bytes (int): Maximum total size in bytes of the results kept. Defaults to 64 MiB.
+        ttl (Optional[float]): Seconds a result stays valid, None to keep them until evicted. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024**2,
+        ttl: Optional[float] = None,
+    ) -> None:
+        if max_entries <= 0 or max_bytes <= 0:
+            raise ValueError("max_entries and max_bytes must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[
+            str, Tuple[np.ndarray, Optional[float]]
+        ] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(namespace: str, input_feed: Dict[str, Any]) -> str:
+        """
+        Build the key of a prediction from the model version and the name, dtype, shape and bytes
+        of every input array.
+
+        Args:
+            namespace (str): Identifies the model version.
+            input_feed (Dict[str, Any]): The inputs of the prediction.
+
+        Returns:
+            str: The key of the prediction.
+        """
+        digest = hashlib.blake2b(namespace.encode(), digest_size=16)
+        for name in sorted(input_feed):
+            array = np.ascontiguousarray(input_feed[name])
+            digest.update(f"|{name}|{array.dtype.str}|{array.shape}|".encode())
+            digest.update(
+                array.data if array.dtype.kind != "O" else repr(array).encode()
+            )
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Get a cached result.
+
+        Args:
+            key (str): The key of the prediction, see `key`.
+
+        Returns:
+            Optional[np.ndarray]: A copy of the result, None if it is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry[1] is not None
+                and entry[1] < time.monotonic()
+            ):
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy()
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Cache a result, results larger than `max_bytes` are not cached.
+
+        Args:
+            key (str): The key of the prediction, see `key`.
+            value (Any): The result of the prediction.
+        """
+        value = np.array(value, copy=True)
+        if value.nbytes > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, expires)
+            self._bytes += value.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        """
+        Remove an entry, must be called holding the lock.
+        """
+        value, _ = self._entries.pop(key)
+        self._bytes -= value.nbytes
+
+    def clear(self) -> None:
+        """
+        Remove every cached result, the counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit, miss and eviction counters and the current size of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def payload_key(uri: str, payload: Dict[str, Any]) -> str:
+    """
+    Stable hash of a request, equal for requests with the same URI and the same JSON body.
+
+    Args:
+        uri (str): The URI the request is sent to.
+        payload (Dict[str, Any]): The JSON body of the request.
+
+    Returns:
+        str: The SHA-256 hex digest of the request.
+    """
+    canonical = json.dumps(
+        [str(uri), payload],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_json_default,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class _LeaderCancelled(Exception):
+    """
+    Handed to the callers waiting for a call whose leader was cancelled, they make the call again.
+    """
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls, so only the first one runs while the others wait for it
+    and share its result or its exception. Calls with the same key that start after it finished
+    run again. If the first call is cancelled, the cancellation is only raised to its caller, one
+    of the waiting calls runs instead.
+
+    Sync and async callers share the same calls, from any thread or event loop.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Tuple[Future, Optional[asyncio.AbstractEventLoop]]] = {}
+
+    def _join_or_lead(
+        self, key: str, loop: Optional[asyncio.AbstractEventLoop]
+    ) -> Tuple[Future, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call[0], False
+            future: Future = Future()
+            self._calls[key] = (future, loop)
+            return future, True
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def _leader_loop(self, key: str) -> Optional[asyncio.AbstractEventLoop]:
+        with self._lock:
+            call = self._calls.get(key)
+            return call[1] if call is not None else None
+
+    def _fail(self, key: str, future: Future, error: BaseException) -> None:
+        self._finish(key)
+        if isinstance(error, asyncio.CancelledError):
+            future.set_exception(_LeaderCancelled())
+        else:
+            future.set_exception(error)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Run `fn`, or wait for the call with the same key that is already in flight.
+
+        Args:
+            key (str): Identifies identical calls.
+            fn (Callable[[], T]): The call to make.
+
+        Returns:
+            The result of the call.
+        """
+        while True:
+            # Blocking on a call led by the event loop of this thread would never return
+            loop = self._leader_loop(key)
+            if loop is not None and loop is _running_loop():
+                return fn()
+
+            future, leader = self._join_or_lead(key, None)
+            if leader:
+                break
+            logger.debug(f"Waiting for in flight call {key}")
+            try:
+                return future.result()
+            except _LeaderCancelled:
+                logger.debug(f"In flight call {key} was cancelled, calling again")
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async version of `do`, `fn` returns the awaitable to run.
+
+        Args:
+            key (str): Identifies identical calls.
+            fn (Callable[[], Awaitable[T]]): The call to make.
+
+        Returns:
+            The result of the call.
+        """
+        while True:
+            future, leader = self._join_or_lead(key, asyncio.get_running_loop())
+            if leader:
+                break
+            logger.debug(f"Waiting for in flight call {key}")
+            try:
+                # Shielded, cancelling this caller must not cancel the call the others wait for
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderCancelled:
+                logger.debug(f"In flight call {key} was cancelled, calling again")
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def in_flight(self) -> int:
+        """
+        Number of calls currently running.
+        """
+        with self._lock:
+            return len(self._calls)
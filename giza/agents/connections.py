@@ -0,0 +1,127 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    """
+    Check if the optional `h2` package needed by httpx for HTTP/2 is installed.
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def _origin(uri: str) -> str:
+    """
+    Scheme, host and port of a URI, connections can be reused between URIs with the same origin.
+    """
+    parsed = urlparse(uri)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class ClientPool:
+    """
+    Long lived, connection pooled HTTP clients shared per endpoint origin.
+
+    Async clients are bound to the event loop that created them, so the pool keeps one
+    client per (event loop, origin) and drops them when the loop is garbage collected.
+
+    Args:
+        max_connections (int): Maximum number of concurrent connections per client. Defaults to 100.
+        max_keepalive_connections (int): Maximum number of idle connections kept alive. Defaults to 20.
+        keepalive_expiry (float): Seconds an idle connection is kept alive. Defaults to 30.
+        http2 (Optional[bool]): Use HTTP/2, by default it is enabled when `h2` is installed.
+        timeout (float): Timeout in seconds for reads and writes, proving requests can be slow. Defaults to 600.
+        connect_timeout (float): Timeout in seconds to establish a connection. Defaults to 10.
+        **client_kwargs: Extra keyword arguments for the httpx clients.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: Optional[bool] = None,
+        timeout: float = 600.0,
+        connect_timeout: float = 10.0,
+        **client_kwargs: Any,
+    ) -> None:
+        if http2 and not http2_available():
+            raise ValueError("HTTP/2 requires the `h2` package, install `httpx[http2]`")
+        self.http2 = http2_available() if http2 is None else http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._client_kwargs = client_kwargs
+        self._lock = threading.Lock()
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def get_async_client(self, uri: str) -> httpx.AsyncClient:
+        """
+        Get the async client for the origin of the URI, bound to the running event loop.
+
+        Args:
+            uri (str): The URI the requests will be sent to.
+
+        Returns:
+            httpx.AsyncClient: A client that keeps its connections alive between requests.
+        """
+        loop = asyncio.get_running_loop()
+        origin = _origin(uri)
+        with self._lock:
+            clients: Dict[str, httpx.AsyncClient] = self._async_clients.setdefault(
+                loop, {}
+            )
+            client = clients.get(origin)
+            if client is None or client.is_closed:
+                logger.debug(f"Creating HTTP client for {origin} (http2={self.http2})")
+                client = httpx.AsyncClient(
+                    http2=self.http2,
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    **self._client_kwargs,
+                )
+                clients[origin] = client
+        return client
+
+    async def aclose(self) -> None:
+        """
+        Close the clients bound to the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.pop(loop, {})
+        for client in clients.values():
+            await client.aclose()
+
+
+_default_pool = ClientPool()
+
+
+def get_default_pool() -> ClientPool:
+    """
+    Get the client pool used by models that are not given one explicitly.
+    """
+    return _default_pool
+
+
+def set_default_pool(pool: ClientPool) -> None:
+    """
+    Replace the client pool used by models that are not given one explicitly, useful to
+    configure pool limits for the whole process.
+
+    Args:
+        pool (ClientPool): The new default pool.
+    """
+    global _default_pool
+    _default_pool = pool
@@ -0,0 +1,246 @@
+import base64
+import copy
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+import requests
+from giza.cli.client import VersionsClient
+from giza.cli.utils.decorators import auth
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+_RETRYABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+
+
+class StreamingVersionsClient(VersionsClient):
+    """
+    Versions client that exposes the download URL of the original model, so it can be streamed
+    to disk instead of loaded in memory by `download_original`.
+    """
+
+    @auth
+    def get_original_download_url(self, model_id: int, version_id: int) -> str:
+        """
+        Get the URL to download the original version.
+
+        Args:
+            model_id: Model identifier
+            version_id: Version identifier
+
+        Returns:
+            The download URL of the version binary file
+        """
+        headers = copy.deepcopy(self.default_headers)
+        headers.update(self._get_auth_header())
+
+        response = self.session.get(
+            f"{self._get_version_url(model_id)}/{version_id}:download_original",
+            headers=headers,
+        )
+
+        self._echo_debug(str(response))
+        response.raise_for_status()
+
+        return response.json()["download_url"]
+
+
+def log_progress(every: float = 0.1) -> ProgressCallback:
+    """
+    Build a progress callback that logs the download progress.
+
+    Args:
+        every (float): Fraction of the download between two log lines. Defaults to 0.1.
+
+    Returns:
+        A callback to pass to `stream_download`.
+    """
+    next_report = [every]
+
+    def callback(downloaded: int, total: Optional[int]) -> None:
+        if total is None or total == 0:
+            return
+        if downloaded / total >= next_report[0] or downloaded == total:
+            logger.info(
+                f"Downloaded {downloaded / 1024**2:.1f} of {total / 1024**2:.1f} MiB"
+                f" ({downloaded / total:.0%})"
+            )
+            while next_report[0] <= downloaded / total:
+                next_report[0] += every
+
+    return callback
+
+
+def _expected_md5(headers: Dict[str, str]) -> Optional[str]:
+    """
+    Get the base64 MD5 of the whole object from the response headers, if the server sends it.
+    """
+    for part in headers.get("x-goog-hash", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name == "md5":
+            return value
+    return headers.get("Content-MD5")
+
+
+def _total_size(response: requests.Response, offset: int) -> Optional[int]:
+    """
+    Size of the whole object, from Content-Range for partial and unsatisfiable range responses or
+    Content-Length otherwise.
+    """
+    content_range = response.headers.get("Content-Range")
+    if response.status_code in (206, 416) and content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total != "*" else None
+    if response.status_code == 416:
+        return None
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length is not None else None
+
+
+def stream_download(
+    url: str,
+    destination: Union[str, Path],
+    session: Optional[requests.Session] = None,
+    chunk_size: int = 1024 * 1024,
+    max_retries: int = 5,
+    backoff: float = 1.0,
+    expected_sha256: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    timeout: float = 60.0,
+) -> str:
+    """
+    Stream a file to disk in chunks. If the transfer is interrupted, or `destination` already holds
+    part of the file from a previous attempt, the download resumes from where it stopped using HTTP
+    range requests. The content is checked against the size and MD5 sent by the server and, if given,
+    against `expected_sha256`. A partial file that is already whole, matching `expected_sha256` or the
+    size the server reports, is not downloaded again.
+
+    Args:
+        url (str): The URL to download.
+        destination (Union[str, Path]): The file to write, partial content is appended to it.
+        session (Optional[requests.Session]): Session used for the requests. Defaults to a new one, closed once done.
+        chunk_size (int): Size of the chunks written to disk. Defaults to 1 MiB.
+        max_retries (int): Number of times an interrupted download is resumed. Defaults to 5.
+        backoff (float): Seconds to wait before the first retry, doubled on every retry. Defaults to 1.
+        expected_sha256 (Optional[str]): SHA-256 the file must have. Defaults to None.
+        progress (Optional[ProgressCallback]): Called with the bytes downloaded and the total, if known.
+        timeout (float): Seconds to wait for the server between two chunks. Defaults to 60.
+
+    Returns:
+        str: The SHA-256 of the downloaded file.
+
+    Raises:
+        ValueError: If the downloaded file does not match the expected size or checksums.
+        requests.exceptions.RequestException: If the download fails after all the retries.
+    """
+    if session is None:
+        with requests.Session() as session:
+            return stream_download(
+                url,
+                destination,
+                session=session,
+                chunk_size=chunk_size,
+                max_retries=max_retries,
+                backoff=backoff,
+                expected_sha256=expected_sha256,
+                progress=progress,
+                timeout=timeout,
+            )
+
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    offset = 0
+    if destination.exists():
+        with open(destination, "rb") as f:
+            while chunk := f.read(chunk_size):
+                sha256.update(chunk)
+                md5.update(chunk)
+                offset += len(chunk)
+        if offset > 0 and sha256.hexdigest() == expected_sha256:
+            logger.info("Download already complete")
+            return expected_sha256
+        if offset > 0:
+            logger.info(f"Resuming download from byte {offset}")
+
+    total: Optional[int] = None
+    expected_md5: Optional[str] = None
+    attempt = 0
+    while True:
+        headers = {"Content-Type": "application/octet-stream"}
+        if offset > 0:
+            headers["Range"] = f"bytes={offset}-"
+        try:
+            with session.get(
+                url, headers=headers, stream=True, timeout=timeout
+            ) as response:
+                if response.status_code == 416:
+                    total = _total_size(response, offset)
+                    if total == offset:
+                        # The partial file is whole, it is checked like a finished download
+                        logger.info("Download already complete")
+                        expected_md5 = _expected_md5(response.headers)
+                        break
+                    # The partial file is not a prefix of the object anymore, start over
+                    logger.warning("Range not satisfiable, restarting download")
+                    offset, sha256, md5 = 0, hashlib.sha256(), hashlib.md5()
+                    destination.unlink(missing_ok=True)
+                    continue
+                response.raise_for_status()
+
+                if offset > 0 and response.status_code != 206:
+                    logger.warning("Server does not support resuming, restarting")
+                    offset, sha256, md5 = 0, hashlib.sha256(), hashlib.md5()
+                    destination.unlink(missing_ok=True)
+
+                total = _total_size(response, offset)
+                expected_md5 = _expected_md5(response.headers) or expected_md5
+                with open(destination, "ab") as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        sha256.update(chunk)
+                        md5.update(chunk)
+                        offset += len(chunk)
+                        if progress is not None:
+                            progress(offset, total)
+        except _RETRYABLE_ERRORS as e:
+            attempt += 1
+            if attempt > max_retries:
+                logger.error(f"Download failed after {max_retries} retries: {e}")
+                raise
+            wait = backoff * 2 ** (attempt - 1)
+            logger.warning(
+                f"Download interrupted at byte {offset}: {e}, retrying in {wait}s"
+            )
+            time.sleep(wait)
+            continue
+
+        if total is not None and offset < total:
+            attempt += 1
+            if attempt > max_retries:
+                raise ValueError(f"Download incomplete: {offset} of {total} bytes")
+            logger.warning(f"Download ended at byte {offset} of {total}, resuming")
+            continue
+        break
+
+    if total is not None and offset != total:
+        destination.unlink(missing_ok=True)
+        raise ValueError(f"Downloaded {offset} bytes, expected {total}")
+    if expected_md5 is not None:
+        if base64.b64encode(md5.digest()).decode() != expected_md5:
+            destination.unlink(missing_ok=True)
+            raise ValueError("Downloaded file does not match the server MD5")
+    digest = sha256.hexdigest()
+    if expected_sha256 is not None and digest != expected_sha256:
+        destination.unlink(missing_ok=True)
+        raise ValueError("Downloaded file does not match the expected SHA-256")
+    return digest
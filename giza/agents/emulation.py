@@ -0,0 +1,149 @@
+import logging
+import re
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from giza.agents.serialization import TREE_SCALE
+
+logger = logging.getLogger(__name__)
+
+_FP_IMPL = re.compile(r"FP(\d+)x(\d+)")
+_CONTAINER = re.compile(r"(Tensor|Span|MutMatrix)(?:::)?<(.+)>")
+
+# The responses are decoded as FP16x16 whatever the fixed point implementation
+_OUTPUT_FP_FACTOR = 2**16
+
+
+def fp_factor(fp_impl: str) -> int:
+    """
+    Scale of a fixed point implementation, e.g. 2**16 for FP16x16.
+
+    Args:
+        fp_impl (str): The fixed point implementation.
+
+    Returns:
+        int: The factor values are multiplied by before being truncated to integers.
+
+    Raises:
+        ValueError: If the fixed point implementation is unknown.
+    """
+    match = _FP_IMPL.fullmatch(fp_impl)
+    if match is None:
+        raise ValueError(f"Unknown fixed point implementation {fp_impl}")
+    return 2 ** int(match.group(2))
+
+
+def quantize(value: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Round values to a fixed point grid the way they are serialized, truncating towards zero.
+
+    Args:
+        value (np.ndarray): The values.
+        factor (int): The scale of the grid.
+
+    Returns:
+        np.ndarray: The quantized values, as float64.
+    """
+    return np.trunc(np.asarray(value, dtype=np.float64) * factor) / factor
+
+
+def quantize_inputs(
+    input_feed: Dict[str, Any], fp_impl: str, model_category: str
+) -> Dict[str, np.ndarray]:
+    """
+    Quantize the inputs of a verifiable prediction as they are when they reach the Cairo program.
+    Integer inputs are sent as they are.
+
+    Args:
+        input_feed (Dict[str, Any]): The inputs of the model.
+        fp_impl (str): The fixed point implementation of the inputs.
+        model_category (str): The category of model. "ONNX_ORION" | "XGB" | "LGBM"
+
+    Returns:
+        Dict[str, np.ndarray]: The quantized inputs, with their original dtypes.
+    """
+    if model_category in ["XGB", "LGBM"]:
+        factor = TREE_SCALE
+    else:
+        factor = fp_factor(fp_impl)
+    quantized = {}
+    for name, value in input_feed.items():
+        array = np.asarray(value)
+        if np.issubdtype(array.dtype, np.floating):
+            array = quantize(array, factor).astype(array.dtype)
+        quantized[name] = array
+    return quantized
+
+
+def _split_tuple(dtype: str) -> List[str]:
+    parts = []
+    depth = 0
+    start = 0
+    inner = dtype[1:-1]
+    for i, char in enumerate(inner):
+        if char in "<(":
+            depth += 1
+        elif char in ">)":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(inner[start:i].strip())
+            start = i + 1
+    parts.append(inner[start:].strip())
+    return parts
+
+
+def _emulate_element(value: np.ndarray, element: str) -> np.ndarray:
+    if element.startswith("FP"):
+        return quantize(value, _OUTPUT_FP_FACTOR)
+    return np.asarray(value).astype(np.int64)
+
+
+def _emulate_output(value: Any, dtype: str) -> Any:
+    array = np.asarray(value)
+    match = _CONTAINER.fullmatch(dtype)
+    if match is None:
+        # A single value
+        result = _emulate_element(array.reshape(-1)[:1], dtype)[0]
+        return result.item()
+    container, element = match.groups()
+    result = _emulate_element(array, element)
+    if container == "Span":
+        return result.reshape(-1)
+    if container == "MutMatrix":
+        return result.reshape(result.shape[0] if result.ndim else 1, -1)
+    return result
+
+
+def emulate_response(
+    outputs: Sequence[Any], dtype: str, model_category: str = "ONNX_ORION"
+) -> Any:
+    """
+    Build from the outputs of the ONNX model the result a verifiable prediction returns once its
+    response is deserialized: the same structure, dtypes and fixed point precision.
+
+    Args:
+        outputs (Sequence[Any]): The outputs of the ONNX runtime session.
+        dtype (str): The Cairo output data type, e.g. "Tensor<FP16x16>" or "(Span<u32>, MutMatrix<FP16x16>)".
+        model_category (str): The category of model. "ONNX_ORION" | "XGB" | "LGBM"
+
+    Returns:
+        The emulated prediction result.
+
+    Raises:
+        ValueError: If the model has fewer outputs than the data type.
+    """
+    if model_category in ["XGB", "LGBM"]:
+        # Their integer results are scaled back by TREE_SCALE when deserialized
+        result = quantize(outputs[0], TREE_SCALE)
+        return result.item() if result.size == 1 else result
+
+    dtypes = _split_tuple(dtype) if dtype.startswith("(") else [dtype]
+    if len(outputs) < len(dtypes):
+        raise ValueError(
+            f"The model has {len(outputs)} outputs, the data type {dtype} expects {len(dtypes)}"
+        )
+    results = tuple(
+        _emulate_output(output, part) for output, part in zip(outputs, dtypes)
+    )
+    return results if dtype.startswith("(") else results[0]
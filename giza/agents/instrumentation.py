@@ -0,0 +1,267 @@
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PredictionHook = Callable[["PredictionTrace"], None]
+
+_hooks: List[PredictionHook] = []
+_hooks_lock = threading.Lock()
+
+
+class PredictionTrace:
+    """
+    Timings and sizes of a single prediction.
+
+    Attributes:
+        model (str): Identifies the model version.
+        kind (str): "local", "batch", "verifiable" or "emulated".
+        phases (Dict[str, float]): Seconds spent in every phase, plus the "total".
+        sizes (Dict[str, int]): Bytes of the inputs, outputs, request and response, when known.
+        error (Optional[str]): The error raised by the prediction, if any.
+    """
+
+    def __init__(self, model: str, kind: str) -> None:
+        self.model = model
+        self.kind = kind
+        self.phases: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {}
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a phase of the prediction, the time of phases entered several times is added up.
+
+        Args:
+            name (str): The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """
+        Record the total time and hand the trace to the prediction hooks.
+
+        Args:
+            error (Optional[BaseException]): The error raised by the prediction, if any.
+        """
+        self.phases["total"] = time.perf_counter() - self._start
+        if error is not None:
+            self.error = repr(error)
+        emit(self)
+
+    def __repr__(self) -> str:
+        return (
+            f"PredictionTrace(model={self.model}, kind={self.kind}, "
+            f"phases={self.phases}, sizes={self.sizes}, error={self.error})"
+        )
+
+
+def add_prediction_hook(hook: PredictionHook) -> None:
+    """
+    Call `hook` with the `PredictionTrace` of every prediction made in the process.
+
+    Args:
+        hook (PredictionHook): The callback, it runs in the thread that made the prediction so it should be fast.
+    """
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_prediction_hook(hook: PredictionHook) -> None:
+    """
+    Stop calling a hook added with `add_prediction_hook`.
+
+    Args:
+        hook (PredictionHook): The callback to remove.
+    """
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def emit(trace: PredictionTrace) -> None:
+    """
+    Hand a trace to every prediction hook, errors in the hooks are logged and ignored.
+    """
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for hook in hooks:
+        try:
+            hook(trace)
+        except Exception as e:
+            logger.warning(f"Prediction hook {hook} failed: {e}")
+
+
+class Histogram:
+    """
+    Histogram with logarithmic buckets, percentiles are accurate to about 5%.
+    """
+
+    # Every bucket is 2 ** (1 / 8) wider than the previous one
+    _GROWTH = 2 ** (1 / 8)
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buckets: Dict[int, int] = {}
+
+    def observe(self, value: float) -> None:
+        """
+        Add a value to the histogram.
+        """
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        index = math.floor(math.log(value, self._GROWTH)) if value > 0 else None
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Estimate a percentile, the midpoint of the bucket it falls in.
+
+        Args:
+            percentile (float): Between 0 and 100.
+
+        Returns:
+            Optional[float]: The estimate, None if the histogram is empty.
+        """
+        if self.count == 0:
+            return None
+        rank = percentile / 100 * self.count
+        seen = 0
+        for index in sorted(self._buckets, key=lambda i: -math.inf if i is None else i):
+            seen += self._buckets[index]
+            if seen >= rank:
+                if index is None:
+                    return 0.0
+                value = self._GROWTH ** (index + 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Any]:
+        """
+        Count, mean, min, max and percentiles of the values.
+        """
+        result: Dict[str, Any] = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+        for percentile in percentiles:
+            result[f"p{percentile:g}"] = self.percentile(percentile)
+        return result
+
+
+class HistogramRegistry:
+    """
+    In process registry of prediction latency and size histograms, one per model, kind and phase.
+    Register it with `add_prediction_hook(registry.observe)`, or use `install`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self.errors: Dict[str, int] = {}
+
+    def observe(self, trace: PredictionTrace) -> None:
+        """
+        Record a prediction trace.
+
+        Args:
+            trace (PredictionTrace): The trace of the prediction.
+        """
+        prefix = f"{trace.model}.{trace.kind}"
+        with self._lock:
+            for phase, seconds in trace.phases.items():
+                self._histogram(f"{prefix}.{phase}_seconds").observe(seconds)
+            for name, size in trace.sizes.items():
+                self._histogram(f"{prefix}.{name}").observe(size)
+            if trace.error is not None:
+                self.errors[prefix] = self.errors.get(prefix, 0) + 1
+
+    def _histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram()
+        return histogram
+
+    def get(self, name: str) -> Optional[Histogram]:
+        """
+        Get a histogram by name, e.g. "<model>.verifiable.request_seconds".
+        """
+        with self._lock:
+            return self._histograms.get(name)
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Any]:
+        """
+        Summary of every histogram, see `Histogram.summary`.
+        """
+        with self._lock:
+            return {
+                name: histogram.summary(percentiles)
+                for name, histogram in sorted(self._histograms.items())
+            }
+
+    def reset(self) -> None:
+        """
+        Drop every recorded value.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self.errors.clear()
+
+    def install(self) -> "HistogramRegistry":
+        """
+        Start recording the predictions of the process.
+
+        Returns:
+            The registry itself.
+        """
+        add_prediction_hook(self.observe)
+        return self
+
+    def uninstall(self) -> None:
+        """
+        Stop recording the predictions of the process.
+        """
+        remove_prediction_hook(self.observe)
+
+
+def server_time(headers: Any) -> Optional[float]:
+    """
+    Seconds the server reported spending on a request, from its `Server-Timing` header.
+
+    Args:
+        headers (Any): The headers of the response.
+
+    Returns:
+        Optional[float]: The sum of the reported durations, None if the server reported none.
+    """
+    header = headers.get("Server-Timing") if headers is not None else None
+    if not isinstance(header, str):
+        return None
+    total = None
+    for metric in header.split(","):
+        for param in metric.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                try:
+                    total = (total or 0.0) + float(value.strip('"')) / 1000
+                except ValueError:
+                    continue
+    return total
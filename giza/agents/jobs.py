@@ -0,0 +1,141 @@
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from giza.cli.client import EndpointsClient
+from giza.cli.schemas.jobs import Job
+
+logger = logging.getLogger(__name__)
+
+
+def _accepts_params(method: Callable[..., Any]) -> bool:
+    try:
+        parameters = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        p.name == "params" or p.kind == inspect.Parameter.VAR_KEYWORD
+        for p in parameters
+    )
+
+
+class _EndpointJobs:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Request ids not found, with the time of the listing that missed them
+        self.missing: "OrderedDict[str, float]" = OrderedDict()
+        self.last_id = -1
+
+
+class JobIndex:
+    """
+    Index of the jobs of the endpoints by request id, shared by the results of the predictions
+    so the requests whose jobs were already listed are found without listing the jobs again.
+
+    A miss refreshes the index of the endpoint: with the server filtering the jobs by request id
+    when the client supports it. Otherwise the whole job list of the endpoint is still downloaded,
+    only the jobs newer than the last one seen are indexed, so the index reduces the listings to
+    one per request whose job is not indexed yet. Concurrent misses on an endpoint share a listing,
+    and a request id that was not found is not looked up again for `miss_ttl` seconds.
+    The indexed jobs are snapshots, their status is only meant to be a starting point for polling.
+
+    Args:
+        max_jobs (int): Number of jobs, and of missed request ids, kept per endpoint, the oldest are dropped first. Defaults to 10000.
+        miss_ttl (float): Seconds a request id that was not found is answered as missing without listing the jobs. Defaults to 5.
+    """
+
+    def __init__(self, max_jobs: int = 10000, miss_ttl: float = 5.0) -> None:
+        self.max_jobs = max_jobs
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[Hashable, int], _EndpointJobs] = {}
+
+    def _endpoint(self, client: EndpointsClient, endpoint_id: int) -> _EndpointJobs:
+        key = (getattr(client, "url", None), endpoint_id)
+        with self._lock:
+            entry = self._endpoints.get(key)
+            if entry is None:
+                entry = self._endpoints[key] = _EndpointJobs()
+            return entry
+
+    def _add(self, entry: _EndpointJobs, job: Job) -> None:
+        entry.jobs[job.request_id] = job
+        entry.jobs.move_to_end(job.request_id)
+        while len(entry.jobs) > self.max_jobs:
+            entry.jobs.popitem(last=False)
+
+    def find(
+        self, client: EndpointsClient, endpoint_id: int, request_id: str
+    ) -> Optional[Job]:
+        """
+        Find the job of a request, refreshing the index of the endpoint if it is not indexed yet.
+
+        Args:
+            client (EndpointsClient): The client to list the jobs of the endpoint with.
+            endpoint_id (int): The endpoint that served the request.
+            request_id (str): The request id.
+
+        Returns:
+            Optional[Job]: The job, None if the endpoint has no job for the request.
+        """
+        entry = self._endpoint(client, endpoint_id)
+        with entry.lock:
+            job = entry.jobs.get(request_id)
+            if job is not None:
+                return job
+            missed_at = entry.missing.get(request_id)
+            if missed_at is not None and time.monotonic() - missed_at < self.miss_ttl:
+                logger.debug(
+                    f"Request {request_id} was not found recently, not listing"
+                )
+                return None
+
+            if _accepts_params(client.list_jobs):
+                jobs = client.list_jobs(endpoint_id, params={"request_id": request_id})
+                filtered = True
+            else:
+                jobs = client.list_jobs(endpoint_id)
+                filtered = False
+
+            # A server ignoring the filter returns every job, so the request id is still checked
+            found = None
+            last_id = entry.last_id
+            for job in jobs.root:
+                if job.request_id is None:
+                    continue
+                if filtered or job.id > entry.last_id:
+                    self._add(entry, job)
+                    last_id = max(last_id, job.id)
+                if job.request_id == request_id:
+                    found = job
+            if not filtered:
+                entry.last_id = last_id
+            if found is None:
+                entry.missing[request_id] = time.monotonic()
+                entry.missing.move_to_end(request_id)
+                while len(entry.missing) > self.max_jobs:
+                    entry.missing.popitem(last=False)
+            else:
+                entry.missing.pop(request_id, None)
+            logger.debug(
+                f"Indexed {len(entry.jobs)} jobs of endpoint {endpoint_id}, last job id {entry.last_id}"
+            )
+            return found
+
+    def clear(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+
+_default_index = JobIndex()
+
+
+def get_job_index() -> JobIndex:
+    """
+    Get the process wide job index.
+    """
+    return _default_index
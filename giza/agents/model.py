@@ -1,34 +1,89 @@
+import asyncio
+import itertools
 import logging
 import os
-import tempfile
+import shutil
+import threading
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+import httpx
 import numpy as np
-import onnx
 import onnxruntime as ort
 import requests
 from diskcache import Cache
 from giza.cli import API_HOST
-from giza.cli.client import ApiClient, EndpointsClient, ModelsClient, VersionsClient
+from giza.cli.client import ApiClient, EndpointsClient, ModelsClient
+from giza.cli.schemas.endpoints import Endpoint
 from giza.cli.schemas.models import Model
 from giza.cli.schemas.versions import Version
 from giza.cli.utils.enums import Framework, VersionStatus
-from osiris.app import (
-    create_tensor_from_array,
-    deserialize,
-    load_data,
-    serialize,
-    serializer,
-)
+from osiris.app import convert_to_numpy, load_data, serialize
 
 if TYPE_CHECKING:
     from giza.agents import AgentResult
 
-from giza.agents.utils import get_endpoint_uri, requests_debug
+from giza.agents.balancing import STRATEGIES, EndpointBalancer, Replica
+from giza.agents.batching import MicroBatcher, run_batch
+from giza.agents.cache import ArtifactCache, PredictionCache, get_cache_dir
+from giza.agents.concurrency import SingleFlight, payload_key
+from giza.agents.connections import ClientPool, get_default_pool
+from giza.agents.download import StreamingVersionsClient, log_progress, stream_download
+from giza.agents.emulation import emulate_response, quantize_inputs
+from giza.agents.instrumentation import PredictionTrace, server_time
+from giza.agents.onnx_graph import externalize_weights, index_producers, load_graph
+from giza.agents.pool import InferencePool
+from giza.agents.registry import ModelRegistry, SharedModel
+from giza.agents.serialization import deserialize_response, serialize_input
+from giza.agents.utils import requests_debug
 
 logger = logging.getLogger(__name__)
 
+_UNSET = object()
+
+# Verifiable predictions in flight, shared by every model of the process
+_IN_FLIGHT = SingleFlight()
+
+# Request ids remembered with the endpoint that served them, per model
+_SERVED_BY_SIZE = 1024
+
+# Attributes of the models of the same version kept in a `ModelRegistry`
+_SHARED_ATTRIBUTES = (
+    "model_client",
+    "version_client",
+    "api_client",
+    "endpoints_client",
+    "model",
+    "version",
+    "_endpoints",
+    "_balancer",
+    "_served_by",
+    "_served_by_lock",
+)
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Group the items of an iterable in lists of `size` items, the last one may be shorter.
+    """
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
 
 class GizaModel:
     """
@@ -36,9 +91,9 @@ class GizaModel:
     remote deployments via the Giza SDK.
 
     Attributes:
-        session (ort.InferenceSession | None): An ONNX runtime inference session for local model predictions.
+        session (ort.InferenceSession | None): An ONNX runtime inference session for local model predictions, created on first use.
         model_client (ModelsClient): Client to interact with the models endpoint of the Giza API.
-        version_client (VersionsClient): Client to interact with the versions endpoint of the Giza API.
+        version_client (StreamingVersionsClient): Client to interact with the versions endpoint of the Giza API.
         api_client (ApiClient): General client for interacting with the Giza API.
         uri (str): The URI for making prediction requests to a deployed model.
         model_id (int): The unique identifier of the model in the Giza platform.
@@ -48,7 +103,16 @@ class GizaModel:
         model_path (Optional[str]): The file path to a local ONNX model. Defaults to None.
         id (Optional[int]): The unique identifier of the model in the Giza platform. Defaults to None.
         version (Optional[int]): The version number of the model in the Giza platform. Defaults to None.
-        output_path (Optional[str]): The file path where the downloaded model should be saved. Defaults to None.
+        output_path (Optional[str]): The file path where a copy of the downloaded model should be saved. Defaults to None.
+        client_pool (Optional[ClientPool]): HTTP client pool used by `apredict`. Defaults to the process wide pool.
+        metadata_ttl (float): Seconds the model, version and endpoints metadata is cached between instances, 0 disables it. Defaults to 600.
+        artifact_cache (Optional[ArtifactCache]): Cache where the downloaded models are stored. Defaults to the shared cache in `GIZA_AGENTS_CACHE_DIR`.
+        share_weights (bool): Memory map the weights of the cached model so every process on the host shares one copy, at the cost of onnxruntime weight prepacking. Defaults to False.
+        coalesce_requests (bool): Identical verifiable predictions in flight at the same time in the process share one request and its request_id. Defaults to True.
+        prediction_cache (Optional[PredictionCache]): Cache for the results of local predictions, it can be shared between models. Defaults to None, see `enable_prediction_cache`.
+        balancing (str): How verifiable predictions are spread when the version has several active endpoints, "round_robin" or "least_outstanding". Defaults to "round_robin".
+        endpoint_cooldown (float): Seconds an endpoint that failed a request is out of rotation, doubled on repeated failures. Defaults to 30.
+        registry (Optional[ModelRegistry]): Share the API clients, metadata, endpoint balancer and session with the other instances of the same version in the registry, e.g. `get_default_registry()`. Call `release` when done. Defaults to None.
 
     Raises:
         ValueError: If the necessary combination of parameters is not provided.
@@ -60,6 +124,15 @@ class GizaModel:
         id: Optional[int] = None,
         version: Optional[int] = None,
         output_path: Optional[str] = None,
+        client_pool: Optional[ClientPool] = None,
+        metadata_ttl: float = 600.0,
+        artifact_cache: Optional[ArtifactCache] = None,
+        share_weights: bool = False,
+        coalesce_requests: bool = True,
+        prediction_cache: Optional[PredictionCache] = None,
+        balancing: str = "round_robin",
+        endpoint_cooldown: float = 30.0,
+        registry: Optional[ModelRegistry] = None,
     ):
         if model_path is None and id is None and version is None:
             raise ValueError("Either model_path or id and version must be provided.")
@@ -75,6 +148,27 @@ class GizaModel:
                 "Only one of model_path or id and version should be provided."
             )
 
+        if balancing not in STRATEGIES:
+            raise ValueError(
+                f"Unknown balancing strategy {balancing}, expected one of {STRATEGIES}"
+            )
+
+        self._batcher: Optional[MicroBatcher] = None
+        self._pool: Optional[InferencePool] = None
+        self._client_pool = client_pool
+        self._coalesce_requests = coalesce_requests
+        self._prediction_cache = prediction_cache
+        self._model_path = model_path
+        self._session: Optional[ort.InferenceSession] = None
+        # Models from the platform load the session on first local use, see `warmup`
+        self._session_loaded = model_path is not None
+        self._session_lock = threading.Lock()
+        self._output_dtype: Any = _UNSET
+        self._balancer: Optional[EndpointBalancer] = None
+        self._served_by: OrderedDict = OrderedDict()
+        self._served_by_lock = threading.Lock()
+        self._shared: Optional[SharedModel] = None
+
         if model_path:
             if ".onnx" in model_path:
                 logger.debug(f"Starting ONNX session from {model_path}")
@@ -83,15 +177,15 @@ class GizaModel:
         elif id and version:
             self.model_id = id
             self.version_id = version
-            logger.debug("Starting Giza Clients")
-            self.model_client = ModelsClient(API_HOST)
-            self.version_client = VersionsClient(API_HOST)
-            self.api_client = ApiClient(API_HOST)
-            self.endpoints_client = EndpointsClient(API_HOST)
-            self._get_credentials()
-            self.model = self._get_model(id)
+            self._cache = Cache(str(get_cache_dir() / "metadata"))
+            self._artifacts = artifact_cache or ArtifactCache()
+            self._metadata_ttl = metadata_ttl
+            self._share_weights = share_weights
+            if registry is None:
+                self._connect(balancing, endpoint_cooldown)
+            else:
+                self._connect_shared(registry, balancing, endpoint_cooldown)
             logger.debug(f"Model: {self.model}")
-            self.version = self._get_version(version)
             logger.debug(f"Version: {self.version}")
             self.framework = self.version.framework
             logger.debug(f"Framework: {self.framework}")
@@ -99,56 +193,215 @@ class GizaModel:
             logger.debug(f"URI: {self.uri}")
             self.endpoint_id = self._get_endpoint_id()
             logger.debug(f"Endpoint ID: {self.endpoint_id}")
-            self._cache = Cache(os.path.join(os.getcwd(), "tmp", "cachedir"))
-            if output_path is not None:
-                self._output_path = output_path
-            else:
-                self._output_path = os.path.join(
-                    tempfile.gettempdir(),
-                    f"{self.model_id}_{self.version_id}_{self.model.name}",
-                )
+            self._output_path = output_path
             logger.debug(f"Output Path: {self._output_path}")
-            self.session = self._set_session()
 
-    def _get_endpoint_id(self) -> int:
+    def _connect(self, balancing: str, endpoint_cooldown: float) -> None:
+        """
+        Creates the API clients and resolves the model, version and endpoints.
+        """
+        logger.debug("Starting Giza Clients")
+        self.model_client = ModelsClient(API_HOST)
+        self.version_client = StreamingVersionsClient(API_HOST)
+        self.api_client = ApiClient(API_HOST)
+        self.endpoints_client = EndpointsClient(API_HOST)
+        self._get_credentials()
+        self._resolve_metadata()
+        self.framework = self.version.framework
+        self._balancer = self._build_balancer(balancing, endpoint_cooldown)
+
+    def _connect_shared(
+        self, registry: ModelRegistry, balancing: str, endpoint_cooldown: float
+    ) -> None:
+        """
+        Uses the API clients, metadata and balancer of the version in the registry, the first
+        instance of the version creates them.
+        """
+        shared = registry.acquire(API_HOST, self.model_id, self.version_id)
+        try:
+            with shared.lock:
+                if not shared.ready:
+                    self._connect(balancing, endpoint_cooldown)
+                    shared.state.update(
+                        {name: getattr(self, name) for name in _SHARED_ATTRIBUTES}
+                    )
+                else:
+                    logger.debug(f"Using shared model {shared.key}")
+                    for name, value in shared.state.items():
+                        setattr(self, name, value)
+        except BaseException:
+            registry.release(shared)
+            raise
+        self._shared = shared
+        # Instances that are never released give their reference back when collected
+        self._release_shared = weakref.finalize(self, registry.release, shared)
+
+    def release(self) -> None:
+        """
+        Gives back the state shared through the registry, the session of the version is closed
+        once no instance uses it. Does nothing for models without a registry.
+        """
+        if self._shared is None:
+            return
+        self._shared = None
+        self._release_shared()
+        with self._session_lock:
+            self._session = None
+            self._session_loaded = False
+
+    @property
+    def session(self) -> Optional[ort.InferenceSession]:
         """
-        Retrieves the endpoint id for the deployed model.
+        The ONNX runtime session for local predictions. For models retrieved from the platform the
+        model is downloaded and the session created the first time it is used.
+        """
+        if not self._session_loaded:
+            with self._session_lock:
+                if not self._session_loaded:
+                    if self._shared is not None:
+                        self._session = self._shared.session(
+                            self._share_weights, self._set_session
+                        )
+                    else:
+                        self._session = self._set_session()
+                    self._session_loaded = True
+        return self._session
+
+    @session.setter
+    def session(self, session: Optional[ort.InferenceSession]) -> None:
+        self._session = session
+        self._session_loaded = True
+
+    def warmup(self) -> Optional[ort.InferenceSession]:
+        """
+        Downloads the model and creates the ONNX runtime session now instead of on the first local
+        prediction, useful to keep the first prediction fast.
 
         Returns:
-            The endpoint id for the deployed model.
+            The ONNX runtime session, None if it could not be created.
+        """
+        return self.session
+
+    def _metadata_key(self) -> str:
+        """
+        Key of the model, version and endpoints record in the cache.
+        """
+        return f"metadata:{API_HOST}:{self.model_id}:{self.version_id}"
+
+    def _resolve_metadata(self) -> None:
+        """
+        Sets the model, version and active endpoints, from the cache when a fresh record exists or
+        from the API otherwise. The API lookups are independent of each other so they run concurrently.
+        """
+        record = self._cache.get(self._metadata_key()) if self._metadata_ttl else None
+        if record is not None:
+            logger.debug("Using cached model metadata")
+            self.model = Model(**record["model"])
+            self.version = Version(**record["version"])
+            self._endpoints = [Endpoint(**endpoint) for endpoint in record["endpoints"]]
+            return
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            model = executor.submit(self._get_model, self.model_id)
+            version = executor.submit(self._get_version, self.version_id)
+            endpoints = executor.submit(self._get_endpoints)
+            self.model = model.result()
+            self.version = version.result()
+            self._endpoints = endpoints.result()
+
+        # Only cache what is stable, a model that is still being built or deployed will change soon
+        if (
+            self._metadata_ttl
+            and self.version.status == VersionStatus.COMPLETED
+            and len(self._endpoints) > 0
+        ):
+            self._cache.set(
+                self._metadata_key(),
+                {
+                    "model": self.model.model_dump(),
+                    "version": self.version.model_dump(),
+                    "endpoints": [
+                        endpoint.model_dump() for endpoint in self._endpoints
+                    ],
+                },
+                expire=self._metadata_ttl,
+            )
+
+    def invalidate_metadata(self) -> None:
+        """
+        Drops the cached model, version and endpoints record so the next instance fetches it again.
+        """
+        self._cache.delete(self._metadata_key())
+
+    def _get_endpoints(self) -> List[Endpoint]:
+        """
+        Retrieves the active endpoints of the model version.
+
+        Returns:
+            The list of active endpoints.
         """
         deployments_list = self.endpoints_client.list(
             params={
-                "model_id": self.model.id,
-                "version_id": self.version.version,
+                "model_id": self.model_id,
+                "version_id": self.version_id,
                 "is_active": True,
             }
         )
+        logger.debug(f"Endpoints retrieved: {deployments_list.root}")
+        return deployments_list.root
 
-        if len(deployments_list.root) == 1:
-            return deployments_list.root[0].id
-        elif len(deployments_list.root) > 1:
-            logger.debug(f"Endpoints retrieved: {deployments_list.root}")
-            raise ValueError("Multiple versions deployed for the same model")
-        else:
+    def _get_endpoint_id(self) -> int:
+        """
+        Retrieves the endpoint id for the deployed model. When several endpoints are active this
+        is the first one, predictions are balanced across all of them.
+
+        Returns:
+            The endpoint id for the deployed model.
+        """
+        if len(self._endpoints) == 0:
             raise ValueError("No active deployments found")
+        if len(self._endpoints) > 1:
+            logger.info(
+                f"Balancing predictions across {len(self._endpoints)} active endpoints"
+            )
+        return self._endpoints[0].id
 
-    def _retrieve_uri(self) -> str:
+    def _retrieve_uri(self) -> Optional[str]:
         """
         Retrieves the URI for making prediction requests to a deployed model.
 
-        Args:
-            version_id (int): The version number of the model.
-
         Returns:
-            The URI for making prediction requests to the deployed model.
+            The URI of the first active endpoint, None if there are no active endpoints.
+        """
+        if len(self._endpoints) == 0:
+            return None
+        return self._endpoint_uri(self._endpoints[0])
+
+    def _endpoint_uri(self, endpoint: Endpoint) -> str:
+        """
+        The URI predictions are sent to for an endpoint, it depends on the framework.
         """
-        # Different URI per framework
-        uri = get_endpoint_uri(self.model.id, self.version.version)
         if self.framework == Framework.CAIRO:
-            return f"{uri}/cairo_run"
+            return f"{endpoint.uri}/cairo_run"
         else:
-            return f"{uri}/predict"
+            return f"{endpoint.uri}/predict"
+
+    def _build_balancer(
+        self, strategy: str, cooldown: float
+    ) -> Optional[EndpointBalancer]:
+        """
+        Builds the balancer of the active endpoints, None if there are none.
+        """
+        if len(self._endpoints) == 0:
+            return None
+        return EndpointBalancer(
+            [
+                Replica(endpoint.id, self._endpoint_uri(endpoint))
+                for endpoint in self._endpoints
+            ],
+            strategy=strategy,
+            cooldown=cooldown,
+        )
 
     def _get_model(self, model_id: int) -> Model:
         """
@@ -172,7 +425,7 @@ class GizaModel:
         Returns:
             The version of the model.
         """
-        return self.version_client.get(self.model.id, version_id)
+        return self.version_client.get(self.model_id, version_id)
 
     def _set_session(self) -> Optional[ort.InferenceSession]:
         """
@@ -188,25 +441,26 @@ class GizaModel:
             )
 
         try:
-            self._download_model()
-
-            if self._output_path in self._cache:
-                file_path = Path(self._cache.get(self._output_path))
-                with open(file_path, "rb") as f:
-                    onnx_model = f.read()
-
-            return ort.InferenceSession(onnx_model)
+            file_path = self._download_model()
+            # Load from the path so the model is not copied into a Python bytes object first
+            if self._share_weights:
+                options = ort.SessionOptions()
+                # Prepacking copies the weights to private memory, which defeats the memory map
+                options.add_session_config_entry("session.disable_prepacking", "1")
+                return ort.InferenceSession(str(self._mapped_model(file_path)), options)
+            return ort.InferenceSession(str(file_path))
 
         except Exception as e:
             logger.info(f"Could not download model: {e}")
             return None
 
-    def _download_model(self) -> None:
+    def _download_model(self) -> Path:
         """
-        Downloads the model specified by model id and version id to the given output_path.
+        Downloads the model specified by model id and version id to the artifact cache, unless it is
+        already there. If an output_path was given the model is also copied there.
 
-        Args:
-            output_path (str): The file path where the downloaded model should be saved.
+        Returns:
+            The path of the cached model.
 
         Raises:
             ValueError: If the model version status is not completed.
@@ -217,27 +471,76 @@ class GizaModel:
                 f"Model version status is not completed {self.version.status}"
             )
 
-        if self._output_path not in self._cache:
-            logger.info("Model is not downloaded, downloading... 🚀")
-            onnx_model = self.version_client.download_original(
-                self.model.id, self.version.version
-            )
+        file_path = self._artifacts.get(self.model_id, self.version_id)
+        if file_path is None:
+            with self._artifacts.lock(self.model_id, self.version_id):
+                # Another process may have downloaded it while we waited for the lock
+                file_path = self._artifacts.get(self.model_id, self.version_id)
+                if file_path is None:
+                    logger.info("Model is not downloaded, downloading... 🚀")
+                    url = self.version_client.get_original_download_url(
+                        self.model_id, self.version_id
+                    )
 
-            logger.info("Model is ready, downloading!")
+                    logger.info("Model is ready, downloading!")
+                    partial_path = self._artifacts.partial_path(
+                        self.model_id, self.version_id
+                    )
+                    digest = stream_download(url, partial_path, progress=log_progress())
+                    file_path = self._artifacts.put(
+                        self.model_id, self.version_id, partial_path, digest=digest
+                    )
+                    logger.info(f"Model saved at: {file_path} ✅")
+        else:
+            logger.info(f"Model already downloaded at: {file_path} ✅")
 
-            if (".onnx" or ".json") in self._output_path:
-                save_path = Path(self._output_path)
-            else:
-                save_path = Path(f"{self._output_path}.onnx")
+        if self._output_path is not None:
+            self._export_model(file_path)
+        return file_path
 
-            with open(save_path, "wb") as f:
-                f.write(onnx_model)
+    def _mapped_model(self, file_path: Path) -> Path:
+        """
+        Gets the layout of the cached model with its weights in a separate page aligned file, which
+        onnxruntime memory maps instead of copying. It is written the first time it is needed.
 
-            self._cache[self._output_path] = save_path
+        Args:
+            file_path (Path): The path of the cached model.
 
-            logger.info(f"Model saved at: {save_path} ✅")
+        Returns:
+            The path of the model to load the session from.
+        """
+        digest = file_path.name.split(".")[0]
+        directory = self._artifacts.mapped_dir(self.model_id, self.version_id, digest)
+        model_path = directory / "model.onnx"
+        if not model_path.exists():
+            with self._artifacts.lock(self.model_id, self.version_id):
+                if not model_path.exists():
+                    logger.debug(f"Writing memory mappable model to {directory}")
+                    partial = directory.with_name(f".partial-{directory.name}")
+                    shutil.rmtree(partial, ignore_errors=True)
+                    externalize_weights(file_path, partial)
+                    shutil.rmtree(directory, ignore_errors=True)
+                    os.replace(partial, directory)
+        return model_path
+
+    def _export_model(self, file_path: Path) -> None:
+        """
+        Copies the cached model to the output_path given by the user.
+
+        Args:
+            file_path (Path): The path of the cached model.
+        """
+        if self._output_path.endswith((".onnx", ".json")):
+            save_path = Path(self._output_path)
         else:
-            logger.info(f"Model already downloaded at: {self._output_path} ✅")
+            save_path = Path(f"{self._output_path}.onnx")
+
+        if not save_path.exists():
+            # Copy then rename so nobody sees a half written file
+            partial_path = save_path.with_name(f".{save_path.name}.partial")
+            shutil.copyfile(file_path, partial_path)
+            os.replace(partial_path, save_path)
+            logger.info(f"Model saved at: {save_path} ✅")
 
     def _get_credentials(self) -> None:
         """
@@ -256,6 +559,8 @@ class GizaModel:
         model_category="ONNX_ORION",
         job_size: str = "M",
         dry_run: bool = False,
+        emulate: bool = False,
+        payload: Optional[Dict[str, Any]] = None,
     ) -> Optional[Union[Tuple[Any, Any], "AgentResult"]]:
         """
         Makes a prediction using either a local ONNX session or a remote deployed model, depending on the
@@ -268,6 +573,8 @@ class GizaModel:
             fp_impl (str): The fixed point implementation to use, when computed in verifiable mode. Defaults to "FP16x16".
             custom_output_dtype (Optional[str]): Specify the data type of the result when computed in verifiable mode. Defaults to None.
             model_category (str): The category of model. "ONNX_ORION" | "XGB" | "LGBM"
+            emulate (bool): Emulate a verifiable dry run locally with the cached model, its inputs and outputs quantized to the fixed point implementation, instead of calling the endpoint. Defaults to False.
+            payload (Optional[Dict[str, Any]]): The body of the verifiable request if already built from the same arguments, the inputs are not formatted again. Defaults to None.
 
         Returns:
             A tuple (predictions, request_id) where predictions is the result of the prediction and request_id
@@ -276,78 +583,756 @@ class GizaModel:
         Raises:
             ValueError: If required parameters are not provided or the session is not initialized.
         """
-        output_dtype = "Tensor<FP16x16>"
+        if verifiable and emulate:
+            kind = "emulated"
+        elif verifiable:
+            kind = "verifiable"
+        else:
+            kind = "local"
+        trace = PredictionTrace(self._prediction_namespace(), kind)
+        error = None
         try:
             logger.info("Predicting")
-            if verifiable:
-                if not self.uri:
-                    raise ValueError("Model has not been deployed")
-
-                # Non common arguments should be named parameters
-                payload = self._format_inputs_for_framework(
-                    input_file,
-                    input_feed,
-                    fp_impl=fp_impl,
-                    model_category=model_category,
-                    job_size=job_size,
+            if verifiable and emulate:
+                with trace.phase("run"):
+                    return self._emulate_verifiable(
+                        input_file,
+                        input_feed,
+                        fp_impl=fp_impl,
+                        custom_output_dtype=custom_output_dtype,
+                        model_category=model_category,
+                    )
+            elif verifiable:
+                with trace.phase("format"):
+                    if payload is None:
+                        payload = self._prepare_verifiable_payload(
+                            input_file,
+                            input_feed,
+                            fp_impl=fp_impl,
+                            model_category=model_category,
+                            job_size=job_size,
+                            dry_run=dry_run,
+                        )
+
+                with trace.phase("request"):
+                    if self._coalesce_requests:
+                        body, replica = _IN_FLIGHT.do(
+                            payload_key(self.uri, payload),
+                            lambda: self._post_verifiable(payload, trace),
+                        )
+                    else:
+                        body, replica = self._post_verifiable(payload, trace)
+                # Every instance sharing the request learns where its proof job is
+                self._remember_endpoint(body, replica)
+
+                with trace.phase("parse"):
+                    return self._parse_verifiable_body(
+                        body, model_category, custom_output_dtype
+                    )
+            # Here we are returning different things, Tuple vs np.ndarray
+            # TODO: make it consistent
+            else:
+                if self._pool is None and self.session is None:
+                    raise ValueError("Session is not initialized.")
+                if input_feed is None:
+                    raise ValueError("Input feed is none")
+                trace.sizes["input_bytes"] = sum(
+                    getattr(value, "nbytes", 0) for value in input_feed.values()
                 )
+                cache_key = None
+                if self._prediction_cache is not None:
+                    with trace.phase("cache"):
+                        cache_key = self._prediction_cache.key(
+                            self._prediction_namespace(), input_feed
+                        )
+                        cached = self._prediction_cache.get(cache_key)
+                    if cached is not None:
+                        return (cached, None)
+                with trace.phase("run"):
+                    if self._pool is not None:
+                        preds = self._pool.predict(input_feed)[0]
+                    elif self._batcher is not None:
+                        preds = self._batcher.predict(input_feed)[0]
+                    else:
+                        preds = self.session.run(None, input_feed)[0]
+                trace.sizes["output_bytes"] = getattr(preds, "nbytes", 0)
+                if cache_key is not None:
+                    self._prediction_cache.put(cache_key, preds)
+                return (preds, None)
+        except Exception as e:
+            error = e
+            logger.error(f"An error occurred in predict: {e}")
+            raise e
+        finally:
+            trace.finish(error)
+
+    async def apredict(
+        self,
+        input_file: Optional[str] = None,
+        input_feed: Optional[Dict] = None,
+        verifiable: bool = False,
+        fp_impl: str = "FP16x16",
+        custom_output_dtype: Optional[str] = None,
+        model_category="ONNX_ORION",
+        job_size: str = "M",
+        dry_run: bool = False,
+        emulate: bool = False,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Tuple[Any, Any]]:
+        """
+        Async version of `predict`. Verifiable predictions are sent through a connection pooled
+        HTTP client shared per endpoint, so many of them can run concurrently from one event loop.
+        Local predictions run in a worker thread.
 
-                if dry_run:
-                    logger.info("Dry run enabled")
-                    payload["dry_run"] = True
+        Args:
+            input_file (Optional[str]): The path to the input file for prediction. Defaults to None.
+            input_feed (Optional[Dict]): A dictionary containing the input data for prediction. Defaults to None.
+            verifiable (bool): A flag indicating whether to use the verifiable computation endpoint. Defaults to False.
+            fp_impl (str): The fixed point implementation to use, when computed in verifiable mode. Defaults to "FP16x16".
+            custom_output_dtype (Optional[str]): Specify the data type of the result when computed in verifiable mode. Defaults to None.
+            model_category (str): The category of model. "ONNX_ORION" | "XGB" | "LGBM"
+            emulate (bool): Emulate a verifiable dry run locally with the cached model, its inputs and outputs quantized to the fixed point implementation, instead of calling the endpoint. Defaults to False.
+            payload (Optional[Dict[str, Any]]): The body of the verifiable request if already built from the same arguments, the inputs are not formatted again. Defaults to None.
 
-                hooks = (
-                    {"response": requests_debug}
-                    if logger.level == logging.DEBUG
-                    else None
+        Returns:
+            A tuple (predictions, request_id) where predictions is the result of the prediction and request_id
+            is the identifier of the prediction request if verifiable computation is used, otherwise None.
+
+        Raises:
+            ValueError: If required parameters are not provided or the session is not initialized.
+        """
+        # Not `self.predict`, subclasses wrap its result and do it again on the async result
+        if not verifiable:
+            return await asyncio.to_thread(
+                GizaModel.predict, self, input_file=input_file, input_feed=input_feed
+            )
+        if emulate:
+            return await asyncio.to_thread(
+                GizaModel.predict,
+                self,
+                input_file=input_file,
+                input_feed=input_feed,
+                verifiable=True,
+                fp_impl=fp_impl,
+                custom_output_dtype=custom_output_dtype,
+                model_category=model_category,
+                emulate=True,
+            )
+
+        trace = PredictionTrace(self._prediction_namespace(), "verifiable")
+        error = None
+        try:
+            logger.info("Predicting")
+            with trace.phase("format"):
+                if payload is None:
+                    payload = self._prepare_verifiable_payload(
+                        input_file,
+                        input_feed,
+                        fp_impl=fp_impl,
+                        model_category=model_category,
+                        job_size=job_size,
+                        dry_run=dry_run,
+                    )
+
+            with trace.phase("request"):
+                if self._coalesce_requests:
+                    body, replica = await _IN_FLIGHT.ado(
+                        payload_key(self.uri, payload),
+                        lambda: self._apost_verifiable(payload, trace),
+                    )
+                else:
+                    body, replica = await self._apost_verifiable(payload, trace)
+            self._remember_endpoint(body, replica)
+
+            with trace.phase("parse"):
+                return await asyncio.to_thread(
+                    self._parse_verifiable_body,
+                    body,
+                    model_category,
+                    custom_output_dtype,
                 )
-                response = requests.post(self.uri, json=payload, hooks=hooks)
-
-                try:
-                    response.raise_for_status()
-                except requests.exceptions.HTTPError as e:
-                    logger.error(f"An error occurred in predict: {e}")
-                    error_message = f"Deployment predict error: {response.text}"
-                    logger.error(error_message)
-                    logger.error("Logs:")
-                    print(self.endpoints_client.get_logs(self.endpoint_id).logs)
+        except Exception as e:
+            error = e
+            logger.error(f"An error occurred in predict: {e}")
+            raise e
+        finally:
+            trace.finish(error)
+
+    def _post_verifiable(
+        self, payload: Dict[str, Any], trace: Optional[PredictionTrace] = None
+    ) -> Tuple[Dict[str, Any], Replica]:
+        """
+        Sends a verifiable prediction request to the endpoint.
+
+        Args:
+            payload (Dict[str, Any]): The body of the request.
+            trace (Optional[PredictionTrace]): Records the sizes and the server time of the request.
+
+        Returns:
+            A tuple (body, replica) with the body of the response and the endpoint that served it.
+
+        Raises:
+            requests.exceptions.HTTPError: If the endpoint returns an error.
+        """
+        hooks = {"response": requests_debug} if logger.level == logging.DEBUG else None
+        tried: List[Replica] = []
+        while True:
+            replica = self._acquire_endpoint(tried)
+            try:
+                response = requests.post(replica.uri, json=payload, hooks=hooks)
+                break
+            except requests.exceptions.ConnectionError as e:
+                if not self._endpoint_unreachable(replica, tried, e):
                     raise e
+            except BaseException:
+                # Timeouts and broken responses, don't leave the request outstanding
+                self._release_endpoint(replica, ok=False)
+                raise
+        if trace is not None:
+            self._trace_response(trace, response)
 
-                body = response.json()
-                serialized_output = body["result"]
-                request_id = body["request_id"]
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            stale = self._endpoint_gone(response.status_code)
+            self._release_endpoint(replica, ok=not stale)
+            logger.error(f"An error occurred in predict: {e}")
+            error_message = f"Deployment predict error: {response.text}"
+            logger.error(error_message)
+            logger.error("Logs:")
+            print(self.endpoints_client.get_logs(replica.endpoint_id).logs)
+            if stale:
+                # The endpoint may have been redeployed, don't trust the cached one
+                self.invalidate_metadata()
+            raise e
 
-                if self.framework == Framework.CAIRO:
-                    logger.info("Serialized: %s", serialized_output)
+        self._release_endpoint(replica, ok=True)
+        return response.json(), replica
 
-                    if model_category == "ONNX_ORION":
-                        if custom_output_dtype is None:
-                            output_dtype = self._get_output_dtype()
-                        else:
-                            output_dtype = custom_output_dtype
-                    elif model_category in ["XGB", "LGBM"]:
-                        output_dtype = "i32"
+    async def _apost_verifiable(
+        self, payload: Dict[str, Any], trace: Optional[PredictionTrace] = None
+    ) -> Tuple[Dict[str, Any], Replica]:
+        """
+        Async version of `_post_verifiable`, through the pooled HTTP client of the endpoint.
 
-                    logger.debug("Output dtype: %s", output_dtype)
-                    preds = self._parse_cairo_response(
-                        serialized_output, output_dtype, model_category
-                    )
+        Returns:
+            A tuple (body, replica) with the body of the response and the endpoint that served it.
 
-                elif self.framework == Framework.EZKL:
-                    preds = np.array(serialized_output[0])
-                return (preds, request_id)
-            # Here we are returning different things, Tuple vs np.ndarray
-            # TODO: make it consistent
-            else:
-                if self.session is None:
-                    raise ValueError("Session is not initialized.")
-                if input_feed is None:
-                    raise ValueError("Input feed is none")
-                preds = self.session.run(None, input_feed)[0]
-                return (preds, None)
+        Raises:
+            httpx.HTTPStatusError: If the endpoint returns an error.
+        """
+        tried: List[Replica] = []
+        while True:
+            replica = self._acquire_endpoint(tried)
+            client = self._get_client_pool().get_async_client(replica.uri)
+            try:
+                response = await client.post(replica.uri, json=payload)
+                break
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                if not self._endpoint_unreachable(replica, tried, e):
+                    raise e
+            except asyncio.CancelledError:
+                # Not the endpoint's fault, only stop counting the request
+                self._release_endpoint(replica, ok=None)
+                raise
+            except BaseException:
+                self._release_endpoint(replica, ok=False)
+                raise
+        logger.debug(f"Response: {response.status_code} {response.url}")
+        if trace is not None:
+            self._trace_response(trace, response)
+
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            stale = self._endpoint_gone(response.status_code)
+            self._release_endpoint(replica, ok=not stale)
+            logger.error(f"An error occurred in predict: {e}")
+            error_message = f"Deployment predict error: {response.text}"
+            logger.error(error_message)
+            logs = await asyncio.to_thread(
+                self.endpoints_client.get_logs, replica.endpoint_id
+            )
+            logger.error(f"Logs: {logs.logs}")
+            if stale:
+                self.invalidate_metadata()
+            raise e
+
+        self._release_endpoint(replica, ok=True)
+        return response.json(), replica
+
+    def _acquire_endpoint(self, tried: List[Replica]) -> Replica:
+        """
+        Picks the endpoint for a verifiable prediction, avoiding those already tried for it.
+        """
+        if self._balancer is None:
+            return Replica(self.endpoint_id, self.uri)
+        return self._balancer.acquire(exclude=tried)
+
+    def _release_endpoint(self, replica: Replica, ok: Optional[bool]) -> None:
+        """
+        Records the outcome of a request for the health of its endpoint, None if it has none, e.g. when cancelled.
+        """
+        if self._balancer is not None:
+            self._balancer.release(replica, ok)
+
+    @staticmethod
+    def _endpoint_gone(status_code: int) -> bool:
+        """
+        Whether an error response means the endpoint failed or no longer serves the model, e.g.
+        it was torn down or redeployed, rather than a bad request.
+        """
+        return status_code >= 500 or status_code == 404
+
+    def _endpoint_unreachable(
+        self, replica: Replica, tried: List[Replica], error: Exception
+    ) -> bool:
+        """
+        Takes an endpoint that could not be reached out of rotation, and drops the cached
+        endpoints since it may have been torn down.
+
+        Returns:
+            True if the prediction can be retried on another endpoint.
+        """
+        self._release_endpoint(replica, ok=False)
+        self.invalidate_metadata()
+        tried.append(replica)
+        if self._balancer is None or len(tried) >= len(self._balancer.replicas):
+            return False
+        logger.warning(
+            f"Endpoint {replica.endpoint_id} unreachable, retrying on another one: {error}"
+        )
+        return True
+
+    def _remember_endpoint(self, body: Dict[str, Any], replica: Replica) -> None:
+        """
+        Keeps the endpoint that served a request, its proof job is listed under that endpoint.
+        """
+        request_id = body.get("request_id") if isinstance(body, dict) else None
+        if request_id is None:
+            return
+        with self._served_by_lock:
+            self._served_by[request_id] = replica.endpoint_id
+            if len(self._served_by) > _SERVED_BY_SIZE:
+                self._served_by.popitem(last=False)
+
+    def _endpoint_for(self, request_id: str) -> Optional[int]:
+        """
+        The endpoint that served a verifiable prediction, the first active endpoint if unknown.
+        """
+        with self._served_by_lock:
+            return self._served_by.get(request_id, self.endpoint_id)
+
+    @staticmethod
+    def _trace_response(
+        trace: PredictionTrace, response: Union[requests.Response, httpx.Response]
+    ) -> None:
+        """
+        Records the sizes of a verifiable prediction request and response, and the time the
+        server reported spending on it.
+        """
+        request = getattr(response, "request", None)
+        # requests keeps the encoded body in `body`, httpx in `content`
+        request_body = getattr(request, "body", None) or getattr(
+            request, "content", None
+        )
+        if isinstance(request_body, (str, bytes)):
+            trace.sizes["request_bytes"] = len(request_body)
+        content = getattr(response, "content", None)
+        if isinstance(content, bytes):
+            trace.sizes["response_bytes"] = len(content)
+        seconds = server_time(getattr(response, "headers", None))
+        if seconds is not None:
+            trace.phases["server"] = seconds
+
+    def _get_client_pool(self) -> ClientPool:
+        """
+        Get the HTTP client pool for async requests, the process default one if none was given.
+        """
+        if self._client_pool is not None:
+            return self._client_pool
+        return get_default_pool()
+
+    def _prepare_verifiable_payload(
+        self,
+        input_file: Optional[str],
+        input_feed: Optional[Dict],
+        fp_impl: str,
+        model_category: str,
+        job_size: str,
+        dry_run: bool,
+    ) -> Dict[str, Any]:
+        """
+        Builds the body of a verifiable prediction request.
+
+        Raises:
+            ValueError: If the model has not been deployed.
+        """
+        if not self.uri:
+            raise ValueError("Model has not been deployed")
+
+        # Non common arguments should be named parameters
+        payload = self._format_inputs_for_framework(
+            input_file,
+            input_feed,
+            fp_impl=fp_impl,
+            model_category=model_category,
+            job_size=job_size,
+        )
+
+        if dry_run:
+            logger.info("Dry run enabled")
+            payload["dry_run"] = True
+        return payload
+
+    def _emulate_verifiable(
+        self,
+        input_file: Optional[str],
+        input_feed: Optional[Dict],
+        fp_impl: str,
+        custom_output_dtype: Optional[str],
+        model_category: str,
+    ) -> Tuple[Any, None]:
+        """
+        Runs a verifiable prediction locally, with the inputs and outputs quantized to fixed point,
+        to get about the result the Cairo program returns without a request. No proof is created.
+
+        Returns:
+            A tuple (predictions, None), the predictions as `_parse_cairo_response` returns them.
+
+        Raises:
+            ValueError: If the model is not a Cairo model or the inputs or session are missing.
+        """
+        if getattr(self, "framework", Framework.CAIRO) != Framework.CAIRO:
+            raise ValueError("Only Cairo models can be emulated")
+        if self.session is None:
+            raise ValueError("Session is not initialized.")
+
+        feed = {}
+        if input_file:
+            # Files are always serialized as FP16x16
+            data = convert_to_numpy(load_data(input_file))
+            feed[self.session.get_inputs()[0].name] = data.astype(np.float32)
+            fp_impl = "FP16x16"
+        if input_feed:
+            feed.update(
+                {k: v for k, v in input_feed.items() if isinstance(v, np.ndarray)}
+            )
+        if not feed:
+            raise ValueError("Input feed is none")
+
+        outputs = self.session.run(None, quantize_inputs(feed, fp_impl, model_category))
+
+        if model_category in ["XGB", "LGBM"]:
+            output_dtype = "i32"
+        elif custom_output_dtype is not None:
+            output_dtype = custom_output_dtype
+        elif self._model_path is not None:
+            output_dtype = self._find_output_dtype(Path(self._model_path))
+        else:
+            output_dtype = self._get_output_dtype()
+        logger.debug("Emulating output dtype: %s", output_dtype)
+        return (
+            emulate_response(
+                outputs, output_dtype or "Tensor<FP16x16>", model_category
+            ),
+            None,
+        )
+
+    def _parse_verifiable_body(
+        self,
+        body: Dict[str, Any],
+        model_category: str,
+        custom_output_dtype: Optional[str],
+    ) -> Tuple[Any, Any]:
+        """
+        Extracts the predictions and the request id from the body of a verifiable prediction response.
+
+        Returns:
+            A tuple (predictions, request_id).
+        """
+        output_dtype = "Tensor<FP16x16>"
+        serialized_output = body["result"]
+        request_id = body["request_id"]
+
+        if self.framework == Framework.CAIRO:
+            logger.info("Serialized: %s", serialized_output)
+
+            if model_category == "ONNX_ORION":
+                if custom_output_dtype is None:
+                    output_dtype = self._get_output_dtype()
+                else:
+                    output_dtype = custom_output_dtype
+            elif model_category in ["XGB", "LGBM"]:
+                output_dtype = "i32"
+
+            logger.debug("Output dtype: %s", output_dtype)
+            preds = self._parse_cairo_response(
+                serialized_output, output_dtype, model_category
+            )
+
+        elif self.framework == Framework.EZKL:
+            preds = np.array(serialized_output[0])
+        return (preds, request_id)
+
+    def predict_batch(self, input_feeds: List[Dict]) -> List[np.ndarray]:
+        """
+        Makes local predictions for several input feeds at once. The feeds are stacked along the
+        batch axis and run with a single ONNX runtime call when the model allows it, or spread
+        over the process pool if enabled. Like `predict`, the cached predictions are reused and
+        the batch is traced, as a "batch" prediction.
+
+        Args:
+            input_feeds (List[Dict]): The input feeds to predict.
+
+        Returns:
+            A list with the predictions of every input feed, in the same order.
+
+        Raises:
+            ValueError: If the session is not initialized.
+        """
+        if self._pool is None and self.session is None:
+            raise ValueError("Session is not initialized.")
+        if len(input_feeds) == 0:
+            return []
+        trace = PredictionTrace(self._prediction_namespace(), "batch")
+        error = None
+        try:
+            trace.sizes["input_bytes"] = sum(
+                getattr(value, "nbytes", 0)
+                for input_feed in input_feeds
+                for value in input_feed.values()
+            )
+            preds: List[Any] = [None] * len(input_feeds)
+            cache_keys: List[Optional[str]] = [None] * len(input_feeds)
+            if self._prediction_cache is not None:
+                with trace.phase("cache"):
+                    for index, input_feed in enumerate(input_feeds):
+                        cache_keys[index] = self._prediction_cache.key(
+                            self._prediction_namespace(), input_feed
+                        )
+                        preds[index] = self._prediction_cache.get(cache_keys[index])
+
+            missing = [index for index, pred in enumerate(preds) if pred is None]
+            if missing:
+                feeds = [input_feeds[index] for index in missing]
+                with trace.phase("run"):
+                    if self._pool is not None:
+                        outputs = list(self._pool.map(feeds))
+                    else:
+                        outputs = run_batch(self.session, feeds)
+                for index, output in zip(missing, outputs):
+                    preds[index] = output[0]
+                    if cache_keys[index] is not None:
+                        self._prediction_cache.put(cache_keys[index], preds[index])
+            trace.sizes["output_bytes"] = sum(
+                getattr(pred, "nbytes", 0) for pred in preds
+            )
+            return preds
         except Exception as e:
+            error = e
             logger.error(f"An error occurred in predict: {e}")
             raise e
+        finally:
+            trace.finish(error)
+
+    def predict_stream(
+        self,
+        input_feeds: Iterable[Dict],
+        max_in_flight: int = 8,
+        batch_size: int = 1,
+        **predict_kwargs: Any,
+    ) -> Iterator[Union[Tuple[Any, Any], "AgentResult"]]:
+        """
+        Makes predictions for a stream of input feeds, with at most `max_in_flight` of them running
+        at a time. A feed is only read from the iterable once there is room for it, so neither the
+        inputs nor the results are ever all held in memory, and the results come out in order.
+
+        Args:
+            input_feeds (Iterable[Dict]): The input feeds to predict, read lazily.
+            max_in_flight (int): Maximum number of predictions, or local batches, running at once. Defaults to 8.
+            batch_size (int): Number of feeds predicted together with `predict_batch`, which goes through
+                the same process pool and prediction cache as `predict`. Only used for local predictions.
+                Defaults to 1.
+            **predict_kwargs: Arguments for `predict`, like `verifiable`, `fp_impl` or `job_size`.
+
+        Returns:
+            An iterator of the results of `predict`, one per input feed: tuples (predictions, request_id),
+            or the `AgentResult` of the verifiable predictions of an agent.
+
+        Raises:
+            ValueError: If `max_in_flight` or `batch_size` is not positive.
+        """
+        if max_in_flight < 1 or batch_size < 1:
+            raise ValueError("max_in_flight and batch_size must be positive")
+
+        if batch_size > 1 and not predict_kwargs.get("verifiable", False):
+            chunks = _chunks(input_feeds, batch_size)
+
+            def run(chunk: List[Dict]) -> List[Tuple[Any, Any]]:
+                return [(preds, None) for preds in self.predict_batch(chunk)]
+
+        else:
+            chunks = ([feed] for feed in input_feeds)
+
+            def run(chunk: List[Dict]) -> List[Tuple[Any, Any]]:
+                return [self.predict(input_feed=chunk[0], **predict_kwargs)]
+
+        pending: Deque[Future] = deque()
+        executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="giza-predict-stream"
+        )
+        try:
+            while True:
+                # Backpressure, wait for the oldest prediction before reading more feeds
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(executor.submit(run, chunk))
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def enable_micro_batching(
+        self, max_batch_size: int = 32, max_wait_ms: float = 2.0
+    ) -> MicroBatcher:
+        """
+        Route local predictions through a micro batcher, so concurrent `predict` calls are
+        grouped into a single ONNX runtime run.
+
+        Args:
+            max_batch_size (int): Maximum number of rows per batch. Defaults to 32.
+            max_wait_ms (float): Maximum time to wait for a batch to fill up. Defaults to 2.
+
+        Returns:
+            The micro batcher, its `stats` report the achieved batch sizes and throughput.
+
+        Raises:
+            ValueError: If the session is not initialized.
+        """
+        if self.session is None:
+            raise ValueError("Session is not initialized.")
+        self.disable_micro_batching()
+        self._batcher = MicroBatcher(
+            self.session, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+        return self._batcher
+
+    def disable_micro_batching(self) -> None:
+        """
+        Stop the micro batcher, if any, and go back to one run per prediction.
+        """
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+
+    @property
+    def batch_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Batch sizes and throughput achieved by the micro batcher, None if it is not enabled.
+        """
+        if self._batcher is None:
+            return None
+        return self._batcher.stats.as_dict()
+
+    def enable_process_pool(
+        self,
+        workers: Optional[int] = None,
+        intra_op_num_threads: Optional[int] = None,
+        shared_memory_threshold: int = 64 * 1024,
+    ) -> InferencePool:
+        """
+        Run local predictions in a pool of worker processes, each with its own session for the
+        model file. Large inputs are passed to the workers through shared memory.
+
+        Args:
+            workers (Optional[int]): Number of worker processes. Defaults to the number of CPUs.
+            intra_op_num_threads (Optional[int]): ONNX runtime threads per worker. Defaults to the CPUs divided by the workers.
+            shared_memory_threshold (int): Minimum size in bytes of the inputs passed in shared memory. Defaults to 64 KiB.
+
+        Returns:
+            The inference pool.
+
+        Raises:
+            ValueError: If the model file is not an ONNX model.
+        """
+        session_config = {}
+        if self._model_path is not None:
+            if ".onnx" not in self._model_path:
+                raise ValueError("The process pool needs an ONNX model")
+            model_path = Path(self._model_path)
+        else:
+            model_path = self._download_model()
+            if self._share_weights:
+                model_path = self._mapped_model(model_path)
+                session_config["session.disable_prepacking"] = "1"
+        self.disable_process_pool()
+        self._pool = InferencePool(
+            model_path,
+            workers=workers,
+            intra_op_num_threads=intra_op_num_threads,
+            shared_memory_threshold=shared_memory_threshold,
+            session_config=session_config,
+        )
+        return self._pool
+
+    def disable_process_pool(self) -> None:
+        """
+        Stop the worker processes, if any, and go back to predicting in this process.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def enable_prediction_cache(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024**2,
+        ttl: Optional[float] = None,
+    ) -> PredictionCache:
+        """
+        Cache the results of local predictions, so identical inputs do not run the session again.
+
+        Args:
+            max_entries (int): Maximum number of results kept. Defaults to 1024.
+            max_bytes (int): Maximum total size in bytes of the results kept. Defaults to 64 MiB.
+            ttl (Optional[float]): Seconds a result stays valid, None to keep them until evicted. Defaults to None.
+
+        Returns:
+            The prediction cache, its `stats` report the hits and misses.
+        """
+        self._prediction_cache = PredictionCache(
+            max_entries=max_entries, max_bytes=max_bytes, ttl=ttl
+        )
+        return self._prediction_cache
+
+    def disable_prediction_cache(self) -> None:
+        """
+        Stop caching the results of local predictions.
+        """
+        self._prediction_cache = None
+
+    @property
+    def prediction_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Hits, misses and size of the prediction cache, None if it is not enabled.
+        """
+        if self._prediction_cache is None:
+            return None
+        return self._prediction_cache.stats
+
+    def _prediction_namespace(self) -> str:
+        """
+        Identifies the model version in the prediction cache.
+        """
+        if self._model_path is not None:
+            return f"file:{os.path.abspath(self._model_path)}"
+        return f"{API_HOST}:{self.model_id}:{self.version_id}"
 
     def _format_inputs_for_framework(self, *args: Any, **kwargs: Any) -> Any:
         """
@@ -396,16 +1381,9 @@ class GizaModel:
             logger.debug("Using input feed for prediction.")
             for name, value in input_feed.items():
                 if isinstance(value, np.ndarray):
-                    if model_category == "ONNX_ORION":
-                        tensor = create_tensor_from_array(value, fp_impl)
-                    elif model_category in ["XGB", "LGBM"]:
-                        if len(value.shape) != 1:
-                            value = value.flatten()
-                        tensor = value * 100000
-                        tensor = tensor.astype(np.int64)
-                    else:
-                        tensor = create_tensor_from_array(value, "FP16x16")
-                    formatted_args.append(serializer(tensor))
+                    formatted_args.append(
+                        serialize_input(value, model_category, fp_impl)
+                    )
 
         return {"job_size": job_size, "args": " ".join(formatted_args)}
 
@@ -457,36 +1435,43 @@ class GizaModel:
         Returns:
             The deserialized prediction result.
         """
-        return deserialize(response, data_type, framework=model_category)
+        return deserialize_response(response, data_type, framework=model_category)
 
     def _get_output_dtype(self) -> Optional[str]:
         """
         Retrieve the Cairo output data type base on the operator type of the final node.
 
+        The data type is worked out once per model version and kept in the cache, so after the
+        first call it is a lookup.
+
         Returns:
             The output dtype as a string.
         """
+        if self._output_dtype is not _UNSET:
+            return self._output_dtype
+
+        key = f"output_dtype:{API_HOST}:{self.model_id}:{self.version_id}"
+        output_dtype = self._cache.get(key, default=_UNSET)
+        if output_dtype is _UNSET:
+            output_dtype = self._find_output_dtype()
+            self._cache.set(key, output_dtype)
+        self._output_dtype = output_dtype
+        return output_dtype
+
+    def _find_output_dtype(self, file_path: Optional[Path] = None) -> Optional[str]:
+        """
+        Find the Cairo output data type from the graph of the downloaded model, without loading its weights.
 
-        self._download_model()
-
-        if self._output_path in self._cache:
-            file_path = Path(self._cache.get(self._output_path))
-            with open(file_path, "rb") as f:
-                file = f.read()
+        Args:
+            file_path (Optional[Path]): The model file, the downloaded model by default.
 
-        model = onnx.load_model_from_string(file)
-        graph = model.graph
+        Returns:
+            The output dtype as a string.
+        """
+        graph = load_graph(file_path or self._download_model())
         output_tensor_name = graph.output[0].name
 
-        def find_producing_node(
-            graph: onnx.GraphProto, tensor_name: str
-        ) -> Optional[onnx.NodeProto]:
-            for node in graph.node:
-                if tensor_name in node.output:
-                    return node
-            return None
-
-        final_node = find_producing_node(graph, output_tensor_name)
+        final_node = index_producers(graph).get(output_tensor_name)
         if final_node is None:
             return None
         optype = final_node.op_type
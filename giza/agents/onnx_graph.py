@@ -0,0 +1,184 @@
+import mmap
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Union
+
+import onnx
+from onnx import numpy_helper
+from onnx.external_data_helper import set_external_data
+
+# Field numbers from onnx.proto
+_MODEL_GRAPH_FIELD = 7
+_GRAPH_FIELDS_TO_KEEP = {
+    1,  # node
+    2,  # name
+    11,  # input
+    12,  # output
+}
+
+# Offsets of external weights are aligned so onnxruntime can memory map them, 64 KiB is the
+# allocation granularity on Windows and a multiple of the page size everywhere else
+WEIGHTS_ALIGNMENT = 64 * 1024
+WEIGHTS_FILE = "weights.bin"
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+
+def _read_varint(buffer: Union[bytes, memoryview], position: int) -> Tuple[int, int]:
+    """
+    Decode a protobuf varint.
+
+    Returns:
+        A tuple (value, position) with the value and the position right after it.
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+
+def _iter_fields(
+    buffer: Union[bytes, memoryview]
+) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Walk the top level fields of a serialized protobuf message without decoding them.
+
+    Yields:
+        Tuples (field_number, start, data_start, end) where `start` is the position of the field key,
+        `data_start` the position of the value and `end` the position right after the field.
+    """
+    position = 0
+    size = len(buffer)
+    while position < size:
+        start = position
+        key, position = _read_varint(buffer, position)
+        field_number, wire_type = key >> 3, key & 0x7
+        data_start = position
+        if wire_type == _VARINT:
+            _, position = _read_varint(buffer, position)
+        elif wire_type == _FIXED64:
+            position += 8
+        elif wire_type == _LENGTH_DELIMITED:
+            length, data_start = _read_varint(buffer, position)
+            position = data_start + length
+        elif wire_type == _FIXED32:
+            position += 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+        yield field_number, start, data_start, position
+
+
+def parse_graph(buffer: Union[bytes, memoryview]) -> onnx.GraphProto:
+    """
+    Parse the graph structure of a serialized ONNX model, skipping the weight initializers
+    and everything else that is not needed to inspect the nodes and the graph inputs and outputs.
+
+    Args:
+        buffer (Union[bytes, memoryview]): The serialized ModelProto.
+
+    Returns:
+        onnx.GraphProto: A graph with only the name, nodes, inputs and outputs.
+
+    Raises:
+        ValueError: If the buffer does not contain a graph.
+    """
+    for field_number, _, data_start, end in _iter_fields(buffer):
+        if field_number != _MODEL_GRAPH_FIELD:
+            continue
+        graph = memoryview(buffer)[data_start:end]
+        kept = b"".join(
+            graph[start:field_end]
+            for number, start, _, field_end in _iter_fields(graph)
+            if number in _GRAPH_FIELDS_TO_KEEP
+        )
+        return onnx.GraphProto.FromString(kept)
+    raise ValueError("The model does not contain a graph")
+
+
+def load_graph(path: Union[str, Path]) -> onnx.GraphProto:
+    """
+    Load the graph structure of an ONNX model file. The file is memory mapped so the weights are
+    never copied into the process memory.
+
+    Args:
+        path (Union[str, Path]): The path to the ONNX model.
+
+    Returns:
+        onnx.GraphProto: A graph with only the name, nodes, inputs and outputs.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return parse_graph(view)
+            finally:
+                view.release()
+
+
+def index_producers(graph: onnx.GraphProto) -> Dict[str, onnx.NodeProto]:
+    """
+    Build an index from tensor name to the node that produces it.
+
+    Args:
+        graph (onnx.GraphProto): The graph to index.
+
+    Returns:
+        Dict[str, onnx.NodeProto]: The producing node of every tensor in the graph.
+    """
+    return {output: node for node in graph.node for output in node.output}
+
+
+def externalize_weights(
+    path: Union[str, Path],
+    destination: Union[str, Path],
+    size_threshold: int = 1024,
+) -> Path:
+    """
+    Write a copy of an ONNX model with its weights moved to a separate, page aligned file.
+    onnxruntime memory maps weights stored this way instead of copying them into the process, so
+    sessions of the same model in different processes share the pages of the file.
+
+    Args:
+        path (Union[str, Path]): The path to the ONNX model.
+        destination (Union[str, Path]): Directory where `model.onnx` and the weights file are written.
+        size_threshold (int): Tensors smaller than this many bytes stay in the model. Defaults to 1024.
+
+    Returns:
+        Path: The path of the new model file.
+    """
+    destination = Path(destination)
+    destination.mkdir(parents=True, exist_ok=True)
+    model = onnx.load_model(str(path), load_external_data=False)
+    with open(destination / WEIGHTS_FILE, "wb") as weights:
+        offset = 0
+        for tensor in model.graph.initializer:
+            if tensor.data_location == onnx.TensorProto.EXTERNAL or (
+                tensor.data_type == onnx.TensorProto.STRING
+            ):
+                continue
+            if not tensor.raw_data:
+                # Weights stored in the typed fields, e.g. float_data, are rewritten as raw bytes
+                array = numpy_helper.to_array(tensor)
+                if array.nbytes < size_threshold:
+                    continue
+                tensor.CopyFrom(numpy_helper.from_array(array, tensor.name))
+            if len(tensor.raw_data) < size_threshold:
+                continue
+            padding = -offset % WEIGHTS_ALIGNMENT
+            weights.write(b"\0" * padding)
+            offset += padding
+            weights.write(tensor.raw_data)
+            set_external_data(tensor, WEIGHTS_FILE, offset, len(tensor.raw_data))
+            offset += len(tensor.raw_data)
+            tensor.ClearField("raw_data")
+            tensor.data_location = onnx.TensorProto.EXTERNAL
+    model_path = destination / "model.onnx"
+    onnx.save_model(model, str(model_path))
+    return model_path
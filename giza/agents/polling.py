@@ -0,0 +1,145 @@
+import logging
+import random
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from diskcache import Cache
+
+from giza.agents.cache import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+class DurationHistory:
+    """
+    Durations of the finished jobs of every model version, job size and kind, kept in the cache
+    directory so the estimates survive restarts.
+
+    Args:
+        directory (Optional[Path]): Where the history is stored. Defaults to `polling` in the cache directory.
+        max_samples (int): Number of most recent durations kept per key. Defaults to 50.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_samples: int = 50) -> None:
+        self.directory = Path(directory or get_cache_dir() / "polling")
+        self.max_samples = max_samples
+        self._cache = Cache(str(self.directory))
+
+    @staticmethod
+    def key(model_id: Any, version_id: Any, job_size: Any, kind: Any) -> str:
+        """
+        Key of the durations of the jobs of a kind and size for a model version.
+        """
+        return f"durations:{model_id}:{version_id}:{job_size}:{str(kind).lower()}"
+
+    def record(self, key: str, duration: float) -> None:
+        """
+        Add the duration of a finished job.
+        """
+        with self._cache.transact():
+            durations = self._cache.get(key, default=[])
+            durations = (durations + [float(duration)])[-self.max_samples :]
+            self._cache.set(key, durations)
+
+    def durations(self, key: str) -> List[float]:
+        """
+        The recorded durations, oldest first.
+        """
+        return self._cache.get(key, default=[])
+
+    def expected(self, key: str) -> Optional[float]:
+        """
+        The expected duration of the next job, the median of the recorded ones, None without history.
+        """
+        durations = self.durations(key)
+        if not durations:
+            return None
+        return float(np.median(durations))
+
+    def stats(self, key: str) -> Dict[str, Any]:
+        """
+        Count, mean and percentiles of the recorded durations.
+        """
+        durations = np.asarray(self.durations(key))
+        if durations.size == 0:
+            return {"count": 0}
+        return {
+            "count": int(durations.size),
+            "mean": float(durations.mean()),
+            "p50": float(np.percentile(durations, 50)),
+            "p90": float(np.percentile(durations, 90)),
+            "max": float(durations.max()),
+        }
+
+
+_histories: Dict[Path, DurationHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def get_duration_history() -> DurationHistory:
+    """
+    Get the duration history of the current cache directory.
+    """
+    directory = get_cache_dir() / "polling"
+    with _histories_lock:
+        history = _histories.get(directory)
+        if history is None:
+            history = _histories[directory] = DurationHistory(directory)
+        return history
+
+
+class PollSchedule:
+    """
+    Delays between the status polls of a job.
+
+    With an expected duration, the delay is half the time left until the job should finish, so
+    polling tightens near the expected finish. Once the job is overdue, or without an expected
+    duration, the delay grows by `backoff` from `min_interval`. Delays are kept between
+    `min_interval` and `max_interval` and randomized by `jitter` so many waiting jobs do not poll
+    in lockstep.
+
+    Args:
+        expected (Optional[float]): Expected duration of the job in seconds.
+        min_interval (float): Shortest delay in seconds. Defaults to 1.
+        max_interval (float): Longest delay in seconds. Defaults to 30.
+        backoff (float): Growth of the delay between polls of an overdue job. Defaults to 1.5.
+        jitter (float): Relative random variation of the delays. Defaults to 0.1.
+        rng (Optional[random.Random]): Source of the jitter.
+    """
+
+    def __init__(
+        self,
+        expected: Optional[float] = None,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        jitter: float = 0.1,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.expected = expected
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self._rng = rng or random.Random()
+        self._overdue_polls = 0
+
+    def next_delay(self, elapsed: float) -> float:
+        """
+        Seconds to wait before the next poll.
+
+        Args:
+            elapsed (float): Seconds since the job started.
+
+        Returns:
+            float: The delay.
+        """
+        if self.expected is not None and elapsed < self.expected:
+            delay = (self.expected - elapsed) / 2
+        else:
+            delay = self.min_interval * self.backoff**self._overdue_polls
+            self._overdue_polls += 1
+        delay = min(max(delay, self.min_interval), self.max_interval)
+        return delay * self._rng.uniform(1 - self.jitter, 1 + self.jitter)
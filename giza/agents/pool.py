@@ -0,0 +1,180 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import onnxruntime as ort
+
+logger = logging.getLogger(__name__)
+
+# Session of the worker process, created once by `_init_worker`
+_session: Optional[ort.InferenceSession] = None
+
+# Inputs are sent either pickled, or as (name, shape, dtype) of a shared memory block
+_InputSpec = Tuple[str, Any]
+
+
+def _init_worker(
+    model_path: str, intra_op_num_threads: int, session_config: Dict[str, str]
+) -> None:
+    global _session
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_num_threads
+    for key, value in session_config.items():
+        options.add_session_config_entry(key, value)
+    _session = ort.InferenceSession(model_path, options)
+
+
+def _run(inputs: Dict[str, _InputSpec]) -> List[np.ndarray]:
+    """
+    Run the worker session, attaching the inputs placed in shared memory by the parent.
+    """
+    blocks = []
+    feed = {}
+    try:
+        for name, (kind, value) in inputs.items():
+            if kind == "shm":
+                block_name, shape, dtype = value
+                block = SharedMemory(name=block_name)
+                blocks.append(block)
+                feed[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            else:
+                feed[name] = value
+        return _session.run(None, feed)
+    finally:
+        # The arrays must be released before their buffers are closed
+        feed.clear()
+        for block in blocks:
+            block.close()
+
+
+class InferencePool:
+    """
+    Pool of worker processes that each hold an ONNX runtime session for the same model file, so
+    CPU heavy models and their Python side work can use every core.
+
+    Input arrays of at least `shared_memory_threshold` bytes are copied once into shared memory
+    blocks the workers read from, instead of being pickled. Outputs are sent back pickled.
+
+    Args:
+        model_path (Union[str, Path]): The ONNX model file every worker loads.
+        workers (Optional[int]): Number of worker processes. Defaults to the number of CPUs.
+        intra_op_num_threads (Optional[int]): ONNX runtime threads per worker. Defaults to the CPUs divided by the workers.
+        shared_memory_threshold (int): Minimum size in bytes of the inputs passed in shared memory. Defaults to 64 KiB.
+        session_config (Optional[Dict[str, str]]): Config entries for the worker sessions.
+        mp_context (str): Start method of the workers, "spawn" avoids forking the threads of a live session. Defaults to "spawn".
+    """
+
+    def __init__(
+        self,
+        model_path: Union[str, Path],
+        workers: Optional[int] = None,
+        intra_op_num_threads: Optional[int] = None,
+        shared_memory_threshold: int = 64 * 1024,
+        session_config: Optional[Dict[str, str]] = None,
+        mp_context: str = "spawn",
+    ) -> None:
+        cpus = os.cpu_count() or 1
+        self.workers = workers or cpus
+        if intra_op_num_threads is None:
+            intra_op_num_threads = max(1, cpus // self.workers)
+        self.shared_memory_threshold = shared_memory_threshold
+        logger.debug(
+            f"Starting {self.workers} inference workers for {model_path} "
+            f"with {intra_op_num_threads} threads each"
+        )
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(mp_context),
+            initializer=_init_worker,
+            initargs=(str(model_path), intra_op_num_threads, session_config or {}),
+        )
+
+    def _share(
+        self, input_feed: Dict[str, Any]
+    ) -> Tuple[Dict[str, _InputSpec], List[SharedMemory]]:
+        inputs: Dict[str, _InputSpec] = {}
+        blocks = []
+        try:
+            for name, value in input_feed.items():
+                array = np.asarray(value)
+                if array.nbytes < self.shared_memory_threshold or array.dtype.hasobject:
+                    inputs[name] = ("value", array)
+                    continue
+                block = SharedMemory(create=True, size=array.nbytes)
+                blocks.append(block)
+                shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                shared[...] = array
+                del shared
+                inputs[name] = ("shm", (block.name, array.shape, array.dtype.str))
+        except BaseException:
+            _release(blocks)
+            raise
+        return inputs, blocks
+
+    def submit(self, input_feed: Dict[str, Any]) -> Future:
+        """
+        Schedule a prediction on a worker.
+
+        Args:
+            input_feed (Dict[str, Any]): The inputs of the model.
+
+        Returns:
+            Future: Resolves to the list of outputs of the model.
+        """
+        inputs, blocks = self._share(input_feed)
+        try:
+            future = self._executor.submit(_run, inputs)
+        except BaseException:
+            _release(blocks)
+            raise
+        future.add_done_callback(lambda _: _release(blocks))
+        return future
+
+    def predict(self, input_feed: Dict[str, Any]) -> List[np.ndarray]:
+        """
+        Run a prediction on a worker and wait for it.
+
+        Args:
+            input_feed (Dict[str, Any]): The inputs of the model.
+
+        Returns:
+            List[np.ndarray]: The outputs of the model.
+        """
+        return self.submit(input_feed).result()
+
+    def map(self, input_feeds: Iterable[Dict[str, Any]]) -> Iterator[List[np.ndarray]]:
+        """
+        Run predictions on all the workers, the results are returned in order.
+
+        Args:
+            input_feeds (Iterable[Dict[str, Any]]): The inputs of every prediction.
+
+        Returns:
+            Iterator[List[np.ndarray]]: The outputs of every prediction.
+        """
+        futures = [self.submit(feed) for feed in input_feeds]
+        for future in futures:
+            yield future.result()
+
+    def close(self) -> None:
+        """
+        Stop the worker processes once the pending predictions are done.
+        """
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "InferencePool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def _release(blocks: List[SharedMemory]) -> None:
+    for block in blocks:
+        block.close()
+        block.unlink()
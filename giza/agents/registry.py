@@ -0,0 +1,129 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[str, int, int]
+
+
+class SharedModel:
+    """
+    State shared by the `GizaModel` instances of one model version: API clients, metadata,
+    endpoint balancer and ONNX runtime sessions.
+
+    Attributes:
+        key (Tuple[str, int, int]): The API host, model id and version id.
+        refs (int): Number of instances using the state.
+        state (Dict[str, Any]): The shared attributes, set by the first instance.
+        lock (threading.Lock): Held by the first instance while it fills `state`.
+    """
+
+    def __init__(self, key: _Key) -> None:
+        self.key = key
+        self.refs = 0
+        self.state: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+        self._sessions: Dict[Hashable, Any] = {}
+        self._sessions_lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return len(self.state) > 0
+
+    def session(self, variant: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Get the session of a variant of the model, created once with `factory`.
+
+        Args:
+            variant (Hashable): Identifies sessions created with different options.
+            factory (Callable[[], Any]): Creates the session.
+
+        Returns:
+            The session.
+        """
+        with self._sessions_lock:
+            if variant not in self._sessions:
+                self._sessions[variant] = factory()
+            return self._sessions[variant]
+
+    def clear(self) -> None:
+        with self._sessions_lock:
+            self._sessions.clear()
+        self.state.clear()
+
+    def __repr__(self) -> str:
+        return f"SharedModel(key={self.key}, refs={self.refs})"
+
+
+class ModelRegistry:
+    """
+    Process level registry of the state of the model versions in use, so the `GizaModel` and
+    `GizaAgent` instances of the same version share one set of API clients, one metadata record,
+    one endpoint balancer and one ONNX runtime session instead of building their own.
+
+    Entries are reference counted, an entry is dropped when its last instance calls `release`
+    or is garbage collected. The metadata is resolved by the first instance, create a new
+    instance after releasing all of them to pick up a redeployment.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[_Key, SharedModel] = {}
+
+    def acquire(self, host: str, model_id: int, version_id: int) -> SharedModel:
+        """
+        Get the shared state of a model version, creating an empty one if needed, and count a reference to it.
+
+        Args:
+            host (str): The Giza API host.
+            model_id (int): The model id.
+            version_id (int): The version id.
+
+        Returns:
+            SharedModel: The shared state.
+        """
+        key = (host, model_id, version_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = SharedModel(key)
+            entry.refs += 1
+            return entry
+
+    def release(self, entry: SharedModel) -> None:
+        """
+        Drop a reference to the shared state, it is discarded with its sessions once unused.
+
+        Args:
+            entry (SharedModel): The state returned by `acquire`.
+        """
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+        logger.debug(f"Releasing shared model {entry.key}")
+        entry.clear()
+
+    def get(self, host: str, model_id: int, version_id: int) -> Optional[SharedModel]:
+        """
+        Get the shared state of a model version if some instance uses it.
+        """
+        with self._lock:
+            return self._entries.get((host, model_id, version_id))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_default_registry = ModelRegistry()
+
+
+def get_default_registry() -> ModelRegistry:
+    """
+    Get the process wide model registry.
+    """
+    return _default_registry
@@ -0,0 +1,338 @@
+import logging
+import re
+from typing import Any, List, Optional
+
+import numpy as np
+from osiris.app import create_tensor_from_array, deserialize, serializer
+
+logger = logging.getLogger(__name__)
+
+# Field of the Cairo felts, negative integers are sent as PRIME + n
+PRIME = 2**251 + 17 * 2**192 + 1
+
+FP_FACTORS = {
+    "FP8x23": 2**23,
+    "FP16x16": 2**16,
+    "FP32x32": 2**32,
+}
+
+# XGB and LGBM models take integers, the features are scaled by this factor
+TREE_SCALE = 100000
+
+# osiris decodes every fixed point output as FP16x16, whatever the dtype says
+_OUTPUT_FP_FACTOR = 2**16
+# Decimals with up to 18 digits always fit in an int64
+_MAX_INT64_DIGITS = 18
+
+_SPACE = ord(" ")
+_ZERO = ord("0")
+_POWERS_OF_TEN = np.array([10**i for i in range(1, 20)], dtype=np.uint64)
+
+# A negative int64 n is encoded as PRIME - |n|, and |n| <= 2**63 < 10**19, so only the 19 lowest
+# digits of PRIME change. They are written as a number, after the unchanged high digits of PRIME,
+# or of PRIME - 10**19 when the subtraction borrows from them.
+_LOW_DIGITS = 19
+_PRIME_HIGH, _PRIME_LOW = divmod(PRIME, 10**_LOW_DIGITS)
+_PREFIXES = ["", str(_PRIME_HIGH), str(_PRIME_HIGH - 1)]
+
+
+def _digit_count(values: np.ndarray) -> np.ndarray:
+    """
+    Number of decimal digits of unsigned integers.
+    """
+    return np.searchsorted(_POWERS_OF_TEN, values, side="right") + 1
+
+
+def _write_decimals(
+    values: np.ndarray,
+    widths: np.ndarray,
+    prefix_ids: Optional[np.ndarray] = None,
+) -> str:
+    """
+    Write unsigned integers as space separated decimals in a single preallocated buffer.
+
+    Args:
+        values (np.ndarray): The uint64 values to write.
+        widths (np.ndarray): Number of digits of every value, values are zero padded to it.
+        prefix_ids (Optional[np.ndarray]): Index in `_PREFIXES` of the digits written before every value.
+
+    Returns:
+        str: The decimals joined by spaces.
+    """
+    if len(values) == 0:
+        return ""
+    prefix_lengths = np.zeros(len(values), dtype=np.int64)
+    if prefix_ids is not None:
+        prefix_lengths = np.array([len(p) for p in _PREFIXES])[prefix_ids]
+
+    # Every token is followed by a space, the last one is dropped at the end
+    ends = np.cumsum(prefix_lengths + widths + 1) - 1
+    buffer = np.full(int(ends[-1]) + 1, _SPACE, dtype=np.uint8)
+
+    if prefix_ids is not None:
+        starts = ends - widths - prefix_lengths
+        for prefix_id, prefix in enumerate(_PREFIXES):
+            positions = starts[prefix_ids == prefix_id]
+            if not prefix or len(positions) == 0:
+                continue
+            digits = np.frombuffer(prefix.encode(), dtype=np.uint8)
+            buffer[positions[:, None] + np.arange(len(digits))] = digits
+
+    # Fill the digits right to left, one decimal position for all the values at a time
+    remaining = values.astype(np.uint64)
+    for position in range(int(widths.max())):
+        mask = widths > position
+        buffer[ends[mask] - 1 - position] = _ZERO + remaining[mask] % 10
+        remaining //= 10
+    return buffer[:-1].tobytes().decode("ascii")
+
+
+def encode_felts(values: np.ndarray) -> str:
+    """
+    Encode integers as space separated Cairo felts, like `osiris` does with `int_to_felt`.
+
+    Args:
+        values (np.ndarray): The integers to encode.
+
+    Returns:
+        str: The felts joined by spaces.
+    """
+    values = np.ravel(values)
+    if values.dtype.kind == "u":
+        magnitudes = values.astype(np.uint64)
+        return _write_decimals(magnitudes, _digit_count(magnitudes))
+
+    signed = values.astype(np.int64)
+    negative = signed < 0
+    unsigned = signed.view(np.uint64)
+    # Two's complement gives |n| even for the minimum int64
+    magnitudes = np.where(negative, ~unsigned + np.uint64(1), unsigned)
+    if not negative.any():
+        return _write_decimals(magnitudes, _digit_count(magnitudes))
+
+    borrow = negative & (magnitudes > np.uint64(_PRIME_LOW))
+    low = np.where(
+        borrow,
+        np.uint64(10**_LOW_DIGITS) - (magnitudes - np.uint64(_PRIME_LOW)),
+        np.uint64(_PRIME_LOW) - magnitudes,
+    )
+    tokens = np.where(negative, low, magnitudes)
+    widths = np.where(negative, _LOW_DIGITS, _digit_count(magnitudes))
+    prefix_ids = negative.astype(np.int64) + borrow
+    return _write_decimals(tokens, widths, prefix_ids)
+
+
+def _serialize_shape(shape: tuple) -> str:
+    return f"[{' '.join(str(dim) for dim in shape)}]"
+
+
+def _to_fixed_point(values: np.ndarray, fp_impl: str) -> Optional[List[np.ndarray]]:
+    """
+    Convert floats to fixed point (magnitude, sign) pairs the way `osiris.to_fp` does.
+
+    Returns:
+        The magnitudes and signs, None if some value needs the exact Python conversion, like
+        infinities, NaNs or magnitudes that do not fit in 64 bits.
+    """
+    factor = FP_FACTORS[fp_impl]
+    # osiris multiplies numpy scalars by a Python int, follow the same type promotion
+    dtype = np.dtype(type(values[0] * factor))
+    scaled = values.astype(dtype) * dtype.type(factor)
+    if not np.isfinite(scaled).all() or (np.abs(scaled) >= 2.0**64).any():
+        return None
+    magnitudes = np.abs(np.trunc(scaled)).astype(np.uint64)
+    signs = (~(values >= 0)).astype(np.uint64)
+    return [magnitudes, signs]
+
+
+def serialize_tensor(array: np.ndarray, fp_impl: str = "FP16x16") -> str:
+    """
+    Serialize an array as a Cairo tensor, with the same output as
+    `osiris.serializer(osiris.create_tensor_from_array(array, fp_impl))`.
+
+    Floats are converted to FP8x23, FP16x16 or FP32x32 fixed point and integers to felts, anything
+    else goes through osiris.
+
+    Args:
+        array (np.ndarray): The array to serialize.
+        fp_impl (str): The fixed point implementation for floats. Defaults to "FP16x16".
+
+    Returns:
+        str: The serialized tensor.
+    """
+    values = array.flatten()
+    kind = values.dtype.kind
+    if len(values) == 0 and kind in "iuf":
+        return f"{_serialize_shape(array.shape)} []"
+    if kind in "iu":
+        return f"{_serialize_shape(array.shape)} [{encode_felts(values)}]"
+
+    if kind == "f" and values.dtype.itemsize <= 8 and fp_impl in FP_FACTORS:
+        fixed_point = _to_fixed_point(values, fp_impl)
+        if fixed_point is not None:
+            magnitudes, signs = fixed_point
+            tokens = np.empty(2 * len(values), dtype=np.uint64)
+            tokens[0::2] = magnitudes
+            tokens[1::2] = signs
+            body = _write_decimals(tokens, _digit_count(tokens))
+            return f"{_serialize_shape(array.shape)} [{body}]"
+
+    logger.debug(f"Serializing {array.dtype} tensor with osiris")
+    return serializer(create_tensor_from_array(array, fp_impl))
+
+
+def serialize_input(
+    value: np.ndarray, model_category: str, fp_impl: str = "FP16x16"
+) -> str:
+    """
+    Serialize an input of a Cairo prediction request.
+
+    Args:
+        value (np.ndarray): The input array.
+        model_category (str): The category of the model, which can be one of 'ONNX_ORION', 'XGB', or 'LGBM'.
+        fp_impl (str): The fixed point implementation for ONNX_ORION models. Defaults to "FP16x16".
+
+    Returns:
+        str: The serialized input.
+    """
+    if model_category == "ONNX_ORION":
+        return serialize_tensor(value, fp_impl)
+    elif model_category in ["XGB", "LGBM"]:
+        if len(value.shape) != 1:
+            value = value.flatten()
+        scaled = (value * TREE_SCALE).astype(np.int64)
+        return f"[{encode_felts(scaled)}]"
+    else:
+        return serialize_tensor(value, "FP16x16")
+
+
+def _parse_small_ints(tokens: List[str]) -> Optional[np.ndarray]:
+    """
+    Parse decimal tokens in bulk.
+
+    Returns:
+        The int64 values, None if some token is not a plain decimal that fits in an int64.
+    """
+    if len(tokens) == 0 or max(map(len, tokens)) > _MAX_INT64_DIGITS:
+        return None
+    joined = " ".join(tokens)
+    digits = joined.replace(" ", "")
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    return np.fromstring(joined, dtype=np.int64, sep=" ")
+
+
+def _decode_fixed_point(tokens: List[str]) -> Optional[np.ndarray]:
+    """
+    Decode (magnitude, sign) pairs, a sign of `true` means negative.
+    """
+    if len(tokens) % 2 != 0:
+        return None
+    magnitudes = _parse_small_ints(tokens[0::2])
+    if magnitudes is None:
+        return None
+    values = magnitudes / _OUTPUT_FP_FACTOR
+    negative = np.array(tokens[1::2], dtype=object) == "true"
+    return np.where(negative, -values, values)
+
+
+def _decode_elements(tokens: List[str], inner_dtype: str) -> Optional[np.ndarray]:
+    if inner_dtype.startswith("FP"):
+        return _decode_fixed_point(tokens)
+    # Small felts are the integers themselves, large ones are left to osiris
+    return _parse_small_ints(tokens)
+
+
+def _decode_tensor(serialized: str, dtype: str) -> Optional[np.ndarray]:
+    parts = serialized.split("] [")
+    if len(parts) != 2:
+        return None
+    dims = [int(dim) for dim in parts[0][1:].split()]
+    values = _decode_elements(parts[1][:-1].split(), dtype[7:-1])
+    return values.reshape(dims) if values is not None else None
+
+
+def _decode_span(serialized: str, dtype: str) -> Optional[np.ndarray]:
+    return _decode_elements(serialized[1:-1].split(), dtype[5:-1])
+
+
+def _decode_matrix(serialized: str, dtype: str) -> Optional[np.ndarray]:
+    inner_dtype = re.search(r"<(.*)>", dtype).group(1)
+    if not inner_dtype.startswith("FP"):
+        return None
+    parts = serialized.split("} ")
+    if len(parts) != 2:
+        return None
+    content, shape = parts
+    elements = re.findall(r": (.*?)(?=\s\d+: |$)", content)
+    tokens = " ".join(elements).split()
+    if len(tokens) != 2 * len(elements):
+        return None
+    values = _decode_fixed_point(tokens)
+    if values is None:
+        return None
+    return values.reshape(tuple(map(int, shape.split()[-2:])))
+
+
+def _decode_tuple(serialized: str, dtype: str) -> Optional[tuple]:
+    types = dtype[1:-1].split(", ")
+    if len(types) != 2:
+        return None
+    # Same split rules as osiris
+    no_space = re.search(r"]\{", serialized)
+    if no_space:
+        split_index = no_space.start() + 1
+    elif "Tensor" in types[0]:
+        first = serialized.find("]")
+        split_index = serialized.find("]", first + 1) + 1
+        if first < 0 or split_index == 0:
+            return None
+    else:
+        split_index = serialized.find("]") + 2
+    first = _decode(serialized[:split_index].strip(), types[0])
+    second = _decode(serialized[split_index:].strip(), types[1])
+    if first is None or second is None:
+        return None
+    return first, second
+
+
+def _decode(serialized: str, dtype: str) -> Any:
+    """
+    Decode the output types with a fast path, None for everything else.
+    """
+    if dtype.startswith("Tensor<"):
+        return _decode_tensor(serialized, dtype)
+    elif dtype.startswith("MutMatrix<"):
+        return _decode_matrix(serialized, dtype)
+    elif dtype.startswith("Span<"):
+        return _decode_span(serialized, dtype)
+    elif dtype.startswith("("):
+        return _decode_tuple(serialized, dtype)
+    return None
+
+
+def deserialize_response(
+    serialized: str, dtype: str, framework: str = "ONNX_ORION"
+) -> Any:
+    """
+    Deserialize the output of a Cairo model, with the same result as `osiris.deserialize`.
+
+    Tensors, matrices and spans of fixed point or small integers, and tuples of them, are tokenized
+    once and converted with NumPy. Any other output goes through osiris.
+
+    Args:
+        serialized (str): The serialized output.
+        dtype (str): The Cairo data type of the output, e.g. "Tensor<FP16x16>".
+        framework (str): The category of the model, which can be one of 'ONNX_ORION', 'XGB', or 'LGBM'.
+
+    Returns:
+        The deserialized output.
+    """
+    try:
+        result = _decode(serialized, dtype)
+    except (ValueError, AttributeError, IndexError):
+        result = None
+    if result is not None:
+        return result
+    logger.debug(f"Deserializing {dtype} with osiris")
+    return deserialize(serialized, dtype, framework=framework)
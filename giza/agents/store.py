@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from diskcache import Cache
+
+from giza.agents.cache import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+class VerificationStore:
+    """
+    Durable record of the verifiable predictions of the agents, keyed by request id, so their
+    results can be rebuilt after a restart: the inference input and value, the endpoint, the proof
+    job, the proof id, the verification outcome and the timings.
+
+    Records are dictionaries updated field by field as the verification progresses. A record with
+    `verified` set is final, its proof is never verified again. Verified requests can also be
+    found by the hash of their payload, to reuse their proofs.
+
+    Args:
+        directory (Optional[Path]): Where the records are stored. Defaults to `verifications` in the cache directory.
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = Path(directory or get_cache_dir() / "verifications")
+        self._cache = Cache(str(self.directory))
+        self._proofs = Cache(str(self.directory / "proofs"))
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the record of a request.
+
+        Args:
+            request_id (str): The request id.
+
+        Returns:
+            Optional[Dict[str, Any]]: The record, None if the request is unknown.
+        """
+        return self._cache.get(request_id)
+
+    def update(self, request_id: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Set fields of the record of a request, creating it if needed.
+
+        Args:
+            request_id (str): The request id.
+            **fields: The fields to set.
+
+        Returns:
+            Dict[str, Any]: The updated record.
+        """
+        with self._cache.transact():
+            record = self._cache.get(request_id) or {
+                "request_id": request_id,
+                "created_at": time.time(),
+            }
+            record.update(fields, updated_at=time.time())
+            self._cache.set(request_id, record)
+        logger.debug(f"Stored {sorted(fields)} of request {request_id}")
+        return record
+
+    def remember_proof(self, proof_key: str, request_id: str) -> None:
+        """
+        Index a verified request by the hash of its payload.
+
+        Args:
+            proof_key (str): Hash of the payload, the model version and the fixed point implementation.
+            request_id (str): The request id.
+        """
+        self._proofs.set(proof_key, request_id)
+
+    def find_proof(self, proof_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the record of a verified request by the hash of its payload.
+
+        Args:
+            proof_key (str): Hash of the payload, the model version and the fixed point implementation.
+
+        Returns:
+            Optional[Dict[str, Any]]: The record, None if no request with this payload was verified successfully.
+        """
+        request_id = self._proofs.get(proof_key)
+        if request_id is None:
+            return None
+        record = self.get(request_id)
+        if (
+            record is None
+            or not record.get("verified")
+            or not record.get("verification", True)
+        ):
+            return None
+        return record
+
+    def delete(self, request_id: str) -> bool:
+        """
+        Delete the record of a request, True if there was one.
+        """
+        return self._cache.delete(request_id)
+
+    def __contains__(self, request_id: str) -> bool:
+        return request_id in self._cache
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+_stores: Dict[Path, VerificationStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_verification_store() -> VerificationStore:
+    """
+    Get the verification store of the current cache directory.
+    """
+    directory = get_cache_dir() / "verifications"
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = VerificationStore(directory)
+        return store
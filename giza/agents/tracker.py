@@ -0,0 +1,274 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from giza.cli.client import JobsClient
+from giza.cli.schemas.jobs import Job
+from giza.cli.utils.enums import JobKind, JobStatus
+
+from giza.agents.polling import PollSchedule
+
+logger = logging.getLogger(__name__)
+
+
+class TrackedJob:
+    """
+    A job followed by a `ProofTracker`.
+
+    Attributes:
+        job (Job): The last known state of the job.
+        polls (int): Number of times the status of the job was requested.
+        future (Future): Resolved once the job completed and its continuation ran.
+    """
+
+    def __init__(
+        self,
+        job: Job,
+        client: JobsClient,
+        kind: JobKind,
+        schedule: PollSchedule,
+        started: float,
+        deadline: float,
+        then: Optional[Callable[["TrackedJob"], Any]],
+    ) -> None:
+        self.job = job
+        self.client = client
+        self.kind = kind
+        self.schedule = schedule
+        self.started = started
+        self.deadline = deadline
+        self.then = then
+        self.tracked_at = time.time()
+        self.next_poll = self.tracked_at
+        self.polls = 0
+        self.future: Future = Future()
+
+    @property
+    def waited(self) -> float:
+        """
+        Seconds since the job is tracked.
+        """
+        return time.time() - self.tracked_at
+
+    def __repr__(self) -> str:
+        return (
+            f"TrackedJob(id={self.job.id}, kind={self.kind}, status={self.job.status})"
+        )
+
+
+class ProofTracker:
+    """
+    Follow every outstanding job of the process from a single background thread, instead of one
+    polling loop per `AgentResult`.
+
+    The jobs are polled in rounds, every `interval` seconds, each one when its `PollSchedule` says
+    it is due. A round makes at most `max_requests` requests, one small status request per job,
+    so the polling rate and load stay bounded however many jobs are in flight, and the jobs left
+    over are polled first in the next rounds. Listing the jobs of an endpoint is avoided, its
+    response grows with every job the endpoint ever ran. Once a job completes, its continuation,
+    e.g. getting and verifying the proof, runs in a worker thread and its result resolves the
+    future returned by `track`.
+
+    Args:
+        interval (float): Seconds between rounds. Defaults to 1.
+        max_requests (int): Maximum polling requests per round. Defaults to 10.
+        workers (int): Threads running the continuations of the completed jobs. Defaults to 4.
+    """
+
+    def __init__(
+        self, interval: float = 1.0, max_requests: int = 10, workers: int = 4
+    ) -> None:
+        if max_requests < 1:
+            raise ValueError("At least one request per round is needed to poll jobs")
+        self.interval = interval
+        self.max_requests = max_requests
+        self.stats: Dict[str, int] = {"rounds": 0, "requests": 0}
+        self._jobs: Dict[int, TrackedJob] = {}
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="giza-proof"
+        )
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def track(
+        self,
+        job: Job,
+        client: JobsClient,
+        kind: JobKind = JobKind.PROOF,
+        timeout: float = 600,
+        schedule: Optional[PollSchedule] = None,
+        started: Optional[float] = None,
+        then: Optional[Callable[[TrackedJob], Any]] = None,
+    ) -> Future:
+        """
+        Follow a job until it finishes.
+
+        Args:
+            job (Job): The job.
+            client (JobsClient): The client to get the status of the job with.
+            kind (JobKind): The kind of job. Defaults to proof.
+            timeout (float): Seconds to wait for the job. Defaults to 600.
+            schedule (Optional[PollSchedule]): When to poll the job. Defaults to backing off from 1 second.
+            started (Optional[float]): Time the job started, used by the schedule. Defaults to now.
+            then (Optional[Callable[[TrackedJob], Any]]): Run once the job completed, its result resolves the future.
+
+        Returns:
+            Future: Resolved with the result of `then`, or the completed job. It fails with a ValueError
+                if the job failed and a TimeoutError if it did not finish in time.
+
+        Raises:
+            ValueError: If the tracker is closed.
+        """
+        if self._closed:
+            raise ValueError("The proof tracker is closed")
+        tracked = TrackedJob(
+            job=job,
+            client=client,
+            kind=kind,
+            schedule=schedule or PollSchedule(),
+            started=started or time.time(),
+            deadline=time.time() + float(timeout),
+            then=then,
+        )
+        if self._settle(tracked):
+            return tracked.future
+        self._schedule(tracked)
+
+        with self._condition:
+            self._jobs[id(tracked)] = tracked
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="giza-proof-tracker", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        logger.debug(f"Tracking {tracked}")
+        return tracked.future
+
+    def _schedule(self, tracked: TrackedJob) -> None:
+        now = time.time()
+        delay = tracked.schedule.next_delay(now - tracked.started)
+        tracked.next_poll = min(now + delay, tracked.deadline)
+
+    def _settle(self, tracked: TrackedJob) -> bool:
+        """
+        Resolve the future of a job that finished, True if it did.
+        """
+        kind = str(tracked.kind)
+        if tracked.job.status == JobStatus.COMPLETED:
+            logger.info(f"{kind.capitalize()} job {tracked.job.id} completed")
+            self._executor.submit(self._complete, tracked)
+            return True
+        if tracked.job.status == JobStatus.FAILED:
+            logger.error(f"{kind.capitalize()} job {tracked.job.id} failed")
+            try:
+                logger.error(f"Logs: {tracked.client.get_logs(tracked.job.id).logs}")
+            except Exception as e:
+                logger.warning(f"Could not get the logs of job {tracked.job.id}: {e}")
+            self._fail(tracked, ValueError(f"{kind.capitalize()} job failed"))
+            return True
+        if time.time() > tracked.deadline:
+            logger.error(f"{kind.capitalize()} job {tracked.job.id} timed out")
+            self._fail(tracked, TimeoutError(f"{kind.capitalize()} job timed out"))
+            return True
+        return False
+
+    def _fail(self, tracked: TrackedJob, error: Exception) -> None:
+        if tracked.future.set_running_or_notify_cancel():
+            tracked.future.set_exception(error)
+
+    def _complete(self, tracked: TrackedJob) -> None:
+        if not tracked.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = tracked.job if tracked.then is None else tracked.then(tracked)
+        except BaseException as e:
+            tracked.future.set_exception(e)
+        else:
+            tracked.future.set_result(result)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._jobs and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            round_start = time.monotonic()
+            try:
+                self._round()
+            except Exception as e:
+                logger.error(f"Proof tracker round failed: {e}")
+            with self._condition:
+                self._condition.wait(
+                    max(0.0, self.interval - (time.monotonic() - round_start))
+                )
+
+    def _round(self) -> None:
+        now = time.time()
+        with self._condition:
+            tracked = list(self._jobs.values())
+        self.stats["rounds"] += 1
+
+        due: List[TrackedJob] = []
+        for job in tracked:
+            if job.future.cancelled() or self._settle(job):
+                self._untrack(job)
+            elif job.next_poll <= now:
+                due.append(job)
+
+        due.sort(key=lambda job: job.next_poll)
+        if len(due) > self.max_requests:
+            logger.debug(f"Polling budget of the round spent, {len(due)} jobs due")
+        requests = 0
+        for job in due[: self.max_requests]:
+            requests += 1
+            try:
+                job.job = job.client.get(job.job.id, params={"kind": job.kind})
+            except Exception as e:
+                logger.warning(f"Failed to poll job {job.job.id}: {e}")
+            job.polls += 1
+            if self._settle(job):
+                self._untrack(job)
+            else:
+                self._schedule(job)
+        self.stats["requests"] += requests
+
+    def _untrack(self, tracked: TrackedJob) -> None:
+        with self._condition:
+            self._jobs.pop(id(tracked), None)
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._jobs)
+
+    def close(self) -> None:
+        """
+        Stop tracking, the outstanding jobs are cancelled.
+        """
+        with self._condition:
+            self._closed = True
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+            self._condition.notify_all()
+        for tracked in jobs:
+            tracked.future.cancel()
+        self._executor.shutdown(wait=False)
+
+
+_default_tracker: Optional[ProofTracker] = None
+_default_tracker_lock = threading.Lock()
+
+
+def get_proof_tracker() -> ProofTracker:
+    """
+    Get the process wide proof tracker.
+    """
+    global _default_tracker
+    with _default_tracker_lock:
+        if _default_tracker is None:
+            _default_tracker = ProofTracker()
+        return _default_tracker
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
 from unittest.mock import Mock, patch
 
 import pytest
@@ -8,6 +12,10 @@ from giza.cli.schemas.proofs import Proof
 from giza.cli.schemas.verify import VerifyResponse
 
 from giza.agents import AgentResult, ContractHandler, GizaAgent
+from giza.agents.cache import PredictionCache
+from giza.agents.registry import ModelRegistry
+from giza.agents.store import VerificationStore
+from giza.agents.tracker import ProofTracker
 
 
 class EndpointsClientStub:
@@ -61,6 +69,16 @@ def parser(*args, **kwargs):
     return "dummy_network"
 
 
+def _set_model_state(agent, endpoint_id):
+    """
+    Set what the patched `GizaModel.__init__` would for a version served by one endpoint.
+    """
+    agent.endpoint_id = endpoint_id
+    agent._balancer = None
+    agent._served_by = OrderedDict()
+    agent._served_by_lock = threading.Lock()
+
+
 # TODO: find a way to test the agent better than patching the __init__ method
 @patch("giza.agents.agent.GizaAgent._check_or_create_account")
 @patch("giza.agents.agent.GizaAgent._retrieve_agent_info")
@@ -89,6 +107,30 @@ def test_agent_init(mock_check, mock_agent, mock_check_passphrase_in_env, mock_i
     mock_agent.assert_called_once()
 
 
+@patch("giza.agents.agent.GizaAgent._check_or_create_account")
+@patch("giza.agents.agent.GizaAgent._retrieve_agent_info")
+@patch("giza.agents.agent.GizaAgent._check_passphrase_in_env")
+@patch("giza.agents.model.GizaModel.__init__")
+def test_agent_init_with_prediction_cache(mock_init_, *args):
+    prediction_cache = PredictionCache()
+    registry = ModelRegistry()
+
+    GizaAgent(
+        id=1,
+        version_id=1,
+        contracts={"contract": "0x17807a00bE76716B91d5ba1232dd1647c4414912"},
+        chain="ethereum:sepolia:geth",
+        account="test",
+        network_parser=parser,
+        prediction_cache=prediction_cache,
+        registry=registry,
+    )
+
+    mock_init_.assert_called_once_with(
+        id=1, version=1, prediction_cache=prediction_cache, registry=registry
+    )
+
+
 @patch("giza.agents.agent.GizaAgent._retrieve_agent_info")
 @patch("giza.agents.model.GizaModel.__init__")
 def test_agent_init_with_check_succesful_raise(mock_info, mock_init_):
@@ -191,7 +233,7 @@ def test_agent_predict(
         chain="ethereum:local:test",
         account="test",
     )
-    agent.endpoint_id = 1
+    _set_model_state(agent, endpoint_id=1)
 
     result = agent.predict(input_feed={"image": [1]}, verifiable=True)
 
@@ -204,6 +246,120 @@ def test_agent_predict(
     mock_info.assert_called_once()
 
 
+@patch("giza.agents.agent.GizaAgent._check_or_create_account")
+@patch("giza.agents.agent.GizaAgent._retrieve_agent_info")
+@patch("giza.agents.model.GizaModel.__init__")
+@patch("giza.agents.model.GizaModel.predict", return_value=([1], "123"))
+@patch(
+    "giza.agents.model.GizaModel._prepare_verifiable_payload",
+    side_effect=lambda input_file, input_feed, **kwargs: {
+        "job_size": kwargs["job_size"],
+        "args": str(input_feed["image"]),
+    },
+)
+@patch.dict("os.environ", {"TEST_PASSPHRASE": "test"})
+def test_agent_predict_reuses_verified_proofs(
+    mock_payload: Mock,
+    mock_predict: Mock,
+    mock_init_: Mock,
+    mock_info: Mock,
+    mock_check: Mock,
+    tmp_path,
+):
+    tracker = ProofTracker(interval=0.01)
+    agent = GizaAgent(
+        id=1,
+        version_id=1,
+        contracts={"contract": "0x17807a00bE76716B91d5ba1232dd1647c4414912"},
+        chain="ethereum:local:test",
+        account="test",
+        verification_store=VerificationStore(tmp_path),
+        proof_tracker=tracker,
+        reuse_proofs=True,
+    )
+    agent.framework = "CAIRO"
+    agent.model_id = 1
+    agent.version_id = 2
+    _set_model_state(agent, endpoint_id=3)
+    clients = {
+        "endpoint_client": EndpointsClientStub(),
+        "jobs_client": JobsClientStub(),
+    }
+
+    first = agent.predict(input_feed={"image": [1]}, verifiable=True, **clients)
+    assert first.value == [1]
+
+    # Same payload, whatever the job size: the verified result is reused
+    reused = agent.predict(
+        input_feed={"image": [1]}, verifiable=True, job_size="S", **clients
+    )
+    assert reused.request_id == "123"
+    assert reused.verified is True
+    assert reused.value == [1]
+    assert mock_predict.call_count == 1
+    # The payload is formatted once, and passed on to the model on a miss
+    assert mock_payload.call_count == 2
+    assert mock_predict.call_args.kwargs["payload"] == {
+        "job_size": "M",
+        "args": "[1]",
+    }
+
+    # Another payload, output dtype, or reuse disabled, predicts again
+    agent.predict(input_feed={"image": [2]}, verifiable=True, **clients)
+    agent.predict(
+        input_feed={"image": [1]}, verifiable=True, reuse_proof=False, **clients
+    )
+    agent.predict(
+        input_feed={"image": [1]},
+        verifiable=True,
+        custom_output_dtype="Tensor<FP16x16>",
+        **clients,
+    )
+    assert mock_predict.call_count == 4
+    # Only reused on the endpoints serving the model
+    agent.endpoint_id = 4
+    agent.predict(input_feed={"image": [1]}, verifiable=True, **clients)
+    assert mock_predict.call_count == 5
+    tracker.close()
+
+
+@patch("giza.agents.agent.GizaAgent._check_or_create_account")
+@patch("giza.agents.agent.GizaAgent._retrieve_agent_info")
+@patch("giza.agents.model.GizaModel.__init__")
+@patch("giza.agents.model.GizaModel.predict", return_value=([1], None))
+@patch.dict("os.environ", {"TEST_PASSPHRASE": "test"})
+def test_agent_apredict_emulated(
+    mock_predict: Mock, mock_init_: Mock, mock_info: Mock, mock_check: Mock
+):
+    agent = GizaAgent(
+        id=1,
+        version_id=1,
+        contracts={"contract": "0x17807a00bE76716B91d5ba1232dd1647c4414912"},
+        chain="ethereum:local:test",
+        account="test",
+    )
+    agent.framework = "CAIRO"
+    agent.model_id = 1
+    agent.version_id = 2
+    _set_model_state(agent, endpoint_id=1)
+
+    result = asyncio.run(
+        agent.apredict(input_feed={"image": [1]}, verifiable=True, emulate=True)
+    )
+
+    # The model prediction is wrapped once, as a dry run
+    assert isinstance(result, AgentResult)
+    assert result.verified is False
+    assert result.value == [1]
+    assert mock_predict.call_args.kwargs["emulate"] is True
+
+    mock_predict.return_value = [2]
+    with patch("giza.agents.agent.logger") as mock_logger:
+        assert asyncio.run(agent.apredict(input_feed={"image": [1]})) == [2]
+    mock_logger.warning.assert_called_once()
+    assert mock_predict.call_count == 2
+
+
 def test_agentresult_init():
     result = AgentResult(
         input=[],
@@ -366,6 +522,202 @@ def test_agentresult__wait_for_poll_job(mock_sleep):
     mock_sleep.assert_called_once_with(0.1)
 
 
+@patch("giza.agents.agent.time.sleep")
+def test_agentresult__wait_for_adaptive_poll(mock_sleep, tmp_path, monkeypatch):
+    monkeypatch.setenv("GIZA_AGENTS_CACHE_DIR", str(tmp_path))
+    result = AgentResult(
+        input=[],
+        result=[1],
+        request_id="123",
+        agent=Mock(model_id=1, version_id=2),
+        endpoint_client=EndpointsClientStub(),
+        max_poll_interval=5.0,
+    )
+    jobs_client = Mock()
+    jobs_client.get.side_effect = [
+        Job(id=1, size="S", status="PROCESSING"),
+        Job(id=1, size="S", status="COMPLETED", elapsed_time=42.0),
+    ]
+
+    result._wait_for(
+        job=Job(id=1, size="S", status="PROCESSING"),
+        client=jobs_client,
+        kind="proof",
+    )
+
+    # No history yet, polls back off from the minimum interval
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    assert len(delays) == 2
+    assert 0.9 <= delays[0] <= 1.1
+    assert delays[1] > delays[0]
+    assert result.latencies["proof"]["duration"] == 42.0
+    assert result.latencies["proof"]["polls"] == 2
+    assert result.latencies["proof"]["history"]["count"] == 1
+
+    # The next job of the same size is expected to take as long
+    schedule = result._poll_schedule(Job(id=2, size="S", status="PROCESSING"), "proof")
+    assert schedule.expected == 42.0
+    assert schedule.max_interval == 5.0
+
+
+def test_agentresult_verifies_with_proof_tracker(tmp_path, monkeypatch):
+    monkeypatch.setenv("GIZA_AGENTS_CACHE_DIR", str(tmp_path))
+    tracker = ProofTracker(interval=0.01)
+    result = AgentResult(
+        input=[],
+        result=[1],
+        request_id="123",
+        agent=Mock(model_id=1, version_id=2),
+        endpoint_client=EndpointsClientStub(),
+        jobs_client=JobsClientStub(),
+        proof_tracker=tracker,
+        min_poll_interval=0.01,
+        verify_eagerly=False,
+    )
+    result._proof_job = Job(id=1, size="S", status="PROCESSING", request_id="123")
+
+    assert result.track() is result.track()
+    assert result.value == [1]
+    assert result.verified is True
+    assert result._proof.id == 1
+    assert result.latencies["proof"]["polls"] == 1
+    tracker.close()
+
+
+class SlowJobsClientStub(JobsClientStub):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = threading.Event()
+
+    def get(self, *args, **kwargs):
+        self.release.wait(5)
+        return super().get(*args, **kwargs)
+
+
+def test_agentresult_verifies_eagerly_in_background(tmp_path, monkeypatch):
+    monkeypatch.setenv("GIZA_AGENTS_CACHE_DIR", str(tmp_path))
+    tracker = ProofTracker(interval=0.01)
+    jobs_client = SlowJobsClientStub()
+    endpoint_client = EndpointsClientStub()
+    endpoint_client.list_jobs = lambda *args, **kwargs: JobList(
+        root=[Job(id=7, size="S", status="PROCESSING", request_id="456")]
+    )
+    result = AgentResult(
+        input=[],
+        result=[1],
+        request_id="456",
+        agent=Mock(model_id=1, version_id=2),
+        endpoint_client=endpoint_client,
+        jobs_client=jobs_client,
+        proof_tracker=tracker,
+        min_poll_interval=0.01,
+    )
+
+    # Created without blocking, the verification runs in the background
+    assert result.future is result.track()
+    assert not result.future.done()
+    assert result.verified is False
+
+    async def decide():
+        value = asyncio.ensure_future(result.value_async())
+        await asyncio.sleep(0)
+        jobs_client.release.set()
+        return await value
+
+    assert asyncio.run(decide()) == [1]
+    assert result.verified is True
+    assert result.value == [1]
+    tracker.close()
+
+
+def test_agentresult_dry_run_future():
+    result = AgentResult(
+        input=[],
+        result=[1],
+        request_id="123",
+        agent=Mock(),
+        endpoint_client=EndpointsClientStub(),
+        dry_run=True,
+    )
+
+    assert result.future.result() == [1]
+    assert result.verified is True
+
+
+def test_agentresult_restored_from_store(tmp_path):
+    store = VerificationStore(tmp_path)
+    agent = Mock(model_id=1, version_id=2, endpoint_id=3)
+    endpoint_client = EndpointsClientStub()
+    endpoint_client.verify_proof = Mock(wraps=endpoint_client.verify_proof)
+
+    result = AgentResult(
+        input=[],
+        result=[1],
+        request_id="123",
+        agent=agent,
+        endpoint_client=endpoint_client,
+        jobs_client=JobsClientStub(),
+        store=store,
+    )
+    assert store.get("123")["job"]["id"] == 1
+    assert store.get("123")["endpoint_id"] == 3
+
+    # Restarted while the proof is pending, the verification resumes
+    restored = AgentResult.from_store(
+        "123",
+        agent=agent,
+        store=store,
+        endpoint_client=endpoint_client,
+        jobs_client=JobsClientStub(),
+    )
+    assert restored.verified is False
+    assert restored.value == [1]
+    record = store.get("123")
+    assert record["verified"] is True
+    assert record["proof_id"] == 1
+    assert endpoint_client.verify_proof.call_count == 1
+
+    # Once verified, it is never verified again
+    verified = AgentResult.from_store(
+        "123", agent=agent, store=store, endpoint_client=endpoint_client
+    )
+    assert verified.verified is True
+    assert verified._proof.id == 1
+    assert verified.value == [1]
+    assert verified.future.result() == [1]
+    assert endpoint_client.verify_proof.call_count == 1
+    assert result.verified is False
+
+    with pytest.raises(ValueError):
+        AgentResult.from_store("456", agent=agent, store=store)
+
+
+def test_agentresult_restored_keeps_creation_time(tmp_path):
+    store = VerificationStore(tmp_path)
+    agent = Mock(model_id=1, version_id=2, endpoint_id=3)
+    AgentResult(
+        input=[],
+        result=[1],
+        request_id="123",
+        agent=agent,
+        endpoint_client=EndpointsClientStub(),
+        store=store,
+    )
+    created_at = store.update("123", created_at=time.time() - 300)["created_at"]
+
+    # The pending proof job is polled as the old job it is, not as a new one
+    tracker = Mock()
+    restored = AgentResult.from_store(
+        "123",
+        agent=agent,
+        store=store,
+        endpoint_client=EndpointsClientStub(),
+        proof_tracker=tracker,
+    )
+    assert restored._created_at == created_at
+    assert tracker.track.call_args.kwargs["started"] == created_at
+
+
 def test_contract_handler_init():
     handler = ContractHandler(
         contracts={"contract": "0x17807a00bE76716B91d5ba1232dd1647c4414912"}
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+import pytest
+
+from giza.agents.balancing import EndpointBalancer, Replica
+
+
+def _replicas(count):
+    return [Replica(i, f"https://endpoint-{i}.test/cairo_run") for i in range(count)]
+
+
+def test_round_robin():
+    balancer = EndpointBalancer(_replicas(3))
+
+    picked = []
+    for _ in range(6):
+        replica = balancer.acquire()
+        balancer.release(replica)
+        picked.append(replica.endpoint_id)
+
+    assert picked == [0, 1, 2, 0, 1, 2]
+
+
+def test_least_outstanding():
+    balancer = EndpointBalancer(_replicas(3), strategy="least_outstanding")
+
+    busy = [balancer.acquire(), balancer.acquire()]
+    idle = balancer.acquire()
+
+    assert {r.endpoint_id for r in busy + [idle]} == {0, 1, 2}
+    balancer.release(busy[0])
+    assert balancer.acquire() is busy[0]
+
+
+@patch("giza.agents.balancing.time.monotonic")
+def test_failed_endpoint_out_of_rotation(monotonic):
+    monotonic.return_value = 100.0
+    replicas = _replicas(2)
+    balancer = EndpointBalancer(replicas, cooldown=10)
+
+    balancer.release(balancer.acquire(exclude=[replicas[1]]), ok=False)
+
+    assert balancer.healthy() == [replicas[1]]
+    assert {balancer.acquire().endpoint_id for _ in range(4)} == {1}
+
+    # Back in rotation after the cooldown, out for twice as long if it fails again
+    monotonic.return_value = 111.0
+    assert balancer.healthy() == replicas
+    balancer.release(replicas[0], ok=False)
+    assert replicas[0].unhealthy_until == 131.0
+    balancer.release(replicas[0], ok=True)
+    assert balancer.healthy() == replicas
+
+
+def test_all_endpoints_unhealthy():
+    replicas = _replicas(2)
+    balancer = EndpointBalancer(replicas, cooldown=10)
+    balancer.release(balancer.acquire(), ok=False)
+    balancer.release(balancer.acquire(), ok=False)
+
+    assert balancer.healthy() == []
+    # The endpoint that comes back first is still tried
+    assert balancer.acquire() is replicas[0]
+
+
+def test_invalid_balancer():
+    with pytest.raises(ValueError):
+        EndpointBalancer([])
+    with pytest.raises(ValueError):
+        EndpointBalancer(_replicas(1), strategy="random")
+
+
+def test_release_without_outcome_keeps_health():
+    balancer = EndpointBalancer([Replica(1, "a")], cooldown=30)
+    replica = balancer.acquire()
+    balancer.release(replica, ok=False)
+
+    replica = balancer.acquire()
+    balancer.release(replica, ok=None)
+
+    assert replica.outstanding == 0
+    assert replica.failures == 1
+    assert balancer.healthy() == []
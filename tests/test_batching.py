@@ -0,0 +1,191 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from giza.agents.batching import MicroBatcher, run_batch, stack_input_feeds
+from giza.agents.instrumentation import add_prediction_hook, remove_prediction_hook
+from giza.agents.model import GizaModel
+
+
+@pytest.fixture
+def model(linear_model_factory):
+    return GizaModel(model_path=linear_model_factory())
+
+
+def _feed(rows, seed):
+    rng = np.random.default_rng(seed)
+    return {"X": rng.random((rows, 3), dtype=np.float32)}
+
+
+def test_stack_input_feeds(model):
+    stacked, sizes = stack_input_feeds(model.session, [_feed(1, 0), _feed(3, 1)])
+
+    assert stacked["X"].shape == (4, 3)
+    assert sizes == [1, 3]
+
+
+def test_predict_batch_matches_predict(model):
+    feeds = [_feed(rows, seed) for seed, rows in enumerate([1, 2, 1, 4])]
+
+    results = model.predict_batch(feeds)
+
+    for feed, result in zip(feeds, results):
+        expected, _ = model.predict(input_feed=feed)
+        assert np.allclose(result, expected)
+
+
+def test_run_batch_fixed_batch_dimension(linear_model_factory):
+    model = GizaModel(model_path=linear_model_factory(batch_dim=1))
+    feeds = [_feed(1, 0), _feed(1, 1)]
+
+    results = run_batch(model.session, feeds)
+
+    assert len(results) == 2
+    assert np.allclose(results[1][0], model.session.run(None, feeds[1])[0])
+
+
+def test_micro_batcher_groups_concurrent_requests(model):
+    feeds = [_feed(1, seed) for seed in range(64)]
+    batcher = MicroBatcher(model.session, max_batch_size=16, max_wait_ms=20)
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(batcher.predict, feeds))
+    batcher.close()
+
+    for feed, outputs in zip(feeds, results):
+        assert np.allclose(outputs[0], model.session.run(None, feed)[0])
+    stats = batcher.stats.as_dict()
+    assert stats["requests"] == 64
+    assert stats["rows"] == 64
+    assert stats["batches"] < 64
+    assert stats["max_batch_size"] <= 16
+
+
+def test_micro_batcher_close_while_submitting(model):
+    batcher = MicroBatcher(model.session, max_batch_size=4, max_wait_ms=1)
+    futures = []
+
+    def submit():
+        for seed in range(200):
+            try:
+                futures.append(batcher.submit(_feed(1, seed)))
+            except RuntimeError:
+                return
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    time.sleep(0.005)
+    batcher.close()
+    thread.join()
+
+    # Every request accepted before closing is run, none is left hanging
+    for future in futures:
+        assert len(future.result(timeout=1)) == 1
+    with pytest.raises(RuntimeError):
+        batcher.submit(_feed(1, 0))
+
+
+def test_micro_batching_through_predict(model):
+    model.enable_micro_batching(max_batch_size=8, max_wait_ms=1)
+    feed = _feed(2, 3)
+
+    preds, request_id = model.predict(input_feed=feed)
+
+    assert request_id is None
+    assert np.allclose(preds, model.session.run(None, feed)[0])
+    assert model.batch_stats["requests"] == 1
+    model.disable_micro_batching()
+    assert model.batch_stats is None
+
+
+@pytest.mark.parametrize("batch_size", [1, 3])
+def test_predict_stream_keeps_order(model, batch_size):
+    feeds = [_feed(1, seed) for seed in range(10)]
+
+    results = list(
+        model.predict_stream(iter(feeds), max_in_flight=3, batch_size=batch_size)
+    )
+
+    assert len(results) == 10
+    for feed, (preds, request_id) in zip(feeds, results):
+        assert request_id is None
+        assert np.allclose(preds, model.session.run(None, feed)[0])
+
+
+def test_predict_stream_batched_backpressure(model):
+    read = []
+
+    def feeds():
+        for seed in range(100):
+            read.append(seed)
+            yield _feed(1, seed)
+
+    stream = model.predict_stream(feeds(), max_in_flight=2, batch_size=3)
+    next(stream)
+    assert len(read) == 6
+    stream.close()
+
+
+def test_predict_stream_batches_through_cache_and_hooks(model):
+    feeds = [_feed(1, seed) for seed in range(6)]
+    model.enable_prediction_cache(max_entries=16)
+    traces = []
+
+    add_prediction_hook(traces.append)
+    try:
+        list(model.predict_stream(iter(feeds[:3]), batch_size=3))
+        with patch.object(model, "_session", wraps=model.session) as session:
+            results = list(model.predict_stream(iter(feeds), batch_size=3))
+    finally:
+        remove_prediction_hook(traces.append)
+
+    for feed, (preds, _) in zip(feeds, results):
+        assert np.allclose(preds, model.session.run(None, feed)[0])
+    # Only the feeds of the second batch are run, the first batch is cached
+    assert session.run.call_count == 1
+    assert model.prediction_cache_stats["hits"] == 3
+    assert [trace.kind for trace in traces] == ["batch"] * 3
+    assert sum("run" in trace.phases for trace in traces) == 2
+
+
+def test_predict_batch_through_process_pool(model):
+    feeds = [_feed(1, seed) for seed in range(3)]
+    model._pool = Mock()
+    model._pool.map.side_effect = lambda feeds: (
+        model.session.run(None, feed) for feed in feeds
+    )
+
+    results = list(model.predict_stream(iter(feeds), batch_size=3))
+
+    model._pool.map.assert_called_once()
+    for feed, (preds, _) in zip(feeds, results):
+        assert np.allclose(preds, model.session.run(None, feed)[0])
+
+
+def test_predict_stream_backpressure(model):
+    read = []
+
+    def feeds():
+        for seed in range(100):
+            read.append(seed)
+            yield _feed(1, seed)
+
+    def slow_predict(input_feed, **kwargs):
+        time.sleep(0.01)
+        return (input_feed["X"], "request")
+
+    with patch.object(model, "predict", side_effect=slow_predict) as predict:
+        stream = model.predict_stream(feeds(), max_in_flight=4, verifiable=True)
+        first, request_id = next(stream)
+        # No feed is read beyond the predictions in flight
+        assert len(read) == 4
+        stream.close()
+
+    assert request_id == "request"
+    assert np.array_equal(first, _feed(1, 0)["X"])
+    assert predict.call_args.kwargs["verifiable"] is True
+    assert predict.call_count == 4
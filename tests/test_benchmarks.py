@@ -0,0 +1,43 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).parent.parent / "benchmarks"
+
+
+def test_bench_model_runs_offline(tmp_path):
+    output = tmp_path / "results.json"
+
+    subprocess.run(
+        [
+            sys.executable,
+            str(BENCHMARKS / "bench_model.py"),
+            "--sizes",
+            "4",
+            "--iterations",
+            "3",
+            "--repeat",
+            "1",
+            "--batch-size",
+            "2",
+            "--output",
+            str(output),
+        ],
+        check=True,
+        cwd=tmp_path,
+    )
+
+    report = json.loads(output.read_text())
+    results = report["results"]
+    assert report["config"]["sizes"] == [4]
+    assert set(results["init"]["4"]) == {"cold", "warm"}
+    assert results["local"]["4"]["predictions_per_second"] > 0
+    assert results["verifiable"]["4"]["total_seconds"]["count"] == 3
+    assert results["verifiable"]["4"]["server_seconds"]["count"] == 3
+    assert set(results["serialization"]["4"]) == {
+        "serialize_seconds",
+        "deserialize_seconds",
+    }
+    # One warm up prediction before the measured ones
+    assert results["stub_requests"]["predict"] == 4
@@ -0,0 +1,142 @@
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+from giza.agents.cache import ArtifactCache, PredictionCache, file_sha256
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(directory=tmp_path / "artifacts", max_size=100)
+
+
+def _put(cache, model_id, version_id, data):
+    source = cache.partial_path(model_id, version_id)
+    source.write_bytes(data)
+    return cache.put(model_id, version_id, source)
+
+
+def test_put_is_content_addressed(cache):
+    path = _put(cache, 1, 2, b"model")
+
+    assert path.name == f"{hashlib.sha256(b'model').hexdigest()}.onnx"
+    assert path.read_bytes() == b"model"
+    assert cache.get(1, 2) == path
+    assert cache.get(1, 3) is None
+    assert cache.size == 5
+
+
+def test_put_replaces_previous_artifact(cache):
+    first = _put(cache, 1, 2, b"first")
+    second = _put(cache, 1, 2, b"second")
+
+    assert cache.get(1, 2) == second
+    assert not first.exists()
+
+
+def test_corrupted_artifact_is_dropped(cache):
+    path = _put(cache, 1, 2, b"model")
+
+    path.write_bytes(b"other")
+    assert cache.get(1, 2, verify=True) is None
+
+    path.write_bytes(b"truncated model")
+    assert cache.get(1, 2) is None
+
+
+def test_least_recently_used_artifacts_are_evicted(cache):
+    first = _put(cache, 1, 1, b"a" * 40)
+    second = _put(cache, 1, 2, b"b" * 40)
+    # Touch the first one so the second becomes the least recently used
+    os.utime(first)
+    assert cache.get(1, 1) == first
+
+    third = _put(cache, 1, 3, b"c" * 40)
+
+    assert cache.get(1, 1) == first
+    assert cache.get(1, 2) is None
+    assert not second.exists()
+    assert cache.get(1, 3) == third
+    assert cache.size == 80
+
+
+def test_prewarmed_artifacts_are_used_in_place(tmp_path):
+    prewarmed = tmp_path / "prewarmed" / "1" / "2"
+    prewarmed.mkdir(parents=True)
+    path = prewarmed / f"{hashlib.sha256(b'model').hexdigest()}.onnx"
+    path.write_bytes(b"model")
+    (prewarmed / "0000.onnx").write_bytes(b"corrupted")
+
+    cache = ArtifactCache(
+        directory=tmp_path / "artifacts", prewarmed_dirs=[tmp_path / "prewarmed"]
+    )
+
+    assert cache.get(1, 2) == path
+    assert file_sha256(path) == hashlib.sha256(b"model").hexdigest()
+    assert cache.size == 0
+    cache.remove(1, 2)
+    assert path.exists()
+
+
+def test_cache_is_shared_between_instances(tmp_path):
+    path = _put(ArtifactCache(directory=tmp_path / "artifacts"), 1, 2, b"model")
+
+    assert ArtifactCache(directory=tmp_path / "artifacts").get(1, 2) == path
+
+
+def test_prediction_cache_hits_and_evictions():
+    predictions = PredictionCache(max_entries=2)
+    feeds = [{"x": np.full((2, 3), i, dtype=np.float32)} for i in range(3)]
+    keys = [PredictionCache.key("model:1", feed) for feed in feeds]
+
+    assert predictions.get(keys[0]) is None
+    for key, feed in zip(keys, feeds):
+        predictions.put(key, feed["x"] * 2)
+    result = predictions.get(keys[2])
+    result[0, 0] = -1
+
+    assert predictions.get(keys[0]) is None
+    assert np.array_equal(predictions.get(keys[2]), feeds[2]["x"] * 2)
+    assert predictions.stats == {
+        "hits": 2,
+        "misses": 2,
+        "evictions": 1,
+        "hit_rate": 0.5,
+        "entries": 2,
+        "bytes": 48,
+    }
+
+
+def test_prediction_cache_size_and_ttl_bounds(monkeypatch):
+    predictions = PredictionCache(max_bytes=100, ttl=10)
+    now = [0.0]
+    monkeypatch.setattr("giza.agents.cache.time.monotonic", lambda: now[0])
+
+    predictions.put("small", np.zeros(10, dtype=np.float32))
+    predictions.put("too big", np.zeros(100, dtype=np.float32))
+    assert predictions.get("too big") is None
+    assert predictions.get("small") is not None
+
+    now[0] = 11.0
+    assert predictions.get("small") is None
+    assert predictions.stats["bytes"] == 0
+
+
+def test_prediction_cache_key():
+    x = np.arange(6, dtype=np.float32)
+
+    assert PredictionCache.key("m", {"x": x}) == PredictionCache.key(
+        "m", {"x": x.copy()}
+    )
+    assert PredictionCache.key("m", {"x": x}) != PredictionCache.key("other", {"x": x})
+    assert PredictionCache.key("m", {"x": x}) != PredictionCache.key(
+        "m", {"x": x.reshape(2, 3)}
+    )
+    assert PredictionCache.key("m", {"x": x}) != PredictionCache.key(
+        "m", {"x": x.astype(np.float64)}
+    )
+    assert PredictionCache.key("m", {"x": x[::2]}) == PredictionCache.key(
+        "m", {"x": np.array([0, 2, 4], dtype=np.float32)}
+    )
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from giza.agents.concurrency import SingleFlight, payload_key
+
+
+def test_payload_key_is_stable():
+    first = payload_key("https://endpoint.test", {"job_size": "M", "args": "[1] [2 0]"})
+    second = payload_key(
+        "https://endpoint.test", {"args": "[1] [2 0]", "job_size": "M"}
+    )
+
+    assert first == second
+    assert first != payload_key(
+        "https://other.test", {"job_size": "M", "args": "[1] [2 0]"}
+    )
+    assert payload_key("u", {"input_data": [np.arange(3)]}) == payload_key(
+        "u", {"input_data": [[0, 1, 2]]}
+    )
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        return {"request_id": "123"}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, "key", call) for _ in range(4)]
+        while flight.in_flight() == 0:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == {"request_id": "123"} for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "key", failing)
+        started.wait(5)
+        follower = executor.submit(flight.do, "key", failing)
+        time.sleep(0.05)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert flight.do("key", lambda: "again") == "again"
+
+
+def test_async_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*[flight.ado("key", call) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_hands_over_to_followers():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.ado("key", call))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.ado("key", call)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    # Only the cancelled caller sees the cancellation, one follower calls again
+    assert asyncio.run(run()) == ["result"] * 3
+    assert len(calls) == 2
+
+
+def test_cancelled_follower_does_not_cancel_the_call():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.ado("key", call))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.ado("key", call)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        followers[0].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await followers[0]
+        return await asyncio.gather(leader, followers[1])
+
+    assert asyncio.run(run()) == ["result"] * 2
+    assert flight.in_flight() == 0
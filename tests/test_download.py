@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from giza.agents.download import stream_download
+
+CONTENT = bytes(range(256)) * 4096
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.ranges.append(self.headers.get("Range"))
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(CONTENT)}")
+                self.send_header("Content-Length", "0")
+                self.send_header("x-goog-hash", f"md5={server.md5}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(CONTENT) - start))
+        self.send_header("x-goog-hash", f"crc32c=AAAAAA==,md5={server.md5}")
+        self.end_headers()
+        body = CONTENT[start:]
+        if server.interruptions > 0:
+            # Send half of the body then drop the connection
+            server.interruptions -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.ranges = []
+    server.interruptions = 0
+    server.md5 = base64.b64encode(hashlib.md5(CONTENT).digest()).decode()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/model"
+
+
+def test_stream_download(server, tmp_path):
+    progress = []
+
+    digest = stream_download(
+        _url(server),
+        tmp_path / "model.onnx",
+        chunk_size=65536,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+
+    assert digest == hashlib.sha256(CONTENT).hexdigest()
+    assert (tmp_path / "model.onnx").read_bytes() == CONTENT
+    assert progress[-1] == (len(CONTENT), len(CONTENT))
+    assert server.ranges == [None]
+
+
+def test_stream_download_resumes_after_interruption(server, tmp_path):
+    server.interruptions = 1
+
+    digest = stream_download(
+        _url(server), tmp_path / "model.onnx", chunk_size=4096, backoff=0
+    )
+
+    assert digest == hashlib.sha256(CONTENT).hexdigest()
+    assert (tmp_path / "model.onnx").read_bytes() == CONTENT
+    assert server.ranges[0] is None
+    assert server.ranges[1].startswith("bytes=")
+
+
+def test_stream_download_resumes_partial_file(server, tmp_path):
+    destination = tmp_path / "model.onnx"
+    destination.write_bytes(CONTENT[:1000])
+
+    stream_download(_url(server), destination)
+
+    assert destination.read_bytes() == CONTENT
+    assert server.ranges == ["bytes=1000-"]
+
+
+def test_stream_download_complete_partial_file(server, tmp_path):
+    destination = tmp_path / "model.onnx"
+    destination.write_bytes(CONTENT)
+
+    # Known to be whole from its digest, nothing is requested
+    digest = stream_download(
+        _url(server), destination, expected_sha256=hashlib.sha256(CONTENT).hexdigest()
+    )
+    assert digest == hashlib.sha256(CONTENT).hexdigest()
+    assert server.ranges == []
+
+    # Otherwise the server reports the range past the end, the file is kept
+    assert stream_download(_url(server), destination) == digest
+    assert destination.read_bytes() == CONTENT
+    assert server.ranges == [f"bytes={len(CONTENT)}-"]
+
+
+def test_stream_download_closes_its_session(server, tmp_path):
+    close = requests.Session.close
+    with patch.object(
+        requests.Session, "close", autospec=True, side_effect=close
+    ) as mock_close:
+        stream_download(_url(server), tmp_path / "model.onnx")
+
+    mock_close.assert_called_once()
+
+
+def test_stream_download_checksum_mismatch(server, tmp_path):
+    server.md5 = base64.b64encode(hashlib.md5(b"other").digest()).decode()
+
+    with pytest.raises(ValueError):
+        stream_download(_url(server), tmp_path / "model.onnx")
+
+    assert not (tmp_path / "model.onnx").exists()
+
+    server.md5 = base64.b64encode(hashlib.md5(CONTENT).digest()).decode()
+    with pytest.raises(ValueError):
+        stream_download(_url(server), tmp_path / "model.onnx", expected_sha256="0")
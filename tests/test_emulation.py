@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from osiris.app import deserialize
+
+from giza.agents.emulation import emulate_response, fp_factor, quantize_inputs
+from giza.agents.model import GizaModel
+
+_rng = np.random.default_rng(0)
+
+
+def _fixed_point(values):
+    # As the Cairo programs write FP16x16 results
+    return " ".join(
+        f"{abs(int(v * 2**16))} {'true' if v < 0 else 'false'}" for v in values
+    )
+
+
+def _assert_same(result, expected):
+    if isinstance(expected, tuple):
+        assert isinstance(result, tuple) and len(result) == len(expected)
+        for part, expected_part in zip(result, expected):
+            _assert_same(part, expected_part)
+    else:
+        assert result.dtype == expected.dtype
+        assert result.shape == expected.shape
+        assert np.array_equal(result, expected)
+
+
+_values = _rng.normal(size=(3, 4)) * 100
+_labels = np.array([1, 0, 2], dtype=np.int64)
+
+CASES = [
+    ([_values], f"[3 4] [{_fixed_point(_values.flatten())}]", "Tensor<FP16x16>"),
+    ([_labels.reshape(3, 1)], "[3 1] [1 0 2]", "Tensor<i32>"),
+    ([_values[0]], f"[{_fixed_point(_values[0])}]", "Span<FP16x16>"),
+    (
+        [_values[:2, :3]],
+        "{"
+        + " ".join(
+            f"{i}: {_fixed_point([v])}" for i, v in enumerate(_values[:2, :3].flat)
+        )
+        + "} 2 3",
+        "MutMatrix<FP16x16>",
+    ),
+    (
+        [_labels, _values[:, :2]],
+        f"[1 0 2] [3 2] [{_fixed_point(_values[:, :2].flatten())}]",
+        "(Span<u32>, Tensor<FP16x16>)",
+    ),
+]
+
+
+@pytest.mark.parametrize("outputs, serialized, dtype", CASES)
+def test_emulate_response_matches_deserialized(outputs, serialized, dtype):
+    _assert_same(emulate_response(outputs, dtype), deserialize(serialized, dtype))
+
+
+def test_emulate_response_tree_models():
+    assert emulate_response([np.array([[6.553612]])], "i32", "XGB") == 6.55361
+
+
+def test_quantize_inputs():
+    feed = {"x": np.array([0.1, -0.1], dtype=np.float32), "n": np.array([3, -3])}
+
+    quantized = quantize_inputs(feed, "FP16x16", "ONNX_ORION")
+
+    assert quantized["x"].dtype == np.float32
+    assert quantized["x"].tolist() == [6553 / 2**16, -6553 / 2**16]
+    assert quantized["n"].tolist() == [3, -3]
+    assert quantize_inputs(feed, "FP16x16", "XGB")["x"].tolist() == pytest.approx(
+        [0.1, -0.1]
+    )
+    assert fp_factor("FP64x64") == 2**64
+    with pytest.raises(ValueError):
+        fp_factor("F16")
+
+
+@patch("giza.agents.model.requests.post")
+def test_predict_emulated(mock_post, linear_model_factory):
+    model = GizaModel(model_path=linear_model_factory())
+    feed = {"X": np.array([[0.1, -0.25, 3.3]], dtype=np.float32)}
+
+    preds, request_id = model.predict(input_feed=feed, verifiable=True, emulate=True)
+    expected = model.session.run(None, feed)[0]
+
+    mock_post.assert_not_called()
+    assert request_id is None
+    assert preds.dtype == np.float64 and preds.shape == expected.shape
+    assert np.allclose(preds, expected, atol=1e-3)
+    # Every value is on the FP16x16 grid
+    assert np.array_equal(preds * 2**16, np.trunc(preds * 2**16))
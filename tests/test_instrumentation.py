@@ -0,0 +1,133 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pytest
+from giza.cli.schemas.models import Model
+from giza.cli.schemas.versions import Version
+
+from giza.agents.connections import ClientPool
+from giza.agents.instrumentation import (
+    Histogram,
+    HistogramRegistry,
+    PredictionTrace,
+    add_prediction_hook,
+    remove_prediction_hook,
+    server_time,
+)
+from giza.agents.model import GizaModel
+
+
+@pytest.fixture
+def registry():
+    registry = HistogramRegistry().install()
+    yield registry
+    registry.uninstall()
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.observe(value / 1000)
+
+    summary = histogram.summary()
+
+    assert summary["count"] == 1000
+    assert summary["min"] == 0.001 and summary["max"] == 1.0
+    assert summary["p50"] == pytest.approx(0.5, rel=0.05)
+    assert summary["p99"] == pytest.approx(0.99, rel=0.05)
+    assert Histogram().percentile(50) is None
+
+
+def test_server_time():
+    assert server_time({"Server-Timing": 'db;dur=53, app;dur="47.2";desc=x'}) == (
+        pytest.approx(0.1002)
+    )
+    assert server_time({"Server-Timing": "miss"}) is None
+    assert server_time({}) is None
+
+
+def test_failing_hook_is_ignored(registry):
+    def failing(trace):
+        raise RuntimeError("boom")
+
+    add_prediction_hook(failing)
+    try:
+        PredictionTrace("model", "local").finish()
+    finally:
+        remove_prediction_hook(failing)
+
+    assert registry.get("model.local.total_seconds").count == 1
+
+
+def test_local_predict_is_traced(registry, linear_model_factory):
+    model = GizaModel(model_path=linear_model_factory())
+    feed = {"X": np.ones((2, 3), dtype=np.float32)}
+
+    model.predict(input_feed=feed)
+    model.predict(input_feed=feed)
+    with pytest.raises(ValueError):
+        model.predict()
+
+    prefix = f"{model._prediction_namespace()}.local"
+    assert registry.get(f"{prefix}.run_seconds").count == 2
+    assert registry.get(f"{prefix}.total_seconds").count == 3
+    assert registry.get(f"{prefix}.input_bytes").max == feed["X"].nbytes
+    assert registry.errors == {prefix: 1}
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch("giza.agents.model.GizaModel._set_session")
+@patch(
+    "giza.agents.model.GizaModel._retrieve_uri",
+    return_value="https://endpoint.test/cairo_run",
+)
+@patch("giza.agents.model.GizaModel._get_endpoint_id", return_value=1)
+def test_verifiable_apredict_is_traced(*args):
+    traces = []
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            json={"request_id": "123", "result": "[2] [1 2]"},
+            headers={"Server-Timing": "cairo;dur=250"},
+        )
+
+    pool = ClientPool(transport=httpx.MockTransport(handler))
+    model = GizaModel(id=50, version=2, client_pool=pool)
+
+    async def run():
+        await model.apredict(
+            input_feed={"x": np.array([1, 2, 3], dtype=np.int32)},
+            verifiable=True,
+            custom_output_dtype="Tensor<i32>",
+        )
+        await pool.aclose()
+
+    add_prediction_hook(traces.append)
+    try:
+        asyncio.run(run())
+    finally:
+        remove_prediction_hook(traces.append)
+
+    (trace,) = traces
+    assert trace.kind == "verifiable"
+    assert trace.error is None
+    assert set(trace.phases) == {"format", "request", "server", "parse", "total"}
+    assert trace.phases["server"] == pytest.approx(0.25)
+    assert trace.sizes["request_bytes"] > 0
+    assert trace.sizes["response_bytes"] > 0
@@ -0,0 +1,82 @@
+from giza.cli.schemas.jobs import Job, JobList
+
+from giza.agents.jobs import JobIndex
+
+
+class ListingClient:
+    """Lists the jobs of an endpoint without server side filtering."""
+
+    url = "http://api"
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.calls = 0
+
+    def list_jobs(self, endpoint_id: int) -> JobList:
+        self.calls += 1
+        return JobList(root=list(self.jobs))
+
+
+class FilteringClient(ListingClient):
+    def list_jobs(self, endpoint_id: int, params=None) -> JobList:
+        self.calls += 1
+        self.params = params
+        return JobList(
+            root=[job for job in self.jobs if job.request_id == params["request_id"]]
+        )
+
+
+def _job(id: int, request_id: str) -> Job:
+    return Job(id=id, size="S", status="PROCESSING", request_id=request_id)
+
+
+def test_job_index_refreshes_incrementally():
+    client = ListingClient([_job(1, "a"), _job(2, "b")])
+    index = JobIndex(max_jobs=2)
+
+    assert index.find(client, 1, "a").id == 1
+    # Indexed by the previous refresh
+    assert index.find(client, 1, "b").id == 2
+    assert client.calls == 1
+
+    client.jobs.append(_job(3, "c"))
+    assert index.find(client, 1, "c").id == 3
+    assert client.calls == 2
+    # The oldest job was dropped but is still found on a refresh
+    assert index.find(client, 1, "a").id == 1
+    assert index.find(client, 1, "missing") is None
+    # Endpoints are indexed separately
+    assert index.find(client, 2, "c").id == 3
+    assert client.calls == 5
+
+
+def test_job_index_uses_server_filter():
+    client = FilteringClient([_job(1, "a"), _job(2, "b")])
+    index = JobIndex()
+
+    assert index.find(client, 1, "b").id == 2
+    assert client.params == {"request_id": "b"}
+    assert index.find(client, 1, "b").id == 2
+    assert client.calls == 1
+    assert index.find(client, 1, "c") is None
+
+
+def test_job_index_remembers_missing_requests():
+    client = ListingClient([_job(1, "a")])
+    index = JobIndex(miss_ttl=60)
+
+    assert index.find(client, 1, "b") is None
+    # Not listed again while the miss is fresh
+    assert index.find(client, 1, "b") is None
+    assert client.calls == 1
+
+    # Other requests still refresh the index, and find the missed job once it exists
+    client.jobs.append(_job(2, "b"))
+    assert index.find(client, 1, "c") is None
+    assert index.find(client, 1, "b").id == 2
+    assert client.calls == 2
+
+    expired = JobIndex(miss_ttl=0)
+    assert expired.find(client, 1, "d") is None
+    assert expired.find(client, 1, "d") is None
+    assert client.calls == 4
@@ -1,12 +1,22 @@
 # TODO: Implement a test env.
+import asyncio
+import hashlib
 import os
 import tempfile
-from unittest.mock import patch
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import Mock, patch
 
+import httpx
 import numpy as np
+import pytest
+import requests
+from giza.cli.schemas.endpoints import Endpoint, EndpointsList
 from giza.cli.schemas.models import Model
 from giza.cli.schemas.versions import Version
 
+from giza.agents.connections import ClientPool
 from giza.agents.model import GizaModel
 
 
@@ -21,7 +31,13 @@ class ResponseStub:
         pass
 
 
+def _fake_download(url, destination, **kwargs):
+    Path(destination).write_bytes(b"some bytes")
+    return hashlib.sha256(b"some bytes").hexdigest()
+
+
 @patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
 @patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
 @patch(
     "giza.agents.model.GizaModel._get_version",
@@ -47,7 +63,11 @@ class ResponseStub:
     "giza.agents.model.GizaModel._parse_cairo_response",
     return_value=np.array([[1, 2], [3, 4]], dtype=np.uint32),
 )
-@patch("giza.agents.model.VersionsClient.download_original", return_value=b"some bytes")
+@patch(
+    "giza.agents.model.StreamingVersionsClient.get_original_download_url",
+    return_value="https://storage.test/model",
+)
+@patch("giza.agents.model.stream_download", side_effect=_fake_download)
 def test_predict_success(*args):
     model = GizaModel(id=50, version=2)
 
@@ -62,6 +82,7 @@ def test_predict_success(*args):
 
 
 @patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
 @patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
 @patch(
     "giza.agents.model.GizaModel._get_version",
@@ -87,7 +108,11 @@ def test_predict_success(*args):
     "giza.agents.model.GizaModel._parse_cairo_response",
     return_value=np.array([[1, 2], [3, 4]], dtype=np.uint32),
 )
-@patch("giza.agents.model.VersionsClient.download_original", return_value=b"some bytes")
+@patch(
+    "giza.agents.model.StreamingVersionsClient.get_original_download_url",
+    return_value="https://storage.test/model",
+)
+@patch("giza.agents.model.stream_download", side_effect=_fake_download)
 def test_predict_success_with_file(*args):
     model = GizaModel(id=50, version=2)
 
@@ -107,6 +132,7 @@ def test_predict_success_with_file(*args):
 
 
 @patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
 @patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
 @patch(
     "giza.agents.model.GizaModel._get_version",
@@ -123,7 +149,11 @@ def test_predict_success_with_file(*args):
 @patch("giza.agents.model.GizaModel._get_output_dtype")
 @patch("giza.agents.model.GizaModel._retrieve_uri")
 @patch("giza.agents.model.GizaModel._get_endpoint_id", return_value=1)
-@patch("giza.agents.model.VersionsClient.download_original", return_value=b"some bytes")
+@patch(
+    "giza.agents.model.StreamingVersionsClient.get_original_download_url",
+    return_value="https://storage.test/model",
+)
+@patch("giza.agents.model.stream_download", side_effect=_fake_download)
 def test_cache_implementation(*args):
     model = GizaModel(id=50, version=2)
 
@@ -140,3 +170,590 @@ def test_cache_implementation(*args):
     cache_size_after_fourth_call = len(model._cache)
     assert result3 == result4
     assert cache_size_after_third_call == cache_size_after_fourth_call
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch("giza.agents.model.GizaModel._set_session")
+@patch(
+    "giza.agents.model.GizaModel._retrieve_uri",
+    return_value="https://endpoint.test/cairo_run",
+)
+@patch("giza.agents.model.GizaModel._get_endpoint_id", return_value=1)
+@patch(
+    "giza.agents.model.GizaModel._parse_cairo_response",
+    return_value=np.array([[1, 2], [3, 4]], dtype=np.uint32),
+)
+def test_apredict_success(*args):
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(200, json={"request_id": "123", "result": "[2 2] [1 2]"})
+
+    pool = ClientPool(transport=httpx.MockTransport(handler))
+    model = GizaModel(id=50, version=2, client_pool=pool)
+    arr = np.array([[1, 2], [3, 4]], dtype=np.uint32)
+
+    async def run():
+        results = await asyncio.gather(
+            *[
+                model.apredict(
+                    input_feed={"arr_1": arr},
+                    verifiable=True,
+                    custom_output_dtype="dummy_type",
+                )
+                for _ in range(3)
+            ]
+        )
+        clients = set(pool._async_clients[asyncio.get_running_loop()].values())
+        await pool.aclose()
+        return results, clients
+
+    results, clients = asyncio.run(run())
+
+    assert len(clients) == 1
+    assert len(requests_seen) == 3
+    for result, req_id in results:
+        assert np.array_equal(result, arr)
+        assert req_id == "123"
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch("giza.agents.model.GizaModel._set_session")
+@patch(
+    "giza.agents.model.GizaModel._retrieve_uri",
+    return_value="https://endpoint.test/cairo_run",
+)
+@patch("giza.agents.model.GizaModel._get_endpoint_id", return_value=1)
+@patch(
+    "giza.agents.model.GizaModel._parse_cairo_response",
+    return_value=np.array([[1, 2], [3, 4]], dtype=np.uint32),
+)
+def test_apredict_coalesces_identical_requests(*args):
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"request_id": "123", "result": "[2 2] [1 2]"})
+
+    pool = ClientPool(transport=httpx.MockTransport(handler))
+    model = GizaModel(id=50, version=2, client_pool=pool)
+    other = GizaModel(id=50, version=2, client_pool=pool)
+    arr = np.array([[1, 2], [3, 4]], dtype=np.uint32)
+
+    async def run():
+        results = await asyncio.gather(
+            *[
+                instance.apredict(
+                    input_feed={"arr_1": arr},
+                    verifiable=True,
+                    custom_output_dtype="dummy_type",
+                )
+                for instance in [model, other, model]
+            ],
+            model.apredict(
+                input_feed={"arr_1": arr + 1},
+                verifiable=True,
+                custom_output_dtype="dummy_type",
+            ),
+        )
+        await pool.aclose()
+        return results
+
+    results = asyncio.run(run())
+
+    assert len(requests_seen) == 2
+    assert [req_id for _, req_id in results] == ["123"] * 4
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch("giza.agents.model.GizaModel._set_session")
+@patch(
+    "giza.agents.model.GizaModel._retrieve_uri",
+    return_value="https://endpoint.test/cairo_run",
+)
+@patch("giza.agents.model.GizaModel._get_endpoint_id", return_value=1)
+@patch(
+    "giza.agents.model.GizaModel._parse_cairo_response",
+    return_value=np.array([[1, 2], [3, 4]], dtype=np.uint32),
+)
+@patch("giza.agents.model.requests.post")
+def test_predict_coalesces_identical_requests(mock_post, *args):
+    def slow_post(*args, **kwargs):
+        time.sleep(0.05)
+        return ResponseStub({"request_id": "123", "result": "[2 2] [1 2]"})
+
+    mock_post.side_effect = slow_post
+    arr = np.array([[1, 2], [3, 4]], dtype=np.uint32)
+
+    def run(coalesce_requests):
+        model = GizaModel(id=50, version=2, coalesce_requests=coalesce_requests)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            return list(
+                executor.map(
+                    lambda _: model.predict(
+                        input_feed={"arr_1": arr},
+                        verifiable=True,
+                        custom_output_dtype="dummy_type",
+                    ),
+                    range(4),
+                )
+            )
+
+    results = run(coalesce_requests=True)
+    assert mock_post.call_count == 1
+    assert [req_id for _, req_id in results] == ["123"] * 4
+
+    run(coalesce_requests=False)
+    assert mock_post.call_count == 5
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._set_session")
+@patch("giza.agents.model.ModelsClient.get", return_value=Model(id=50, name="model"))
+@patch(
+    "giza.agents.model.StreamingVersionsClient.get",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch(
+    "giza.agents.model.EndpointsClient.list",
+    return_value=EndpointsList(
+        root=[Endpoint(id=7, size="S", is_active=True, uri="https://endpoint.test")]
+    ),
+)
+def test_metadata_cached_between_instances(
+    mock_list,
+    mock_version,
+    mock_model,
+    mock_session,
+    mock_credentials,
+):
+    model = GizaModel(id=50, version=2)
+    assert model.uri == "https://endpoint.test/cairo_run"
+    assert model.endpoint_id == 7
+    mock_list.assert_called_once()
+    mock_model.assert_called_once()
+    mock_version.assert_called_once()
+
+    warm = GizaModel(id=50, version=2)
+    assert warm.uri == model.uri
+    assert warm.endpoint_id == model.endpoint_id
+    assert warm.model == model.model
+    mock_list.assert_called_once()
+    mock_model.assert_called_once()
+    mock_version.assert_called_once()
+
+    warm.invalidate_metadata()
+    GizaModel(id=50, version=2)
+    assert mock_list.call_count == 2
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch("giza.agents.model.GizaModel._retrieve_uri")
+@patch("giza.agents.model.GizaModel._get_endpoint_id", return_value=1)
+@patch("giza.agents.model.GizaModel._set_session", return_value="session")
+def test_session_is_lazy(mock_set_session, *args):
+    model = GizaModel(id=50, version=2)
+    mock_set_session.assert_not_called()
+
+    assert model.warmup() == "session"
+    assert model.session == "session"
+    mock_set_session.assert_called_once()
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch("giza.agents.model.GizaModel._retrieve_uri")
+@patch("giza.agents.model.GizaModel._get_endpoint_id", return_value=1)
+@patch("giza.agents.model.GizaModel._download_model")
+def test_session_with_shared_weights(
+    mock_download,
+    mock_endpoint_id,
+    mock_uri,
+    mock_version,
+    mock_model,
+    mock_endpoints,
+    mock_credentials,
+    linear_model_factory,
+):
+    path = linear_model_factory(features=64, outputs=32)
+    mock_download.return_value = Path(path)
+    feed = {"X": np.ones((2, 64), dtype=np.float32)}
+
+    shared = GizaModel(id=50, version=2, share_weights=True)
+    private = GizaModel(id=50, version=2)
+
+    preds, _ = shared.predict(input_feed=feed)
+    assert np.allclose(preds, private.predict(input_feed=feed)[0])
+    mapped_dir = shared._artifacts.mapped_dir(50, 2, Path(path).stem)
+    assert (mapped_dir / "model.onnx").exists()
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch("giza.agents.model.GizaModel._retrieve_uri")
+@patch("giza.agents.model.GizaModel._get_endpoint_id", return_value=1)
+@patch("giza.agents.model.GizaModel._download_model")
+def test_output_dtype_is_memoized(
+    mock_download,
+    mock_endpoint_id,
+    mock_uri,
+    mock_version,
+    mock_model,
+    mock_endpoints,
+    mock_credentials,
+    linear_model_factory,
+):
+    mock_download.return_value = linear_model_factory()
+    model = GizaModel(id=50, version=2)
+
+    assert model._get_output_dtype() == "Tensor<FP16x16>"
+    assert model._get_output_dtype() == "Tensor<FP16x16>"
+    mock_download.assert_called_once()
+
+    other = GizaModel(id=50, version=2)
+    assert other._get_output_dtype() == "Tensor<FP16x16>"
+    mock_download.assert_called_once()
+
+
+def test_prediction_cache(linear_model_factory):
+    model = GizaModel(model_path=linear_model_factory())
+    assert model.prediction_cache_stats is None
+    model.enable_prediction_cache(max_entries=8)
+    feed = {"X": np.ones((2, 3), dtype=np.float32)}
+
+    with patch.object(model, "_session", wraps=model.session) as session:
+        first, _ = model.predict(input_feed=feed)
+        second, _ = model.predict(input_feed={"X": feed["X"].copy()})
+        model.predict(input_feed={"X": feed["X"] * 2})
+
+    assert np.array_equal(first, second)
+    assert session.run.call_count == 2
+    assert model.prediction_cache_stats["hits"] == 1
+    assert model.prediction_cache_stats["misses"] == 2
+    model.disable_prediction_cache()
+    assert model.prediction_cache_stats is None
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch(
+    "giza.agents.model.GizaModel._get_endpoints",
+    return_value=[
+        Endpoint(id=i, size="S", is_active=True, uri=f"https://endpoint-{i}.test")
+        for i in (7, 8, 9)
+    ],
+)
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch(
+    "giza.agents.model.GizaModel._parse_cairo_response",
+    return_value=np.array([1], dtype=np.uint32),
+)
+def test_predict_releases_endpoints_on_errors(*args):
+    class ErrorResponse(ResponseStub):
+        status_code = 400
+        text = "bad request"
+
+        def raise_for_status(self):
+            raise requests.exceptions.HTTPError("400 Client Error")
+
+    model = GizaModel(id=50, version=2, coalesce_requests=False)
+    model.endpoints_client = Mock()
+
+    with patch(
+        "giza.agents.model.requests.post",
+        side_effect=requests.exceptions.ReadTimeout("timed out"),
+    ):
+        for _ in range(3):
+            with pytest.raises(requests.exceptions.ReadTimeout):
+                model.predict(input_feed={"x": np.array([1])}, verifiable=True)
+
+    replicas = model._balancer.replicas
+    assert [replica.outstanding for replica in replicas] == [0, 0, 0]
+    assert [replica.failures for replica in replicas] == [1, 1, 1]
+
+    # A client error is not the endpoint's fault, the metadata is kept
+    with patch(
+        "giza.agents.model.requests.post", return_value=ErrorResponse({})
+    ), patch.object(model, "invalidate_metadata") as mock_invalidate:
+        with pytest.raises(requests.exceptions.HTTPError):
+            model.predict(input_feed={"x": np.array([1])}, verifiable=True)
+    mock_invalidate.assert_not_called()
+    assert sum(replica.outstanding for replica in replicas) == 0
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch(
+    "giza.agents.model.GizaModel._get_endpoints",
+    return_value=[
+        Endpoint(id=i, size="S", is_active=True, uri=f"https://endpoint-{i}.test")
+        for i in (7, 8, 9)
+    ],
+)
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch(
+    "giza.agents.model.GizaModel._get_version",
+    return_value=Version(
+        version=2,
+        framework="CAIRO",
+        size=1,
+        status="COMPLETED",
+        created_date="2022-01-01T00:00:00Z",
+        last_update="2022-01-01T00:00:00Z",
+    ),
+)
+@patch(
+    "giza.agents.model.GizaModel._parse_cairo_response",
+    return_value=np.array([1], dtype=np.uint32),
+)
+def test_predict_balances_across_endpoints(*args):
+    uris = []
+
+    def post(uri, **kwargs):
+        uris.append(uri)
+        if uri == "https://endpoint-8.test/cairo_run":
+            raise requests.exceptions.ConnectionError("unreachable")
+        return ResponseStub({"request_id": str(len(uris)), "result": "[1] [1]"})
+
+    model = GizaModel(id=50, version=2, coalesce_requests=False)
+    assert model.endpoint_id == 7
+    assert model.uri == "https://endpoint-7.test/cairo_run"
+
+    with patch("giza.agents.model.requests.post", side_effect=post):
+        request_ids = [
+            model.predict(
+                input_feed={"x": np.array([i])},
+                verifiable=True,
+                custom_output_dtype="dummy_type",
+            )[1]
+            for i in range(4)
+        ]
+
+    # The unreachable endpoint is retried elsewhere and left out of rotation
+    assert [uri.split("/")[2] for uri in uris] == [
+        "endpoint-7.test",
+        "endpoint-8.test",
+        "endpoint-9.test",
+        "endpoint-7.test",
+        "endpoint-9.test",
+    ]
+    assert [model._endpoint_for(request_id) for request_id in request_ids] == [
+        7,
+        9,
+        7,
+        9,
+    ]
+
+
+def _multi_endpoint_patches(test):
+    for decorator in reversed(
+        [
+            patch("giza.agents.model.GizaModel._get_credentials"),
+            patch(
+                "giza.agents.model.GizaModel._get_endpoints",
+                return_value=[
+                    Endpoint(
+                        id=i, size="S", is_active=True, uri=f"https://endpoint-{i}.test"
+                    )
+                    for i in (7, 8)
+                ],
+            ),
+            patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50)),
+            patch(
+                "giza.agents.model.GizaModel._get_version",
+                return_value=Version(
+                    version=2,
+                    framework="CAIRO",
+                    size=1,
+                    status="COMPLETED",
+                    created_date="2022-01-01T00:00:00Z",
+                    last_update="2022-01-01T00:00:00Z",
+                ),
+            ),
+            patch(
+                "giza.agents.model.GizaModel._parse_cairo_response",
+                return_value=np.array([1], dtype=np.uint32),
+            ),
+        ]
+    ):
+        test = decorator(test)
+    return test
+
+
+@_multi_endpoint_patches
+def test_coalesced_predictions_remember_the_serving_endpoint(*args):
+    uris = []
+
+    def post(uri, **kwargs):
+        uris.append(uri)
+        if uri == "https://endpoint-7.test/cairo_run":
+            raise requests.exceptions.ConnectionError("unreachable")
+        time.sleep(0.05)
+        return ResponseStub({"request_id": "123", "result": "[1] [1]"})
+
+    models = [GizaModel(id=50, version=2), GizaModel(id=50, version=2)]
+    with patch("giza.agents.model.requests.post", side_effect=post):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(
+                executor.map(
+                    lambda model: model.predict(
+                        input_feed={"x": np.array([1])},
+                        verifiable=True,
+                        custom_output_dtype="dummy_type",
+                    ),
+                    models,
+                )
+            )
+
+    # One request, served by the second endpoint, for both instances
+    assert len(uris) == 2
+    assert [request_id for _, request_id in results] == ["123", "123"]
+    assert [model._endpoint_for("123") for model in models] == [8, 8]
+
+
+@_multi_endpoint_patches
+def test_predict_invalidates_metadata_of_gone_endpoints(*args):
+    class NotFoundResponse(ResponseStub):
+        status_code = 404
+        text = "not found"
+
+        def raise_for_status(self):
+            raise requests.exceptions.HTTPError("404 Client Error")
+
+    model = GizaModel(id=50, version=2, coalesce_requests=False)
+    model.endpoints_client = Mock()
+
+    # Torn down endpoints answer 404 or refuse the connection
+    with patch(
+        "giza.agents.model.requests.post", return_value=NotFoundResponse({})
+    ), patch.object(model, "invalidate_metadata") as mock_invalidate:
+        with pytest.raises(requests.exceptions.HTTPError):
+            model.predict(input_feed={"x": np.array([1])}, verifiable=True)
+    mock_invalidate.assert_called_once()
+
+    with patch(
+        "giza.agents.model.requests.post",
+        side_effect=requests.exceptions.ConnectionError("refused"),
+    ), patch.object(model, "invalidate_metadata") as mock_invalidate:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            model.predict(input_feed={"x": np.array([2])}, verifiable=True)
+    assert mock_invalidate.call_count == 2
+
+
+@_multi_endpoint_patches
+def test_apredict_invalidates_metadata_of_gone_endpoints(*args):
+    def handler(request):
+        if request.url.host == "endpoint-7.test":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(404, text="not found")
+
+    pool = ClientPool(transport=httpx.MockTransport(handler))
+    model = GizaModel(id=50, version=2, client_pool=pool, coalesce_requests=False)
+    model.endpoints_client = Mock()
+
+    async def run():
+        try:
+            await model.apredict(input_feed={"x": np.array([1])}, verifiable=True)
+        finally:
+            await pool.aclose()
+
+    with patch.object(model, "invalidate_metadata") as mock_invalidate:
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(run())
+
+    # Once for the refused connection, once for the 404 of the other endpoint
+    assert mock_invalidate.call_count == 2
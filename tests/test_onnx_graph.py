@@ -0,0 +1,84 @@
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnx import TensorProto, helper
+
+from giza.agents.onnx_graph import (
+    WEIGHTS_ALIGNMENT,
+    externalize_weights,
+    index_producers,
+    load_graph,
+    parse_graph,
+)
+
+
+def _classifier_model():
+    weights = helper.make_tensor(
+        "W",
+        TensorProto.FLOAT,
+        [64, 64],
+        np.ones((64, 64), dtype=np.float32).tobytes(),
+        raw=True,
+    )
+    graph = helper.make_graph(
+        [
+            helper.make_node("MatMul", ["X", "W"], ["H"]),
+            helper.make_node(
+                "LinearClassifier",
+                ["H"],
+                ["label", "probabilities"],
+                domain="ai.onnx.ml",
+                coefficients=[1.0] * 128,
+                classlabels_ints=[0, 1],
+            ),
+        ],
+        "classifier",
+        [helper.make_tensor_value_info("X", TensorProto.FLOAT, ["N", 64])],
+        [
+            helper.make_tensor_value_info("label", TensorProto.INT64, ["N"]),
+            helper.make_tensor_value_info("probabilities", TensorProto.FLOAT, ["N", 2]),
+        ],
+        initializer=[weights],
+    )
+    return helper.make_model(graph, ir_version=8, doc_string="classifier")
+
+
+def test_parse_graph_skips_initializers():
+    model = _classifier_model()
+
+    graph = parse_graph(model.SerializeToString())
+
+    assert len(graph.initializer) == 0
+    assert graph.name == "classifier"
+    assert [node.op_type for node in graph.node] == ["MatMul", "LinearClassifier"]
+    assert [output.name for output in graph.output] == ["label", "probabilities"]
+    assert graph.node[1].attribute == model.graph.node[1].attribute
+
+
+def test_load_graph_and_index_producers(tmp_path):
+    path = tmp_path / "classifier.onnx"
+    onnx.save(_classifier_model(), str(path))
+
+    graph = load_graph(path)
+    producers = index_producers(graph)
+
+    assert producers["label"].op_type == "LinearClassifier"
+    assert producers["probabilities"].op_type == "LinearClassifier"
+    assert producers["H"].op_type == "MatMul"
+    assert "X" not in producers
+
+
+def test_externalize_weights(tmp_path, linear_model_factory):
+    path = linear_model_factory(features=64, outputs=32)
+
+    mapped = externalize_weights(path, tmp_path / "mapped")
+
+    weights = onnx.load_model(str(mapped), load_external_data=False).graph.initializer[
+        0
+    ]
+    assert weights.data_location == TensorProto.EXTERNAL
+    location = {entry.key: entry.value for entry in weights.external_data}
+    assert int(location["offset"]) % WEIGHTS_ALIGNMENT == 0
+    feed = {"X": np.ones((2, 64), dtype=np.float32)}
+    expected = ort.InferenceSession(path).run(None, feed)[0]
+    assert np.allclose(ort.InferenceSession(str(mapped)).run(None, feed)[0], expected)
@@ -0,0 +1,52 @@
+import random
+
+from giza.agents.polling import DurationHistory, PollSchedule
+
+
+def test_duration_history_stats(tmp_path):
+    history = DurationHistory(tmp_path, max_samples=3)
+    key = history.key(1, 2, "S", "proof")
+
+    assert history.expected(key) is None
+    assert history.stats(key) == {"count": 0}
+
+    for duration in [100.0, 10.0, 20.0, 30.0]:
+        history.record(key, duration)
+
+    # Only the most recent durations are kept, and they persist
+    assert DurationHistory(tmp_path).durations(key) == [10.0, 20.0, 30.0]
+    assert history.expected(key) == 20.0
+    assert history.stats(key)["max"] == 30.0
+    assert history.expected(history.key(1, 2, "M", "proof")) is None
+
+
+def test_poll_schedule_tightens_near_expected_finish():
+    schedule = PollSchedule(
+        expected=60.0, min_interval=1.0, max_interval=20.0, jitter=0.0
+    )
+
+    assert schedule.next_delay(0.0) == 20.0
+    assert schedule.next_delay(40.0) == 10.0
+    assert schedule.next_delay(55.0) == 2.5
+    assert schedule.next_delay(59.5) == 1.0
+
+
+def test_poll_schedule_backs_off_when_overdue():
+    schedule = PollSchedule(
+        expected=10.0, min_interval=1.0, max_interval=5.0, backoff=2.0, jitter=0.0
+    )
+
+    delays = [schedule.next_delay(20.0) for _ in range(5)]
+
+    assert delays == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_poll_schedule_jitter():
+    schedule = PollSchedule(
+        min_interval=10.0, max_interval=10.0, jitter=0.2, rng=random.Random(0)
+    )
+
+    delays = [schedule.next_delay(0.0) for _ in range(10)]
+
+    assert all(8.0 <= delay <= 12.0 for delay in delays)
+    assert len(set(delays)) == 10
@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+
+from giza.agents.model import GizaModel
+from giza.agents.pool import InferencePool
+
+
+def _shared_memory_blocks():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+@pytest.fixture
+def model_path(linear_model_factory):
+    return linear_model_factory(features=64, outputs=8)
+
+
+def test_pool_matches_session(model_path):
+    session = ort.InferenceSession(model_path)
+    rng = np.random.default_rng(0)
+    feeds = [{"X": rng.random((rows, 64), dtype=np.float32)} for rows in (1, 300, 2)]
+    before = _shared_memory_blocks()
+
+    # 300 rows are 75 KiB, above the threshold, so that input goes through shared memory
+    with InferencePool(model_path, workers=2) as pool:
+        results = list(pool.map(feeds))
+
+    for feed, outputs in zip(feeds, results):
+        assert np.allclose(outputs[0], session.run(None, feed)[0])
+    assert _shared_memory_blocks() == before
+
+
+def test_predict_through_process_pool(model_path):
+    model = GizaModel(model_path=model_path)
+    feed = {"X": np.ones((4, 64), dtype=np.float32)}
+    expected, _ = model.predict(input_feed=feed)
+
+    model.enable_process_pool(workers=1, shared_memory_threshold=0)
+    try:
+        preds, request_id = model.predict(input_feed=feed)
+    finally:
+        model.disable_process_pool()
+
+    assert request_id is None
+    assert np.allclose(preds, expected)
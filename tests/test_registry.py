@@ -0,0 +1,76 @@
+import gc
+from unittest.mock import patch
+
+import pytest
+from giza.cli import API_HOST
+from giza.cli.schemas.endpoints import Endpoint
+from giza.cli.schemas.models import Model
+from giza.cli.schemas.versions import Version
+
+from giza.agents.model import GizaModel
+from giza.agents.registry import ModelRegistry
+
+VERSION = Version(
+    version=2,
+    framework="CAIRO",
+    size=1,
+    status="COMPLETED",
+    created_date="2022-01-01T00:00:00Z",
+    last_update="2022-01-01T00:00:00Z",
+)
+ENDPOINTS = [Endpoint(id=1, size="S", is_active=True, uri="https://endpoint.test")]
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=ENDPOINTS)
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch("giza.agents.model.GizaModel._get_version", return_value=VERSION)
+@patch("giza.agents.model.GizaModel._download_model")
+def test_models_share_state(
+    mock_download,
+    mock_version,
+    mock_model,
+    mock_endpoints,
+    mock_credentials,
+    linear_model_factory,
+):
+    mock_download.return_value = linear_model_factory()
+    registry = ModelRegistry()
+
+    first = GizaModel(id=50, version=2, registry=registry, metadata_ttl=0)
+    second = GizaModel(id=50, version=2, registry=registry, metadata_ttl=0)
+    other = GizaModel(id=50, version=2, metadata_ttl=0)
+
+    assert mock_credentials.call_count == 2
+    assert mock_model.call_count == 2
+    assert first.endpoints_client is second.endpoints_client
+    assert first._balancer is second._balancer
+    assert other.endpoints_client is not first.endpoints_client
+    assert first.uri == second.uri == "https://endpoint.test/cairo_run"
+    assert first.session is second.session
+    assert other.session is not first.session
+    assert mock_download.call_count == 2
+    shared = first._shared
+    assert registry.get(API_HOST, 50, 2) is shared
+    assert shared.refs == 2
+
+    first.release()
+    first.release()
+    assert shared.refs == 1
+    assert second.session is not None
+    del second
+    gc.collect()
+    assert len(registry) == 0
+
+
+@patch("giza.agents.model.GizaModel._get_credentials")
+@patch("giza.agents.model.GizaModel._get_endpoints", return_value=[])
+@patch("giza.agents.model.GizaModel._get_model", return_value=Model(id=50))
+@patch("giza.agents.model.GizaModel._get_version", return_value=VERSION)
+def test_failed_model_releases_state(*args):
+    registry = ModelRegistry()
+
+    with pytest.raises(ValueError):
+        GizaModel(id=50, version=2, registry=registry, metadata_ttl=0)
+
+    assert len(registry) == 0
@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from osiris.app import create_tensor_from_array, deserialize, serializer
+
+from giza.agents.serialization import (
+    deserialize_response,
+    encode_felts,
+    serialize_input,
+    serialize_tensor,
+)
+
+_rng = np.random.default_rng(0)
+
+ARRAYS = [
+    _rng.normal(size=(3, 4)).astype(np.float32) * 1000,
+    _rng.normal(size=50) * 1e6,
+    _rng.normal(size=5).astype(np.float16),
+    np.array([0.0, -0.0, 1e-30, -1e-30]),
+    np.array(2.5),
+    np.array([], dtype=np.float32),
+    _rng.integers(-(2**63), 2**63 - 1, size=100, dtype=np.int64),
+    _rng.integers(-5, 5, size=(2, 2, 2)).astype(np.int8),
+    np.array([2**64 - 1, 0], dtype=np.uint64),
+]
+
+
+@pytest.mark.parametrize("fp_impl", ["FP8x23", "FP16x16", "FP32x32"])
+@pytest.mark.parametrize("array", ARRAYS)
+def test_serialize_tensor_matches_osiris(array, fp_impl):
+    assert serialize_tensor(array, fp_impl) == serializer(
+        create_tensor_from_array(array, fp_impl)
+    )
+
+
+def test_encode_felts_negative_edges():
+    # Around the lowest 19 digits of the prime, where the encoding borrows from the high digits
+    values = np.array(
+        [-(2**63), 2**63 - 1, 0, -1, -3092056135872020480, -3092056135872020481]
+        + [-3092056135872020482]
+    )
+
+    assert f"[{encode_felts(values)}]" == serializer(values)
+
+
+@pytest.mark.parametrize("model_category", ["XGB", "LGBM"])
+def test_serialize_input_tree_models(model_category):
+    value = _rng.normal(size=(4, 5))
+
+    expected = serializer((value.flatten() * 100000).astype(np.int64))
+    assert serialize_input(value, model_category) == expected
+
+
+def test_serialize_tensor_falls_back_to_osiris():
+    assert (
+        serialize_tensor(np.array([1.5]), "FP64x64") == "[1] [27670116110564327424 0]"
+    )
+    with pytest.raises(ValueError):
+        serialize_tensor(np.array([np.nan], dtype=np.float32))
+
+
+def _serialized_fixed_point(values):
+    return " ".join(
+        f"{abs(int(v * 2**16))} {'true' if v < 0 else 'false'}" for v in values
+    )
+
+
+def _assert_same(result, expected):
+    if isinstance(expected, tuple):
+        assert isinstance(result, tuple) and len(result) == len(expected)
+        for part, expected_part in zip(result, expected):
+            _assert_same(part, expected_part)
+    else:
+        assert result.dtype == expected.dtype
+        assert result.shape == expected.shape
+        assert np.array_equal(result, expected)
+
+
+_values = _rng.normal(size=12) * 100
+
+RESPONSES = [
+    (f"[3 4] [{_serialized_fixed_point(_values)}]", "Tensor<FP16x16>"),
+    ("[2 2] [1 0 7 3]", "Tensor<i32>"),
+    (f"[{_serialized_fixed_point(_values[:4])}]", "Span<FP16x16>"),
+    ("[1 0 2]", "Span<u32>"),
+    (
+        "{"
+        + " ".join(
+            f"{i}: {abs(int(v * 2**16))} {'true' if v < 0 else 'false'}"
+            for i, v in enumerate(_values[:6])
+        )
+        + "} 2 3",
+        "MutMatrix<FP16x16>",
+    ),
+    (
+        f"[1 2] [1 0] [2] [{_serialized_fixed_point(_values[:2])}]",
+        "(Tensor<i32>, Tensor<FP16x16>)",
+    ),
+    (
+        f"[1 0] [2 1] [{_serialized_fixed_point(_values[:2])}]",
+        "(Span<u32>, Tensor<FP16x16>)",
+    ),
+]
+
+
+@pytest.mark.parametrize("serialized, dtype", RESPONSES)
+def test_deserialize_response_matches_osiris(serialized, dtype):
+    with patch("giza.agents.serialization.deserialize") as fallback:
+        result = deserialize_response(serialized, dtype)
+
+    fallback.assert_not_called()
+    _assert_same(result, deserialize(serialized, dtype))
+
+
+def test_deserialize_response_falls_back_to_osiris():
+    felt = str(2**251 + 17 * 2**192 + 1 - 5)
+
+    result = deserialize_response(f"[2] [{felt} 4]", "Tensor<i32>")
+
+    assert result.tolist() == [-5, 4]
+    assert deserialize_response("655360", "i32", framework="XGB") == 6.5536
@@ -0,0 +1,33 @@
+from giza.agents.store import VerificationStore
+
+
+def test_verification_store_updates_records(tmp_path):
+    store = VerificationStore(tmp_path)
+
+    assert store.get("123") is None
+    store.update("123", value=[1], job={"id": 1})
+    record = store.update("123", verified=True)
+
+    assert record["value"] == [1]
+    assert record["verified"] is True
+    assert record["updated_at"] >= record["created_at"]
+    # Records survive a new store on the same directory
+    assert VerificationStore(tmp_path).get("123") == record
+    assert "123" in store and len(store) == 1
+    assert store.delete("123")
+    assert store.get("123") is None
+
+
+def test_verification_store_finds_verified_proofs(tmp_path):
+    store = VerificationStore(tmp_path)
+    store.update("123", verified=True, verification=True)
+    store.update("456", verified=True, verification=False)
+    store.remember_proof("a", "123")
+    store.remember_proof("b", "456")
+
+    assert store.find_proof("a")["request_id"] == "123"
+    # Failed verifications and unknown payloads are not reused
+    assert store.find_proof("b") is None
+    assert store.find_proof("c") is None
+    store.delete("123")
+    assert store.find_proof("a") is None
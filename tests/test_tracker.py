@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+from giza.cli.schemas.jobs import Job
+from giza.cli.schemas.logs import Logs
+
+from giza.agents.polling import PollSchedule
+from giza.agents.tracker import ProofTracker
+
+
+class JobsClientStub:
+    """Jobs complete after being polled `polls` times."""
+
+    def __init__(self, polls, failed=()):
+        self.polls = polls
+        self.failed = failed
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def status(self, job_id):
+        with self.lock:
+            self.counts[job_id] = self.counts.get(job_id, 0) + 1
+            if self.counts[job_id] < self.polls:
+                return "PROCESSING"
+        return "FAILED" if job_id in self.failed else "COMPLETED"
+
+    def get(self, job_id, params=None):
+        return Job(id=job_id, size="S", status=self.status(job_id))
+
+    def get_logs(self, job_id):
+        return Logs(logs="dummy_logs")
+
+
+def _processing(job_id):
+    return Job(id=job_id, size="S", status="PROCESSING")
+
+
+def _schedule():
+    return PollSchedule(min_interval=0.001, max_interval=0.001, jitter=0.0)
+
+
+def test_tracker_bounds_requests_per_round():
+    client = JobsClientStub(polls=3)
+    tracker = ProofTracker(interval=0.01, max_requests=2)
+
+    futures = [
+        tracker.track(
+            _processing(i), client, schedule=_schedule(), then=lambda t: t.job.id * 2
+        )
+        for i in range(6)
+    ]
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4, 6, 8, 10]
+    assert tracker.stats["requests"] == 18
+    assert tracker.stats["rounds"] >= 9
+    assert len(tracker) == 0
+    tracker.close()
+
+
+def test_tracker_failed_and_timed_out_jobs():
+    client = JobsClientStub(polls=2, failed=(1,))
+    tracker = ProofTracker(interval=0.01)
+
+    failed = tracker.track(_processing(1), client, schedule=_schedule())
+    timed_out = tracker.track(_processing(2), client, timeout=-1)
+
+    with pytest.raises(ValueError):
+        failed.result(timeout=5)
+    with pytest.raises(TimeoutError):
+        timed_out.result(timeout=5)
+
+    tracker.close()
+    with pytest.raises(ValueError):
+        tracker.track(_processing(3), client)